@@ -0,0 +1,63 @@
+import asyncio
+import time
+from typing import Callable, Dict, Sequence
+
+from benchmarks.fake_fleet import FakeFleet
+from benchmarks.stats import summarize_latencies
+from tools.fleet import FleetAggregator
+
+
+async def _wait_for(condition: Callable[[], bool], timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("The fleet view did not catch up in time")
+        await asyncio.sleep(0.001)
+
+
+def _query_latencies(operation: Callable[[], object], iterations: int) -> dict:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - started)
+    return summarize_latencies(latencies)
+
+
+async def _fleet(size: int, queries: int) -> dict:
+    fleet = FakeFleet(size)
+    aggregator = FleetAggregator(fleet.urls, transport=fleet.transport)
+    expected = size * len(aggregator.tools)
+
+    started = time.perf_counter()
+    await aggregator.start()
+    try:
+        await _wait_for(lambda: len(aggregator.index) == expected)
+        sync_seconds = time.perf_counter() - started
+
+        # Every agent reports one change, the round is over once the view shows all of them
+        started = time.perf_counter()
+        for agent in fleet.agents.values():
+            agent.set_state("ADConnectionTool", {"is_connected": False, "azure_ad_joined": False, "domain_joined": True})
+        await _wait_for(lambda: len(aggregator.index.query("ADConnectionTool", filters={"is_connected": False})) == size)
+        update_seconds = time.perf_counter() - started
+
+        disconnected = _query_latencies(
+            lambda: aggregator.index.query("DomainConnectionTool", filters={"is_connected": False}), queries)
+        by_tag = _query_latencies(lambda: aggregator.index.query(tag="Network"), queries)
+    finally:
+        await aggregator.stop()
+
+    return {
+        "sync_seconds": sync_seconds,
+        "updates_per_second": size / update_seconds,
+        "query_disconnected_p50_ms": disconnected["p50_ms"],
+        "query_disconnected_p99_ms": disconnected["p99_ms"],
+        "query_by_tag_p50_ms": by_tag["p50_ms"],
+        "query_by_tag_p99_ms": by_tag["p99_ms"],
+    }
+
+
+async def bench_fleet(sizes: Sequence[int] = (100, 1000), queries: int = 200) -> Dict[str, dict]:
+    """Measures how fast the aggregator builds and updates its view of stand-in agents, and how fast it answers queries."""
+    return {f"fleet:{size}": await _fleet(size, queries) for size in sizes}
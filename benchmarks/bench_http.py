@@ -0,0 +1,60 @@
+import asyncio
+import time
+from typing import Dict
+
+import httpx
+
+from benchmarks.stats import summarize_latencies
+
+# Tools called round-robin by the end-to-end benchmark
+HTTP_CASES = {
+    "FMInfo": "/tools/FMInfo/execute?section=network",
+    "WiFiDetailsTool": "/tools/WiFiDetailsTool/execute",
+    "ADConnectionTool": "/tools/ADConnectionTool/execute",
+    "DomainConnectionTool": "/tools/DomainConnectionTool/execute",
+}
+
+
+def _failed(response: httpx.Response) -> bool:
+    if response.status_code == 304:
+        return False
+    if response.status_code >= 400:
+        return True
+    body = response.json()
+    return isinstance(body, dict) and body.get("success") is False
+
+
+async def _load(client: httpx.AsyncClient, paths, requests: int, concurrency: int, headers=None) -> dict:
+    latencies = []
+    failures = 0
+    next_request = iter(range(requests))
+
+    async def worker():
+        nonlocal failures
+        for index in next_request:
+            started = time.perf_counter()
+            response = await client.get(paths[index % len(paths)], headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if _failed(response):
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {"requests_per_second": requests / elapsed, "failures": failures, **summarize_latencies(latencies)}
+
+
+async def bench_http(app, toolbox, requests: int = 2000, concurrency: int = 50) -> Dict[str, dict]:
+    """Measures end-to-end requests per second through the ASGI app, without a network socket in between."""
+    # Tools that are not available on the faked platform are left out
+    paths = [path for tool_name, path in HTTP_CASES.items() if toolbox.has_tool(tool_name)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        etag = (await client.get("/tools")).headers["etag"]
+        return {
+            "http_execute:cached": await _load(client, paths, requests, concurrency),
+            "http_execute:uncached": await _load(client, paths, requests, concurrency, {"Cache-Control": "no-cache"}),
+            "http_list_tools": await _load(client, ["/tools"], requests, concurrency),
+            "http_list_tools:not_modified": await _load(client, ["/tools"], requests, concurrency, {"If-None-Match": etag}),
+        }
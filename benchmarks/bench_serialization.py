@@ -0,0 +1,78 @@
+import json
+import time
+from typing import Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from fast_json import FastJSONResponse, dumps_text
+from tools.tags import Tag
+from tools.tool_type import ToolType
+
+WIFI_RESULT = {
+    "details": {
+        "signal": {"quality": "decent", "value": -58},
+        "link": {"quality": "reliable", "value": {"lastTxRate": 702, "maxRate": 866}},
+        "channel": {"quality": "reliable", "value": 6},
+        "overall": "decent",
+    }
+}
+
+DEVICE_RESULT = {
+    "Computer name": "WS-0042", "CPU details": "Intel64 Family 6 Model 140 Stepping 1, GenuineIntel",
+    "RAM": "15.69 GB", "Total disk size": "475.83 GB", "Current disk usage": "211.40 GB",
+    "Manufacturer": "Dell Inc.", "Model": "Latitude 7420", "CPU architecture": "AMD64",
+    "Last boot time": "2024-05-02T08:14:31", "Serial number": "BENCH42",
+}
+
+# The tool listing as it was built before the catalog, with enum members walked on every response
+CATALOG = [
+    {"name": "FMInfo", "description": "Your system & user data.", "tool_type": ToolType.SELF_SERVICE,
+     "tags": [Tag.INFORMATION, Tag.WIDGET], "icon": "Users"},
+    {"name": "WiFi Details", "description": "Get live data about the details of your WiFi connection.",
+     "tool_type": ToolType.AUTO_ENABLED, "tags": [Tag.INTERNET], "icon": "Wifi"},
+    {"name": "AD Connection", "description": "Get live data about the status of your Active Directory or AAD connection.",
+     "tool_type": ToolType.AUTO_ENABLED, "tags": [Tag.AD], "icon": "Cloud"},
+    {"name": "Domain Connection", "description": "Get live data about the status of your connection to trusted networks.",
+     "tool_type": ToolType.AUTO_ENABLED, "tags": [Tag.ZSCALER, Tag.NETWORK], "icon": "ShieldCheck"},
+]
+
+PAYLOADS = {
+    "list_tools": CATALOG,
+    "execute_wifi": {"success": True, "message": WIFI_RESULT},
+    "execute_device": {"success": True, "message": DEVICE_RESULT},
+    "batch": {"success": True, "results": [
+        {"index": index, "tool": "WiFiDetailsTool", "success": True, "message": WIFI_RESULT, "elapsed": 0.012}
+        for index in range(10)
+    ]},
+}
+
+
+def _microseconds_per_call(operation: Callable[[], object], duration: float) -> float:
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        operation()
+        calls += 1
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+async def bench_serialization(duration: float = 0.5) -> Dict[str, dict]:
+    """Compares the cost per response of FastAPI's default encoding with the shared fast encoder.
+
+    "before" is what FastAPI does with a returned dict (jsonable_encoder, then JSONResponse), "after"
+    is a FastJSONResponse rendered directly. WebSocket updates are compared the same way, between
+    Starlette's send_json encoding and dumps_text.
+    """
+    results = {}
+    for name, payload in PAYLOADS.items():
+        before = _microseconds_per_call(lambda: JSONResponse(jsonable_encoder(payload)), duration)
+        after = _microseconds_per_call(lambda: FastJSONResponse(payload), duration)
+        results[f"serialize:{name}"] = {"before_us": before, "after_us": after, "speedup": before / after}
+
+    before = _microseconds_per_call(lambda: json.dumps(WIFI_RESULT, separators=(",", ":"), ensure_ascii=False), duration)
+    after = _microseconds_per_call(lambda: dumps_text(WIFI_RESULT), duration)
+    results["serialize:websocket_update"] = {"before_us": before, "after_us": after, "speedup": before / after}
+
+    return results
@@ -0,0 +1,63 @@
+import time
+from typing import Dict
+
+from benchmarks.stats import summarize_latencies
+
+# Arguments each tool is executed with; FMInfo is measured once per section
+EXECUTE_CASES = {
+    "FMInfo[user]": ("FMInfo", {"section": "user"}),
+    "FMInfo[device]": ("FMInfo", {"section": "device"}),
+    "FMInfo[network]": ("FMInfo", {"section": "network"}),
+    "WiFiDetailsTool": ("WiFiDetailsTool", {}),
+    "ADConnectionTool": ("ADConnectionTool", {}),
+    "DomainConnectionTool": ("DomainConnectionTool", {}),
+}
+
+
+async def bench_execute(toolbox, iterations: int = 200) -> Dict[str, dict]:
+    """Measures Toolbox.execute_tool latency per tool, both uncached and served from the result cache."""
+    results = {}
+    for case, (tool_name, kwargs) in EXECUTE_CASES.items():
+        if not toolbox.has_tool(tool_name):
+            continue
+
+        # The first call imports the tool and starts its instance, which is reported separately
+        started = time.perf_counter()
+        await toolbox.execute_tool(tool_name, use_cache=False, **kwargs)
+        first_call = time.perf_counter() - started
+
+        for use_cache in (False, True):
+            samples = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await toolbox.execute_tool(tool_name, use_cache=use_cache, **kwargs)
+                samples.append(time.perf_counter() - started)
+
+            label = "cached" if use_cache else "uncached"
+            results[f"{case}:{label}"] = summarize_latencies(samples)
+
+        results[f"{case}:uncached"]["first_call_ms"] = first_call * 1000
+
+    return results
+
+
+def _throughput(operation, duration: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        operation()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+async def bench_list_tools(toolbox, duration: float = 1.0) -> Dict[str, dict]:
+    """Measures how many tool listings the catalog can produce per second, unfiltered and filtered."""
+    catalog = toolbox.catalog
+    return {
+        "list_tools": {
+            "all_per_second": _throughput(lambda: catalog.serialized(), duration),
+            "by_tag_per_second": _throughput(lambda: catalog.serialized(tag="Network"), duration),
+            "by_tool_type_per_second": _throughput(lambda: catalog.serialized(tool_type="Auto-Enabled"), duration),
+        }
+    }
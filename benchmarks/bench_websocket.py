@@ -0,0 +1,114 @@
+import asyncio
+import json
+import time
+from typing import Dict, Sequence
+
+from benchmarks.stats import summarize_latencies
+
+
+class FanoutRound:
+    """Tracks how many subscribers have received the update of the current round."""
+
+    def __init__(self, subscribers: int):
+        self.subscribers = subscribers
+        self.number = 0
+        self.received = 0
+        self.complete = asyncio.Event()
+
+    def start(self, number: int):
+        self.number = number
+        self.received = 0
+        self.complete.clear()
+
+    def record(self, data):
+        if isinstance(data, dict) and data.get("bench_round") == self.number:
+            self.received += 1
+            if self.received == self.subscribers:
+                self.complete.set()
+
+
+class FakeWebSocketClient:
+    """Speaks the ASGI websocket protocol directly to the app, so thousands of clients need no sockets."""
+
+    def __init__(self, app, path: str, client_id: int, fanout: FanoutRound):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", client_id),
+            "server": ("bench", 80),
+            "subprotocols": [],
+        }
+        self.fanout = fanout
+        self.first_message = asyncio.Event()
+        self.closed = asyncio.Event()
+        self._connect_sent = False
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.app(self.scope, self._receive, self._send))
+
+    async def disconnect(self):
+        self.closed.set()
+        await self.task
+
+    async def _receive(self):
+        if not self._connect_sent:
+            self._connect_sent = True
+            return {"type": "websocket.connect"}
+        await self.closed.wait()
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    async def _send(self, message):
+        if message["type"] == "websocket.send":
+            # Decoding is part of what a real client pays for every update, so it is included in the timings
+            self.fanout.record(json.loads(message.get("text") or message.get("bytes")))
+            self.first_message.set()
+        elif message["type"] == "websocket.close":
+            self.closed.set()
+
+
+async def _fanout(app, hub, tool_name: str, subscribers: int, rounds: int) -> dict:
+    fanout = FanoutRound(subscribers)
+    clients = [FakeWebSocketClient(app, f"/tools/{tool_name}/ws", index, fanout) for index in range(subscribers)]
+
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    await asyncio.gather(*(client.first_message.wait() for client in clients))
+    connect_seconds = time.perf_counter() - started
+
+    # Publish synthetic states from the shared instance and keep the scheduler's own polls out of the measurement
+    instance = await hub.toolbox.acquire_tool(tool_name)
+    hub.scheduler.remove(tool_name)
+
+    latencies = []
+    try:
+        for number in range(1, rounds + 1):
+            fanout.start(number)
+            started = time.perf_counter()
+            await instance.publish({"bench_round": number})
+            await fanout.complete.wait()
+            latencies.append(time.perf_counter() - started)
+    finally:
+        await hub.toolbox.release_tool(tool_name, instance)
+        await asyncio.gather(*(client.disconnect() for client in clients))
+
+    summary = summarize_latencies(latencies)
+    return {
+        "connect_seconds": connect_seconds,
+        "messages_per_second": subscribers * len(latencies) / sum(latencies),
+        **summary,
+    }
+
+
+async def bench_websocket_fanout(app, hub, tool_name: str = "WiFiDetailsTool",
+                                 sizes: Sequence[int] = (100, 1000, 10000), rounds: int = 20) -> Dict[str, dict]:
+    """Measures how long one state change takes to reach every subscriber of common_websocket_endpoint."""
+    return {f"ws_fanout:{size}": await _fanout(app, hub, tool_name, size, rounds) for size in sizes}
@@ -0,0 +1,166 @@
+import asyncio
+from typing import Any, Callable, Dict, List
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from fast_json import dumps_text
+
+
+class _StreamedBody(httpx.AsyncByteStream):
+    def __init__(self, chunks: asyncio.Queue, disconnected: asyncio.Event, task: asyncio.Task):
+        self.chunks = chunks
+        self.disconnected = disconnected
+        self.task = task
+
+    async def __aiter__(self):
+        while (chunk := await self.chunks.get()) is not None:
+            yield chunk
+
+    async def aclose(self):
+        self.disconnected.set()
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """Routes requests by host to in-process ASGI apps and streams their response bodies.
+
+    httpx.ASGITransport waits for the whole body, which never ends for an SSE stream.
+    """
+
+    def __init__(self, apps: Dict[str, Callable]):
+        self.apps = apps
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        app = self.apps.get(request.url.host)
+        if app is None:
+            raise httpx.ConnectError(f"No stand-in agent at {request.url.host}", request=request)
+
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?", 1)[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "client": ("127.0.0.1", 0),
+            "server": (request.url.host, request.url.port or 80),
+        }
+        started = asyncio.get_running_loop().create_future()
+        chunks = asyncio.Queue()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.set_result(message)
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    chunks.put_nowait(message["body"])
+                if not message.get("more_body"):
+                    chunks.put_nowait(None)
+
+        task = asyncio.create_task(app(scope, receive, send))
+        # Ends the body if the app stops without finishing it
+        task.add_done_callback(lambda _: chunks.put_nowait(None))
+        await asyncio.wait({started, task}, return_when=asyncio.FIRST_COMPLETED)
+        if not started.done():
+            task.result()
+            raise httpx.RemoteProtocolError("The app sent no response", request=request)
+
+        start = started.result()
+        return httpx.Response(start["status"], headers=start.get("headers", []),
+                              stream=_StreamedBody(chunks, disconnected, task), request=request)
+
+
+class FakeAgent:
+    """Stand-in for an agent instance, serving scripted tool states on /tools/stream and the execute endpoint."""
+
+    def __init__(self, name: str, states: Dict[str, Any]):
+        self.name = name
+        self.states = dict(states)
+        self._streams: List[asyncio.Queue] = []
+        self.app = Starlette(routes=[
+            Route("/tools/stream", self._stream),
+            Route("/tools/{tool_name}/execute", self._execute),
+        ])
+
+    def send_raw(self, data: str):
+        """Sends an event with data as its payload verbatim, e.g. something that is not a tool update."""
+        for queue in self._streams:
+            queue.put_nowait(data)
+
+    def disconnect(self):
+        """Ends every open stream, as if the agent restarted."""
+        for queue in self._streams:
+            queue.put_nowait(None)
+
+    def set_state(self, tool_name: str, data: Any):
+        self.states[tool_name] = data
+        for queue in self._streams:
+            queue.put_nowait({"tool": tool_name, "data": data})
+
+    async def _execute(self, request: Request):
+        tool_name = request.path_params["tool_name"]
+        if tool_name not in self.states:
+            return JSONResponse({"success": False, "message": f"Tool '{tool_name}' not found"}, status_code=404)
+        return JSONResponse({"success": True, "message": self.states[tool_name]})
+
+    async def _stream(self, request: Request):
+        queue = asyncio.Queue()
+        for tool_name in request.query_params.getlist("tools"):
+            if tool_name in self.states:
+                queue.put_nowait({"tool": tool_name, "data": self.states[tool_name]})
+            else:
+                queue.put_nowait({"tool": tool_name, "error": f"Tool '{tool_name}' not found"})
+
+        async def events():
+            self._streams.append(queue)
+            try:
+                while (message := await queue.get()) is not None:
+                    if isinstance(message, str):
+                        yield f"data: {message}\n\n"
+                        continue
+                    event = "error" if "error" in message else "update"
+                    yield f"event: {event}\ndata: {dumps_text(message)}\n\n"
+            finally:
+                self._streams.remove(queue)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def default_states(index: int) -> Dict[str, Any]:
+    """Tool states of the index-th stand-in agent; every tenth agent is off the domain."""
+    connected = index % 10 != 0
+    return {
+        "ADConnectionTool": {"is_connected": connected, "azure_ad_joined": connected, "domain_joined": True},
+        "DomainConnectionTool": {"is_connected": connected, "status_message": "connected" if connected else "not_connected"},
+        "WiFiDetailsTool": {"details": {"signal": {"quality": "decent", "value": -58}, "overall": "decent"}},
+        "FMInfo": {"Computer name": f"WS-{index:04}"},
+    }
+
+
+class FakeFleet:
+    """size stand-in agents named agent-<n>, reachable at http://agent-<n> through one transport."""
+
+    def __init__(self, size: int, states: Callable[[int], Dict[str, Any]] = default_states):
+        self.agents = {f"agent-{index}": FakeAgent(f"agent-{index}", states(index)) for index in range(size)}
+        self.urls = {name: f"http://{name}" for name in self.agents}
+        self.transport = StreamingASGITransport({name: agent.app for name, agent in self.agents.items()})
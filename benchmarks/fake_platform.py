@@ -0,0 +1,102 @@
+"""Fake platform backends so the tools can be benchmarked on any machine.
+
+Commands are answered from recorded outputs in benchmarks/fixtures (named after the executable),
+winreg and wmi are replaced by in-memory stand-ins, Linux backends read the fixture tree in
+benchmarks/fixtures/linux instead of /proc and /sys, and the reachability probe never touches the network.
+"""
+import asyncio
+import importlib
+import os
+import subprocess
+import sys
+import types
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Sequence, Union
+from unittest import mock
+
+import tools.command_runner
+from tools.tool_manifest import load_manifest
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SYSTEMS = ("Windows", "Darwin", "Linux")
+
+
+class FakeCommandRunner:
+    """Drop-in replacement for run_command that returns recorded outputs after a simulated delay."""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, latency: float = 0.0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._outputs: Dict[str, str] = {}
+
+    def output_for(self, program: str) -> str:
+        if program not in self._outputs:
+            with open(os.path.join(self.fixtures_dir, f"{program}.txt"), encoding="utf-8") as f:
+                self._outputs[program] = f.read()
+        return self._outputs[program]
+
+    async def __call__(self, command: Union[str, Sequence[str]], *, timeout: float = None, check: bool = True,
+                       encoding: str = "utf-8") -> subprocess.CompletedProcess:
+        program = os.path.basename(command.split()[0] if isinstance(command, str) else command[0])
+        self.calls[program] = self.calls.get(program, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return subprocess.CompletedProcess(command, 0, self.output_for(program), "")
+
+
+def _fake_winreg(zpa_state: str) -> types.ModuleType:
+    winreg = types.ModuleType("winreg")
+    winreg.HKEY_CURRENT_USER = object()
+    winreg.ConnectRegistry = lambda computer, key: object()
+    winreg.OpenKey = lambda key, sub_key: object()
+    winreg.QueryValueEx = lambda key, name: (zpa_state, 1)
+    winreg.CloseKey = lambda key: None
+    return winreg
+
+
+def _fake_wmi() -> types.ModuleType:
+    system = types.SimpleNamespace(Manufacturer="Dell Inc.", Model="Latitude 7420")
+    bios = types.SimpleNamespace(SerialNumber="BENCH42")
+
+    wmi = types.ModuleType("wmi")
+    wmi.WMI = lambda: types.SimpleNamespace(Win32_ComputerSystem=lambda: [system], Win32_BIOS=lambda: [bios])
+    return wmi
+
+
+@contextmanager
+def fake_platform(system: str = "Windows", latency: float = 0.0, fixtures_dir: str = FIXTURES_DIR,
+                  reachable: bool = False, zpa_state: str = "TUNNEL_FORWARDING"):
+    """Makes the tools believe they run on the given system, answering every probe from fixtures.
+
+    Must be entered before the Toolbox is created (i.e. before main is imported), since the manifest is
+    filtered by platform at registration. Yields the FakeCommandRunner so callers can inspect its calls.
+    """
+    if system not in SYSTEMS:
+        raise ValueError(f"Unsupported system '{system}', expected one of {', '.join(SYSTEMS)}")
+
+    runner = FakeCommandRunner(fixtures_dir, latency)
+
+    async def fake_is_reachable(host, port, nameservers=None, timeout=2.0):
+        if latency:
+            await asyncio.sleep(latency)
+        return reachable
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch("platform.system", return_value=system))
+        stack.enter_context(mock.patch.dict(sys.modules, {"winreg": _fake_winreg(zpa_state), "wmi": _fake_wmi()}))
+        stack.enter_context(mock.patch.object(tools.command_runner, "run_command", runner))
+
+        # The tools import run_command by name, so it has to be replaced in every tool module as well
+        for spec in load_manifest():
+            module = importlib.import_module(spec.module)
+            if hasattr(module, "run_command"):
+                stack.enter_context(mock.patch.object(module, "run_command", runner))
+            if hasattr(module, "is_reachable"):
+                stack.enter_context(mock.patch.object(module, "is_reachable", fake_is_reachable))
+            tool_class = getattr(module, spec.class_name)
+            if hasattr(tool_class, "linux_root"):
+                stack.enter_context(mock.patch.object(tool_class, "linux_root", os.path.join(fixtures_dir, "linux")))
+
+        yield runner
@@ -0,0 +1,126 @@
+"""Runs the benchmark suite against fake platform backends and saves or compares the results.
+
+    python -m benchmarks.run --output benchmarks/results/baseline.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Metrics ending in _ms, _us or _seconds are better when lower, metrics ending in _per_second when higher.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Dict
+
+from benchmarks.fake_platform import SYSTEMS, fake_platform
+
+BENCHMARKS = ("execute", "list_tools", "http", "websocket", "serialization", "fleet")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=BENCHMARKS, action="append", help="run only these benchmarks")
+    parser.add_argument("--system", choices=SYSTEMS, default="Windows", help="platform the tools are made to see")
+    parser.add_argument("--command-latency", type=float, default=0.0,
+                        help="seconds every faked command and network probe takes")
+    parser.add_argument("--iterations", type=int, default=200, help="executions per tool")
+    parser.add_argument("--requests", type=int, default=2000, help="HTTP requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent HTTP clients")
+    parser.add_argument("--subscribers", default="100,1000,10000", help="comma-separated WebSocket fan-out sizes")
+    parser.add_argument("--agents", default="100,1000", help="comma-separated stand-in fleet sizes")
+    parser.add_argument("--rounds", type=int, default=20, help="state changes published per fan-out size")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percentage change reported as a regression by --compare")
+    return parser.parse_args(argv)
+
+
+async def run_benchmarks(args) -> Dict[str, dict]:
+    # Imported here so the toolbox is built while the fake platform is active
+    from benchmarks.bench_fleet import bench_fleet
+    from benchmarks.bench_http import bench_http
+    from benchmarks.bench_serialization import bench_serialization
+    from benchmarks.bench_toolbox import bench_execute, bench_list_tools
+    from benchmarks.bench_websocket import bench_websocket_fanout
+    import main
+
+    selected = args.only or BENCHMARKS
+    results = {}
+    async with main.lifespan(main.app):
+        if "execute" in selected:
+            results.update(await bench_execute(main.toolbox, args.iterations))
+        if "list_tools" in selected:
+            results.update(await bench_list_tools(main.toolbox))
+        if "http" in selected:
+            results.update(await bench_http(main.app, main.toolbox, args.requests, args.concurrency))
+        if "websocket" in selected:
+            sizes = [int(size) for size in args.subscribers.split(",") if size]
+            results.update(await bench_websocket_fanout(main.app, main.hub, sizes=sizes, rounds=args.rounds))
+        if "serialization" in selected:
+            results.update(await bench_serialization())
+        if "fleet" in selected:
+            results.update(await bench_fleet([int(size) for size in args.agents.split(",") if size]))
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> int:
+    """Prints the change of every metric against the baseline and returns the number of regressions."""
+    regressions = 0
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            previous = baseline.get(name, {}).get(metric)
+            if not previous or not isinstance(value, (int, float)):
+                continue
+
+            change = (value - previous) / previous * 100
+            if metric.endswith("_per_second"):
+                regressed = change < -threshold
+            elif metric.endswith(("_ms", "_us", "_seconds")):
+                regressed = change > threshold
+            else:
+                regressed = False
+
+            regressions += regressed
+            marker = "REGRESSION" if regressed else ""
+            print(f"{name:40} {metric:24} {previous:12.3f} -> {value:12.3f} {change:+8.1f}% {marker}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    with fake_platform(args.system, latency=args.command_latency):
+        results = asyncio.run(run_benchmarks(args))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "system": args.system,
+            "command_latency": args.command_latency,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        return 1 if compare(results, baseline, args.threshold) else 0
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
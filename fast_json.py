@@ -0,0 +1,45 @@
+"""JSON encoding shared by the HTTP responses, the WebSocket observers, SSE streams and the shared-state socket."""
+import json
+from enum import Enum
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(content: Any) -> bytes:
+        """Encodes content as compact UTF-8 JSON."""
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+else:
+    def dumps(content: Any) -> bytes:
+        """Encodes content as compact UTF-8 JSON."""
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
+
+
+def dumps_text(content: Any) -> str:
+    """Encodes content as JSON text, e.g. for WebSocket text frames."""
+    return dumps(content).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with the shared encoder, skipping FastAPI's jsonable_encoder when returned directly."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,31 @@
+from typing import Any, List
+
+
+def _escape(key: Any) -> str:
+    # RFC 6901 JSON Pointer escaping
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[dict]:
+    """Returns the JSON-Patch (RFC 6902) operations that turn old into new.
+
+    Dicts are diffed key by key, any other changed value (including lists) is replaced whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child_path = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child_path, "value": value})
+            else:
+                # Not short-circuited with !=, which misses changes like 1 -> true that are equal in Python
+                ops.extend(make_patch(old[key], value, child_path))
+        return ops
+
+    if old == new and type(old) is type(new):
+        return []
+
+    return [{"op": "replace", "path": path, "value": new}]
@@ -1,14 +1,63 @@
-from fastapi import FastAPI, Request, WebSocket
+import time
+
+# Measured first so the startup report covers the framework and tool-infrastructure imports
+_import_started = time.perf_counter()
+
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import asyncio
+
+from fastapi import FastAPI, Query, Request, Response, WebSocket
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from observable import Observer
-from tools.toolbox import Toolbox
-from tools.FMInfo.fminfo import FMInfo
-from tools.WiFi_Details_Tool.wifi_details_tool import WiFiDetailsTool
-from tools.AD_Connection_Tool.ad_connection_tool import ADConnectionTool
-from tools.Domain_Connection_Tool.domain_connection_tool import DomainConnectionTool
-from observable import Observable
+from fast_json import FastJSONResponse, dumps, dumps_text, loads
+from metrics import REGISTRY
+from schemas import BatchRequest, BatchResponse, ExecuteResponse, HistoryResponse, ToolInfo
+from tools.batch_runner import iter_batch, run_batch
+from tools.circuit_breaker import BreakerState, CircuitOpenError
+from tools.toolbox import InvalidArgumentsError, Toolbox
+from tools.monitor_hub import MonitorHub, MultiplexSubscription
+from websocket_observer import DeltaWebSocketObserver, Heartbeat, WebSocketObserver
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_ITEMS = 50
+
+# Seconds between SSE comment lines that keep idle proxies from closing the stream
+SSE_KEEPALIVE_INTERVAL = 15
+
+# Seconds between heartbeat pings for WebSocket clients that enable them without choosing an interval
+WS_HEARTBEAT_INTERVAL = float(os.environ.get("WS_HEARTBEAT_INTERVAL", "30"))
+
+# Directory shared by the workers of a multi-worker deployment, enables the shared-state mode when set
+SHARED_STATE_DIR = os.environ.get("TOOLBOX_SHARED_STATE_DIR")
+
+# Agent base URLs, comma-separated and optionally named ("name=url"), enables the fleet aggregator when set
+FLEET_AGENTS = os.environ.get("FLEET_AGENTS")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if shared_state is not None:
+        # Probes run in the elected leader, this worker only relays them
+        await shared_state.start()
+    else:
+        # Only starts tools that are already imported, the manifest's tools start on first use
+        await toolbox.startup()
+    if fleet is not None:
+        await fleet.start()
+    logger.info("Startup timings: %s, skipped tools: %s", startup_timings, toolbox.skipped_tools)
+    yield
+    if fleet is not None:
+        await fleet.stop()
+    await hub.shutdown()
+    if shared_state is not None:
+        await shared_state.stop()
+    await toolbox.shutdown()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,60 +67,340 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_imports_finished = time.perf_counter()
+
+# Tools are registered from the manifest and only imported on first execute or subscribe
 toolbox = Toolbox()
+toolbox.register_manifest()
+
+hub = MonitorHub(toolbox)
+
+shared_state = None
+if SHARED_STATE_DIR:
+    # The leader election uses fcntl, so the module is only imported when the mode is enabled
+    from tools.shared_state import SharedStateCoordinator
+
+    shared_state = SharedStateCoordinator(SHARED_STATE_DIR)
+    toolbox.remote = hub.remote = shared_state.client
 
-toolbox.register_tool(FMInfo)
-toolbox.register_tool(WiFiDetailsTool)
-toolbox.register_tool(ADConnectionTool)
-toolbox.register_tool(DomainConnectionTool)
+fleet = None
+if FLEET_AGENTS:
+    from tools.fleet import FleetAggregator, parse_agents, parse_filter_value
 
-class WebSocketObserver(Observer):
-    def __init__(self, websocket: WebSocket):
-        self.websocket = websocket
+    fleet = FleetAggregator(
+        parse_agents(FLEET_AGENTS),
+        tools=[tool_name for tool_name in os.environ.get("FLEET_TOOLS", "").split(",") if tool_name],
+        max_concurrency=int(os.environ.get("FLEET_MAX_CONCURRENCY", "64")),
+        timeout=float(os.environ.get("FLEET_TIMEOUT", "5")),
+    )
+
+# Gauges are read from the live hub and cache at scrape time instead of being updated on every change
+REGISTRY.gauge("tool_subscribers", "Observers currently subscribed to a tool.", ["tool"],
+               collect=lambda: {(tool_name,): count for tool_name, count in hub.subscriber_counts().items()})
+REGISTRY.gauge("tool_observer_queue_depth", "Updates queued for delivery to a tool's observers.", ["tool"],
+               collect=lambda: {(tool_name,): stats["queued"] for tool_name, stats in hub.delivery_stats().items()})
+REGISTRY.gauge("toolbox_monitored_tools", "Tools with a running monitor.", [],
+               collect=lambda: {(): hub.live_counts()["monitored_tools"]})
+REGISTRY.gauge("tool_breaker_open", "Whether a tool's circuit breaker is refusing executions.", ["tool"],
+               collect=lambda: {(tool_name,): float(breaker.state is BreakerState.OPEN)
+                                for tool_name, breaker in toolbox.breakers.items()})
+REGISTRY.gauge("toolbox_cache_events", "Result cache counters and sizes.", ["event"],
+               collect=lambda: {(event,): value for event, value in toolbox.cache.stats().items()})
+
+startup_timings = {
+    "app_import_seconds": _imports_finished - _import_started,
+    "app_registration_seconds": time.perf_counter() - _imports_finished,
+}
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+@app.get("/tools", response_model=List[ToolInfo])
+def get_tools(request: Request, tag: Optional[str] = None, tool_type: Optional[str] = None):
+    try:
+        body, etag = toolbox.catalog.serialized(tag=tag, tool_type=tool_type)
+    except ValueError as e:
+        return FastJSONResponse({"success": False, "message": str(e)}, status_code=400)
 
-    async def update(self, data: any):
-        await self.websocket.send_json(data)
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
-@app.get("/tools")
-def get_tools():
-    return toolbox.list_tools()
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
-@app.get("/tools/{tool_name}/execute")
+@app.get("/toolbox/startup")
+def get_startup_report():
+    return {**startup_timings, **toolbox.startup_report()}
+
+@app.get("/toolbox/monitors")
+def get_monitor_stats():
+    return hub.delivery_stats()
+
+@app.get("/toolbox/connections")
+def get_live_counts():
+    return hub.live_counts()
+
+@app.get("/toolbox/scheduler")
+def get_scheduler_timings():
+    return hub.scheduler.timings()
+
+@app.get("/toolbox/shared-state")
+def get_shared_state_status():
+    return shared_state.status() if shared_state is not None else {"enabled": False}
+
+@app.get("/toolbox/breakers")
+async def get_breaker_status():
+    # Shared-state workers report the leader's breakers, since the leader runs every probe
+    try:
+        return await toolbox.query_breaker_status()
+    except Exception as e:
+        return FastJSONResponse({"success": False, "message": str(e)}, status_code=503)
+
+@app.get("/toolbox/cache")
+async def get_cache_stats():
+    try:
+        return await toolbox.query_cache_stats()
+    except Exception as e:
+        return FastJSONResponse({"success": False, "message": str(e)}, status_code=503)
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/tools/batch", response_model=BatchResponse)
+async def execute_batch(batch: BatchRequest, request: Request):
+    if len(batch.items) > MAX_BATCH_ITEMS:
+        return FastJSONResponse({"success": False, "message": f"A batch may contain at most {MAX_BATCH_ITEMS} items"}, status_code=400)
+
+    items = [{"tool": item.tool, "args": item.args, "timeout": item.timeout} for item in batch.items]
+    use_cache = "no-cache" not in request.headers.get("cache-control", "")
+
+    if batch.stream:
+        async def stream_results():
+            async for result in iter_batch(toolbox, items, batch.timeout, use_cache):
+                yield dumps(result) + b"\n"
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+    results = await run_batch(toolbox, items, batch.timeout, use_cache)
+    return FastJSONResponse({"success": all(result["success"] for result in results), "results": results})
+
+@app.get("/tools/{tool_name}/execute", response_model=ExecuteResponse)
 async def execute_tool(tool_name: str, request: Request):
     try:
-        query_params = request.query_params._dict
-        result = await toolbox.execute_tool(tool_name, **query_params) if tool_name == "DomainConnectionTool" else toolbox.execute_tool(tool_name, **query_params)
-        return {"success": True, "message": result}
+        # Checked against the tool's execute signature, so bad parameters fail before anything runs
+        arguments = toolbox.bind_arguments(tool_name, request.query_params)
+        use_cache = "no-cache" not in request.headers.get("cache-control", "")
+        result = await toolbox.execute_tool(tool_name, use_cache=use_cache, **arguments)
+        return FastJSONResponse({"success": True, "message": result})
+    except InvalidArgumentsError as e:
+        return FastJSONResponse({"success": False, "message": str(e)}, status_code=400)
+    except CircuitOpenError as e:
+        if e.has_last_good:
+            return FastJSONResponse({"success": True, "message": e.last_good, "stale": True, "age": e.age})
+        return FastJSONResponse({"success": False, "message": str(e)})
     except KeyError:
-        return {"success": False, "message": f"Tool '{tool_name}' not found"}
+        return FastJSONResponse({"success": False, "message": f"Tool '{tool_name}' not found"})
     except Exception as e:
-        return {"success": False, "message": str(e)}
+        return FastJSONResponse({"success": False, "message": str(e)})
     
+@app.get("/tools/{tool_name}/history", response_model=HistoryResponse)
+async def get_tool_history(tool_name: str, start: Optional[float] = None, end: Optional[float] = None,
+                     step: Optional[float] = None, agg: str = "mean"):
+    """Returns the numeric state history recorded while the tool was monitored.
+
+    start and end are Unix timestamps; with step the samples are downsampled to one point per step
+    seconds using the agg aggregation (mean, min, max or last).
+    """
+    try:
+        history = await hub.query_history(tool_name, start, end, step, agg)
+    except KeyError:
+        return FastJSONResponse({"success": False, "message": f"Tool '{tool_name}' not found"})
+    except ValueError as e:
+        return FastJSONResponse({"success": False, "message": str(e)}, status_code=400)
+    except Exception as e:
+        return FastJSONResponse({"success": False, "message": str(e)})
+
+    if history is None:
+        return FastJSONResponse({"success": False, "message": f"Tool '{tool_name}' does not record history"})
+    return FastJSONResponse({"success": True, "message": history})
+
 @app.websocket("/tools/{tool_name}/ws")
-async def common_websocket_endpoint(tool_name: str, websocket: WebSocket):
+async def common_websocket_endpoint(tool_name: str, websocket: WebSocket, protocol: str = "full", encoding: str = "json",
+                                    heartbeat: bool = False, heartbeat_interval: Optional[float] = None):
+    """Streams a tool's state changes.
+
+    By default every change is sent as the full state. With ?protocol=delta the client gets one snapshot
+    followed by sequence-numbered JSON-Patch deltas (optionally MessagePack-encoded with ?encoding=msgpack)
+    and can send {"type": "resync"} to receive a fresh snapshot.
+
+    With ?heartbeat=true the server also sends {"type": "ping", "ts": ...} every heartbeat_interval seconds
+    and reaps the subscription when the client sends nothing back, e.g. {"type": "pong"}, within the
+    heartbeat timeout.
+    """
     await websocket.accept()
-    observer = WebSocketObserver(websocket)
+
+    heartbeat = Heartbeat(heartbeat_interval or WS_HEARTBEAT_INTERVAL) if heartbeat else None
 
     try:
-        tool_class = toolbox.get_tool(tool_name)
-        tool_instance = tool_class()
-    except KeyError:
-        await websocket.send_json({"success": False, "message": f"Tool '{tool_name}' not found"})
+        if protocol == "delta":
+            observer = DeltaWebSocketObserver(websocket, encoding, heartbeat)
+        else:
+            observer = WebSocketObserver(websocket, heartbeat)
+    except ValueError as e:
+        await websocket.send_text(dumps_text({"success": False, "message": str(e)}))
         await websocket.close()
         return
-    except Exception as e:
-        await {"success": False, "message": str(e)}
-        await websocket.close()
 
-    if not isinstance(tool_instance, Observable):
-        await websocket.send_json({"success": False, "message": f"Tool '{tool_name}' is not observable"})
+    try:
+        await hub.subscribe(tool_name, observer)
+    except KeyError:
+        await websocket.send_text(dumps_text({"success": False, "message": f"Tool '{tool_name}' not found"}))
+        await websocket.close()
+        return
+    except TypeError:
+        await websocket.send_text(dumps_text({"success": False, "message": f"Tool '{tool_name}' is not observable"}))
         await websocket.close()
         return
 
-    tool_instance.add_observer(observer)
+    async def send_pings():
+        while True:
+            await asyncio.sleep(heartbeat.interval)
+            try:
+                # A ping stuck behind a stalled send is left to the hub's reaper
+                await observer.ping()
+            except Exception:
+                # The connection is gone, the receive loop or the reaper cleans up
+                return
 
+    pinger = asyncio.create_task(send_pings()) if heartbeat is not None else None
     try:
-        await tool_instance.monitor_status()
+        # Updates are pushed by the hub; the receive side handles pongs, resync requests and disconnects,
+        # so a closed connection unsubscribes right away instead of on the next failed send
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if heartbeat is not None:
+                heartbeat.seen()
+
+            if isinstance(observer, DeltaWebSocketObserver):
+                request = observer.decode(message)
+                if request is not None and request.get("type") == "resync":
+                    observer.request_resync()
+                    hub.prime(tool_name, observer)
     finally:
-        tool_instance.remove_observer(observer)
-        await websocket.close()
\ No newline at end of file
+        if pinger is not None:
+            pinger.cancel()
+        hub.unsubscribe(tool_name, observer)
+
+@app.websocket("/tools/ws")
+async def multiplexed_websocket_endpoint(websocket: WebSocket):
+    """Streams several tools over one connection.
+
+    The client sends {"action": "subscribe" | "unsubscribe", "tools": [...]} and receives
+    {"tool": name, "data": state} updates, or {"tool": name, "error": message} for rejected subscriptions.
+    """
+    await websocket.accept()
+    subscription = MultiplexSubscription(hub)
+
+    async def send_updates():
+        while True:
+            await websocket.send_text(dumps_text(await subscription.queue.get()))
+
+    sender = asyncio.create_task(send_updates())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            try:
+                request = loads(message.get("text") or message.get("bytes") or "")
+                action, tool_names = request["action"], request["tools"]
+            except (ValueError, KeyError, TypeError):
+                await subscription.queue.put({"error": "Expected {\"action\": ..., \"tools\": [...]}"})
+                continue
+
+            for tool_name in tool_names:
+                if action == "subscribe":
+                    await subscription.subscribe(tool_name)
+                elif action == "unsubscribe":
+                    subscription.unsubscribe(tool_name)
+    finally:
+        sender.cancel()
+        subscription.close()
+
+@app.get("/tools/stream")
+async def stream_tools(request: Request, tools: List[str] = Query(...)):
+    """Server-Sent Events variant of the multiplexed socket for the tools given as ?tools=A&tools=B."""
+    subscription = MultiplexSubscription(hub)
+
+    async def events():
+        # Subscribed here so the finally releases them even if the client leaves before the body starts
+        try:
+            for tool_name in tools:
+                await subscription.subscribe(tool_name)
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                event = "error" if "error" in message else "update"
+                yield f"event: {event}\ndata: {dumps_text(message)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def fleet_disabled():
+    return FastJSONResponse({"success": False, "message": "Fleet mode is not enabled"}, status_code=404)
+
+@app.get("/fleet/agents")
+def get_fleet_agents():
+    if fleet is None:
+        return fleet_disabled()
+    return {**fleet.status(), "agents": fleet.agent_status()}
+
+@app.get("/fleet/states")
+def get_fleet_states(request: Request, tool: Optional[str] = None, tag: Optional[str] = None, agent: Optional[str] = None):
+    """Queries the fleet-wide view. Other query parameters filter on top-level state fields, e.g. ?is_connected=false."""
+    if fleet is None:
+        return fleet_disabled()
+
+    filters = {
+        field: parse_filter_value(value)
+        for field, value in request.query_params.items() if field not in ("tool", "tag", "agent")
+    }
+    try:
+        results = fleet.index.query(tool, tag, agent, filters)
+    except ValueError as e:
+        return FastJSONResponse({"success": False, "message": str(e)}, status_code=400)
+    return FastJSONResponse({"count": len(results), "results": results})
+
+@app.get("/fleet/summary")
+def get_fleet_summary():
+    if fleet is None:
+        return fleet_disabled()
+    return fleet.index.summary()
+
+@app.post("/fleet/tools/{tool_name}/refresh")
+async def refresh_fleet_tool(tool_name: str, agents: Optional[List[str]] = Query(None)):
+    """Executes a tool on the agents (all by default) and indexes the results, e.g. for tools that are not monitored."""
+    if fleet is None:
+        return fleet_disabled()
+
+    try:
+        errors = await fleet.refresh(tool_name, agents)
+    except KeyError as e:
+        return FastJSONResponse({"success": False, "message": f"Agent {e} not found"}, status_code=404)
+
+    failed = {agent: error for agent, error in errors.items() if error is not None}
+    return {"success": not failed, "refreshed": len(errors) - len(failed), "errors": failed}
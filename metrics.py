@@ -0,0 +1,153 @@
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from fast cache hits up to slow platform probes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels[labelname]) for labelname in self.labelnames)
+
+    def _format_labels(self, key: LabelValues, extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """A gauge that is either set directly or read from a collect callback at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterator[str]:
+        if self.collect is not None:
+            self._values = dict(self.collect())
+        return super().samples()
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Per-bucket (non-cumulative) counts plus an overflow slot, the sum and the count
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self) -> Iterator[str]:
+        for key, (bucket_counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                labels = self._format_labels(key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._format_labels(key)} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_EXECUTE_SECONDS = REGISTRY.histogram(
+    "toolbox_execute_duration_seconds", "Time to answer Toolbox.execute_tool, including cache hits.", ["tool"])
+TOOL_EXECUTE_ERRORS = REGISTRY.counter(
+    "toolbox_execute_errors_total", "Toolbox.execute_tool calls that raised.", ["tool"])
+TOOL_PROBE_SECONDS = REGISTRY.histogram(
+    "tool_probe_duration_seconds", "Time spent in a tool's execute, excluding cache hits.", ["tool"])
+TOOL_POLL_SECONDS = REGISTRY.histogram(
+    "tool_poll_duration_seconds", "Duration of the monitor polling cycles.", ["tool"])
+TOOL_POLL_ERRORS = REGISTRY.counter(
+    "tool_poll_errors_total", "Monitor polling cycles that raised.", ["tool"])
+TOOL_STATE_CHANGES = REGISTRY.counter(
+    "tool_state_changes_total", "Published state changes.", ["tool"])
+SUBPROCESS_SECONDS = REGISTRY.histogram(
+    "subprocess_duration_seconds", "Run time of probe subprocesses.", ["command"])
+SUBPROCESS_TIMEOUTS = REGISTRY.counter(
+    "subprocess_timeouts_total", "Probe subprocesses killed after their timeout.", ["command"])
+NOTIFICATIONS = REGISTRY.counter(
+    "observable_notifications_total", "Updates fanned out by Observable.notify_all.", ["observable"])
+OBSERVER_UPDATE_SECONDS = REGISTRY.histogram(
+    "observer_update_duration_seconds", "Time to deliver one update to one observer.", ["observable"])
+OBSERVERS_REAPED = REGISTRY.counter(
+    "observers_reaped_total", "Subscribers detached by the idle reaper, by reason.", ["tool", "reason"])
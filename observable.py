@@ -1,26 +1,212 @@
+import asyncio
+import logging
+import time
 from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+
+from metrics import NOTIFICATIONS, OBSERVER_UPDATE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    # Replace everything still queued with the latest update, fine for full-state updates
+    COALESCE = "coalesce"
+    # Drop the oldest queued update to make room
+    DROP_OLDEST = "drop_oldest"
+    # Detach and close the observer, for clients that must not miss updates
+    DISCONNECT = "disconnect"
+
 
 class Observable:
+    # Bounds for the adaptive polling scheduler, in seconds
+    poll_min_interval = 5.0
+    poll_max_interval = 60.0
+
+    # Defaults for each observer's outbound queue, observers can override them with attributes of the same name
+    queue_size = 16
+    overflow_policy = OverflowPolicy.COALESCE
+
+    # Numeric fields kept in the tool's state history, as name -> dotted path into the published state
+    history_fields = {}
+
     def __init__(self):
-        self._observers = set()
+        self._observers = {}
+        self.latest_state = None
+        # HistorySeries the monitor's samples are recorded into, attached by the MonitorHub
+        self.history = None
+        # Called with an observer its channel dropped, set by the MonitorHub so the subscription is released too
+        self.on_detach = None
+        self.delivery_counters = {"delivered": 0, "dropped": 0, "coalesced": 0, "disconnected": 0, "failed": 0}
 
     def add_observer(self, observer):
-        self._observers.add(observer)
+        if observer not in self._observers:
+            self._observers[observer] = ObserverChannel(self, observer)
 
     def remove_observer(self, observer):
-        self._observers.discard(observer)
+        channel = self._observers.pop(observer, None)
+        if channel is not None:
+            channel.stop()
+
+    def has_observers(self):
+        return bool(self._observers)
+
+    def prime(self, observer):
+        # Queues the latest published state for an observer that just joined
+        channel = self._observers.get(observer)
+        if channel is not None and self.latest_state is not None:
+            channel.offer(self.latest_state)
 
     async def notify_all(self, data):
-        for observer in self._observers:
-            await observer.update(data)
+        # Remember the last published state so late subscribers can be primed with it
+        self.latest_state = data
+        NOTIFICATIONS.inc(observable=type(self).__name__)
+        # Only enqueues, so a slow observer never holds up the others or the caller
+        for channel in list(self._observers.values()):
+            channel.offer(data)
+
+    async def publish(self, data):
+        """Notifies the observers if data differs from the last published state, returning whether it did."""
+        # Every sample is recorded, not only changes, so the history shows how long a state lasted
+        if self.history is not None:
+            self.history.record(data)
+
+        if data == self.latest_state:
+            return False
+
+        await self.notify_all(data)
+        return True
+
+    def idle_observers(self, now, send_timeout):
+        """Returns (observer, reason) for observers whose client stopped answering heartbeats or whose
+        delivery has been stuck in one send for longer than send_timeout seconds."""
+        idle = []
+        for observer, channel in self._observers.items():
+            if observer.expired(now):
+                idle.append((observer, "heartbeat"))
+            elif channel.delivering_since is not None and now - channel.delivering_since > send_timeout:
+                idle.append((observer, "stalled"))
+        return idle
+
+    def delivery_stats(self):
+        depths = [len(channel.queue) for channel in self._observers.values()]
+        return {
+            "observers": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            **self.delivery_counters,
+        }
+
+    async def poll_status(self):
+        # Returns the current state, called by the polling scheduler
+        return None
 
     async def monitor_status(self):
-        # Default implementation, can be overridden by subclasses that need real-time updates
+        # Default implementation, can be overridden by subclasses that can push changes as they happen
         pass
 
 
+class ObserverChannel:
+    """Bounded outbound queue and delivery task for one observer of an Observable."""
+
+    def __init__(self, observable, observer):
+        self.observable = observable
+        self.observer = observer
+        self.queue_size = getattr(observer, "queue_size", None) or observable.queue_size
+        self.overflow_policy = getattr(observer, "overflow_policy", None) or observable.overflow_policy
+        self.queue = deque()
+        self._task = None
+        # Monotonic time the update being delivered was handed to the observer, None while idle
+        self.delivering_since = None
+
+    def offer(self, data):
+        counters = self.observable.delivery_counters
+
+        if len(self.queue) >= self.queue_size:
+            if self.overflow_policy is OverflowPolicy.DISCONNECT:
+                counters["disconnected"] += 1
+                self._detach()
+                return
+            if self.overflow_policy is OverflowPolicy.COALESCE:
+                counters["coalesced"] += len(self.queue)
+                self.queue.clear()
+            else:
+                counters["dropped"] += 1
+                self.queue.popleft()
+
+        self.queue.append(data)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._deliver())
+
+    def stop(self):
+        self.queue.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        self._task = None
+
+    async def _deliver(self):
+        counters = self.observable.delivery_counters
+        observable_name = type(self.observable).__name__
+        try:
+            while self.queue:
+                data = self.queue.popleft()
+                started = time.perf_counter()
+                self.delivering_since = time.monotonic()
+                await self.observer.update(data)
+                self.delivering_since = None
+                OBSERVER_UPDATE_SECONDS.observe(time.perf_counter() - started, observable=observable_name)
+                counters["delivered"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Isolate the failure to this observer instead of breaking delivery for the rest
+            counters["failed"] += 1
+            logger.warning("Detaching observer %r after a failed update", self.observer, exc_info=True)
+            self._detach()
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+                self.delivering_since = None
+
+    def _detach(self):
+        if self.observable.on_detach is not None:
+            self.observable.on_detach(self.observer)
+        else:
+            self.observable.remove_observer(self.observer)
+        asyncio.get_running_loop().create_task(self.observer.close())
+
+
 class Observer(ABC):
-    
+    # Optional per-observer overrides of Observable.queue_size and Observable.overflow_policy
+    queue_size = None
+    overflow_policy = None
+
     @abstractmethod
     def update(self, data, *args, **kwargs):
-        pass
\ No newline at end of file
+        pass
+
+    async def close(self):
+        # Called after the observable detached this observer because it fell behind or failed
+        pass
+
+    def expired(self, now) -> bool:
+        # Whether the client behind this observer stopped answering heartbeats, checked by the hub's reaper
+        return False
+
+
+class QueueObserver(Observer):
+    """Puts updates, tagged with the tool they came from, on a queue shared by several observables."""
+
+    def __init__(self, queue: asyncio.Queue, tool_name: str, on_close=None):
+        self.queue = queue
+        self.tool_name = tool_name
+        # Called with this observer when the observable or the hub's reaper detached it
+        self.on_close = on_close
+
+    async def update(self, data):
+        await self.queue.put({"tool": self.tool_name, "data": data})
+
+    async def close(self):
+        if self.on_close is not None:
+            self.on_close(self)
@@ -0,0 +1,131 @@
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from tools.tags import Tag
+from tools.tool_type import ToolType
+
+
+class BatchItem(BaseModel):
+    tool: str
+    args: Dict[str, Any] = {}
+    # Seconds this item may take, capped by the batch timeout
+    timeout: Optional[float] = None
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    # Seconds the whole batch may take, items still running at the deadline fail with a timeout
+    timeout: Optional[float] = None
+    # Stream each result as newline-delimited JSON as soon as it completes
+    stream: bool = False
+
+
+# Response models. They document the API; handlers return pre-encoded FastJSONResponses, so they are
+# not validated per request.
+
+class ToolInfo(BaseModel):
+    name: str
+    description: str
+    tool_type: ToolType
+    tags: List[Tag]
+    icon: str
+
+
+class Assessment(BaseModel):
+    quality: str
+    value: Any
+
+
+class WiFiDetails(BaseModel):
+    signal: Assessment
+    link: Assessment
+    channel: Assessment
+    overall: str
+
+
+class WiFiDetailsResult(BaseModel):
+    details: WiFiDetails
+
+
+class ADConnectionResult(BaseModel):
+    is_connected: bool
+    azure_ad_joined: Optional[bool] = None
+    domain_joined: Optional[bool] = None
+    ad_bind: Optional[bool] = None
+
+
+class DomainConnectionResult(BaseModel):
+    is_connected: bool
+    status_message: str
+
+
+class NetworkDataResult(BaseModel):
+    active_adapters: Dict[str, str]
+    other_adapters: Dict[str, str]
+
+
+class UserDataResult(BaseModel):
+    logged_on_domain: str = Field(alias="Logged on domain")
+    logged_on_user: str = Field(alias="Logged on user")
+    last_login_time: str = Field(alias="Last login time")
+    last_password_set: str = Field(alias="Last password set")
+    password_expiration_date: str = Field(alias="Password expiration date")
+
+
+class DeviceDataResult(BaseModel):
+    computer_name: str = Field(alias="Computer name")
+    cpu_details: str = Field(alias="CPU details")
+    ram: str = Field(alias="RAM")
+    total_disk_size: str = Field(alias="Total disk size")
+    current_disk_usage: str = Field(alias="Current disk usage")
+    manufacturer: str = Field(alias="Manufacturer")
+    model: str = Field(alias="Model")
+    cpu_architecture: str = Field(alias="CPU architecture")
+    last_boot_time: str = Field(alias="Last boot time")
+    serial_number: str = Field(alias="Serial number")
+
+
+# What /tools/{tool_name}/execute returns as its message, one model per tool (per section for FMInfo)
+ToolResult = Union[
+    WiFiDetailsResult,
+    ADConnectionResult,
+    DomainConnectionResult,
+    NetworkDataResult,
+    UserDataResult,
+    DeviceDataResult,
+]
+
+
+class ExecuteResponse(BaseModel):
+    success: bool
+    # The tool's result on success, the error message otherwise
+    message: Union[ToolResult, str, None]
+    # Set when the tool's circuit breaker is open and message is its last-known-good result, age seconds old
+    stale: bool = False
+    age: Optional[float] = None
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    tool: str
+    success: bool
+    message: Union[ToolResult, str, None]
+    stale: bool = False
+    age: Optional[float] = None
+    elapsed: float
+
+
+class BatchResponse(BaseModel):
+    success: bool
+    results: List[BatchItemResult]
+
+
+class HistoryData(BaseModel):
+    timestamps: List[float]
+    fields: Dict[str, List[Optional[float]]]
+
+
+class HistoryResponse(BaseModel):
+    success: bool
+    message: Union[HistoryData, str]
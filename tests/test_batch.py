@@ -0,0 +1,107 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_platform import fake_platform
+from tools.base_tool.base_tool import BaseTool
+from tools.toolbox import Toolbox
+from tools.tool_type import ToolType
+
+with fake_platform("Windows"):
+    import main
+
+
+class EchoTool(BaseTool):
+    name = "Echo"
+    description = "Returns its value after the given delay."
+    tool_type = ToolType.AUTO_ENABLED
+    icon = "Test"
+
+    async def execute(self, value: int, delay: float = 0.0):
+        await asyncio.sleep(delay)
+        return {"value": value}
+
+
+class BrokenTool(BaseTool):
+    name = "Broken"
+    description = "Fails on every execution."
+    tool_type = ToolType.AUTO_ENABLED
+    icon = "Test"
+
+    async def execute(self):
+        raise RuntimeError("probe failed")
+
+
+@contextmanager
+def batch_client():
+    toolbox = Toolbox()
+    toolbox.register_tool(EchoTool)
+    toolbox.register_tool(BrokenTool)
+    with mock.patch.object(main, "toolbox", toolbox):
+        yield TestClient(main.app)
+
+
+ITEMS = [
+    {"tool": "EchoTool", "args": {"value": 1, "delay": 0.1}},
+    {"tool": "Missing"},
+    {"tool": "EchoTool", "args": {"value": "not a number"}},
+    {"tool": "EchoTool", "args": {"value": 2, "unknown": True}},
+    {"tool": "BrokenTool"},
+    {"tool": "EchoTool", "args": {"value": 3, "delay": 1.0}, "timeout": 0.05},
+    {"tool": "EchoTool", "args": {"value": 4}},
+]
+
+
+def check_results(results):
+    assert [result["success"] for result in results] == [True, False, False, False, False, False, True]
+    assert results[0]["message"] == {"value": 1}
+    assert results[1]["message"] == "Tool 'Missing' not found"
+    assert "EchoTool" in results[2]["message"] and "EchoTool" in results[3]["message"]
+    assert results[4]["message"] == "probe failed"
+    assert results[5]["message"].startswith("Timed out")
+    assert results[6]["message"] == {"value": 4}
+
+
+def test_item_errors_are_reported_per_item_in_request_order():
+    with batch_client() as client:
+        response = client.post("/tools/batch", json={"items": ITEMS}, headers={"Cache-Control": "no-cache"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is False
+    assert [result["index"] for result in body["results"]] == list(range(len(ITEMS)))
+    assert [result["tool"] for result in body["results"]] == [item["tool"] for item in ITEMS]
+    check_results(body["results"])
+
+
+def test_streamed_batch_yields_ndjson_as_items_complete():
+    with batch_client() as client:
+        response = client.post("/tools/batch", json={"items": ITEMS, "stream": True}, headers={"Cache-Control": "no-cache"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(result["index"] for result in results) == list(range(len(ITEMS)))
+    # The slow first item comes after the ones failing or answering at once
+    assert results[-1]["index"] == 0
+    check_results(sorted(results, key=lambda result: result["index"]))
+
+
+def test_batch_timeout_caps_every_item():
+    with batch_client() as client:
+        response = client.post("/tools/batch", json={
+            "items": [{"tool": "EchoTool", "args": {"value": 1, "delay": 1.0}}, {"tool": "EchoTool", "args": {"value": 2}}],
+            "timeout": 0.05,
+        })
+
+    results = response.json()["results"]
+    assert results[0]["success"] is False and results[0]["message"].startswith("Timed out")
+    assert results[1]["success"] is True and results[1]["message"] == {"value": 2}
+
+
+def test_oversized_batch_is_rejected():
+    with batch_client() as client:
+        response = client.post("/tools/batch", json={"items": [{"tool": "EchoTool", "args": {"value": 1}}] * (main.MAX_BATCH_ITEMS + 1)})
+    assert response.status_code == 400
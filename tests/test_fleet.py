@@ -0,0 +1,114 @@
+import asyncio
+from unittest import mock
+
+from benchmarks.fake_fleet import FakeFleet
+from tools import fleet as fleet_module
+from tools.fleet import FleetAggregator, FleetIndex, parse_agents, parse_filter_value
+from tools.tool_manifest import load_manifest
+
+TOOLS = ["ADConnectionTool", "DomainConnectionTool"]
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+def fleet_scenario(size: int, scenario):
+    async def run():
+        fake = FakeFleet(size)
+        aggregator = FleetAggregator(fake.urls, tools=TOOLS, transport=fake.transport)
+        await aggregator.start()
+        try:
+            await wait_until(lambda: len(aggregator.index) == size * len(TOOLS))
+            await scenario(fake, aggregator)
+        finally:
+            await aggregator.stop()
+
+    # Reconnects come quickly so the tests do not wait for the production backoff
+    with mock.patch.object(fleet_module, "RECONNECT_MIN_DELAY", 0.01):
+        asyncio.run(run())
+
+
+def test_parse_agents():
+    assert parse_agents("http://a:8000/, office=https://b.corp\nhttp://c") == {
+        "a:8000": "http://a:8000", "office": "https://b.corp", "c": "http://c",
+    }
+
+
+def test_parse_filter_value():
+    assert [parse_filter_value(value) for value in ("false", "True", "null", "VPN")] == [False, True, None, "VPN"]
+
+
+def test_index_queries_and_reindexes_updates():
+    index = FleetIndex(load_manifest())
+    index.update("a", "DomainConnectionTool", {"is_connected": True, "status_message": "VPN"})
+    index.update("b", "DomainConnectionTool", {"is_connected": False, "status_message": "not_connected"})
+    index.update("b", "WiFiDetailsTool", {"details": {}})
+
+    assert [entry["agent"] for entry in index.query("DomainConnectionTool", filters={"is_connected": False})] == ["b"]
+    assert [entry["tool"] for entry in index.query(agent="b")] == ["DomainConnectionTool", "WiFiDetailsTool"]
+    assert [entry["tool"] for entry in index.query(tag="Internet")] == ["WiFiDetailsTool"]
+
+    index.update("b", "DomainConnectionTool", {"is_connected": True, "status_message": "ZPA"})
+    assert index.query("DomainConnectionTool", filters={"is_connected": False}) == []
+    assert index.summary()["DomainConnectionTool"] == {
+        "agents": 2, "stale": 0, "fields": {"is_connected": {"true": 2}, "status_message": {"VPN": 1, "ZPA": 1}},
+    }
+
+
+def test_aggregator_indexes_every_agent_and_follows_changes():
+    async def scenario(fake, aggregator):
+        assert len(aggregator.index.query("DomainConnectionTool", filters={"is_connected": False})) == 1
+
+        fake.agents["agent-1"].set_state("DomainConnectionTool", {"is_connected": False, "status_message": "not_connected"})
+        await wait_until(lambda: len(aggregator.index.query("DomainConnectionTool", filters={"is_connected": False})) == 2)
+        assert aggregator.status()["connected_agents"] == 3
+
+    fleet_scenario(3, scenario)
+
+
+def test_malformed_events_are_skipped_without_reconnecting():
+    async def scenario(fake, aggregator):
+        agent = fake.agents["agent-1"]
+        for payload in ("null", "[1, 2]", '"text"', "{not json", '{"tool": 5}'):
+            agent.send_raw(payload)
+        agent.set_state("ADConnectionTool", {"is_connected": False, "azure_ad_joined": False, "domain_joined": True})
+
+        await wait_until(lambda: aggregator.index.query("ADConnectionTool", agent="agent-1")[0]["data"]["is_connected"] is False)
+        assert aggregator.agents["agent-1"].connects == 1
+        assert aggregator.agents["agent-1"].connected
+
+    fleet_scenario(2, scenario)
+
+
+def test_states_of_a_disconnected_agent_are_marked_stale_until_it_reconnects():
+    async def scenario(fake, aggregator):
+        app = fake.transport.apps.pop("agent-1")
+        fake.agents["agent-1"].disconnect()
+        await wait_until(lambda: not aggregator.agents["agent-1"].connected)
+
+        stale = {(entry["agent"], entry["tool"]) for entry in aggregator.index.query() if entry["stale"]}
+        assert stale == {("agent-1", tool) for tool in TOOLS}
+        assert aggregator.index.summary()["ADConnectionTool"]["stale"] == 1
+
+        fake.transport.apps["agent-1"] = app
+        await wait_until(lambda: not any(entry["stale"] for entry in aggregator.index.query()))
+        assert aggregator.agents["agent-1"].connects == 2
+
+    fleet_scenario(2, scenario)
+
+
+def test_refresh_reports_errors_per_agent():
+    async def scenario(fake, aggregator):
+        errors = await aggregator.refresh("FMInfo")
+        assert errors == {"agent-0": None, "agent-1": None}
+        assert aggregator.index.query("FMInfo", agent="agent-1")[0]["data"] == {"Computer name": "WS-0001"}
+
+        errors = await aggregator.refresh("Missing", ["agent-0"])
+        assert errors == {"agent-0": "Tool 'Missing' not found"}
+
+    fleet_scenario(2, scenario)
@@ -0,0 +1,57 @@
+import math
+
+from tools.history_store import HistorySeries, HistoryStore, extract_value
+
+
+def test_extract_value():
+    state = {"signal": {"rssi": -60}, "connected": True, "adapters": {"eth0": "10.0.0.1"}, "name": "x"}
+    assert extract_value(state, "signal.rssi") == -60.0
+    assert extract_value(state, "connected") == 1.0
+    assert extract_value(state, "adapters") == 1.0
+    assert math.isnan(extract_value(state, "name"))
+    assert math.isnan(extract_value(state, "signal.missing"))
+
+
+def test_ring_buffer_wraps_around_keeping_newest_rows():
+    series = HistorySeries({"value": "value"}, capacity=3)
+    for index in range(5):
+        series.record({"value": index * 10}, timestamp=float(index))
+
+    assert len(series) == 3
+    assert list(series.rows()) == [(2.0, [20.0]), (3.0, [30.0]), (4.0, [40.0])]
+    assert list(series.rows(start=3.0)) == [(3.0, [30.0]), (4.0, [40.0])]
+
+
+def test_query_downsamples_and_reports_gaps_as_null():
+    series = HistorySeries({"value": "value"}, capacity=8)
+    for timestamp, value in [(0.0, 1), (1.0, 3), (10.0, None), (11.0, 5)]:
+        series.record({"value": value}, timestamp=timestamp)
+
+    assert series.query(step=10.0) == {"timestamps": [0.0, 10.0], "fields": {"value": [2.0, 5.0]}}
+    assert series.query(start=10.0, end=10.0) == {"timestamps": [10.0], "fields": {"value": [None]}}
+
+
+def test_history_file_survives_reopening(tmp_path):
+    store = HistoryStore(capacity=4, directory=str(tmp_path))
+    for index in range(6):
+        store.series("Tool", {"value": "value"}).record({"value": index}, timestamp=float(index))
+    store.close()
+
+    store = HistoryStore(capacity=4, directory=str(tmp_path))
+    assert store.series("Tool", {"value": "value"}).query()["timestamps"] == [2.0, 3.0, 4.0, 5.0]
+    store.close()
+
+
+def test_second_store_does_not_share_a_history_file(tmp_path):
+    first = HistoryStore(capacity=4, directory=str(tmp_path))
+    second = HistoryStore(capacity=4, directory=str(tmp_path))
+    owner = first.series("Tool", {"value": "value"})
+    other = second.series("Tool", {"value": "value"})
+    assert owner.path is not None and other.path is None
+
+    owner.record({"value": 1}, timestamp=1.0)
+    other.record({"value": 2}, timestamp=2.0)
+    assert list(owner.rows()) == [(1.0, [1.0])]
+    assert list(other.rows()) == [(2.0, [2.0])]
+    first.close()
+    second.close()
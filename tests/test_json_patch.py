@@ -0,0 +1,69 @@
+import copy
+
+from json_patch import make_patch
+
+
+def apply_patch(document, ops):
+    # Just enough of RFC 6902 for the operations make_patch emits
+    document = copy.deepcopy(document)
+    for op in ops:
+        if op["path"] == "":
+            document = op["value"]
+            continue
+        *parents, last = [key.replace("~1", "/").replace("~0", "~") for key in op["path"].split("/")[1:]]
+        target = document
+        for key in parents:
+            target = target[key]
+        if op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return document
+
+
+def test_equal_documents_give_an_empty_patch():
+    assert make_patch({"a": {"b": [1, 2]}}, {"a": {"b": [1, 2]}}) == []
+
+
+def test_nested_dicts_are_diffed_key_by_key():
+    old = {"is_connected": True, "details": {"signal": -60, "ssid": "CorpNet"}}
+    new = {"is_connected": True, "details": {"signal": -62, "ssid": "CorpNet"}}
+    assert make_patch(old, new) == [{"op": "replace", "path": "/details/signal", "value": -62}]
+
+
+def test_added_and_removed_keys():
+    assert make_patch({"a": 1, "b": 2}, {"b": 2, "c": 3}) == [
+        {"op": "remove", "path": "/a"},
+        {"op": "add", "path": "/c", "value": 3},
+    ]
+
+
+def test_lists_are_replaced_whole():
+    assert make_patch({"adapters": [1, 2]}, {"adapters": [1, 3]}) == [
+        {"op": "replace", "path": "/adapters", "value": [1, 3]},
+    ]
+
+
+def test_type_changes_are_replaced():
+    # 1 == 1.0 == True in Python, but clients see different JSON
+    assert make_patch({"value": 1}, {"value": True}) == [{"op": "replace", "path": "/value", "value": True}]
+    assert make_patch({"value": 1}, {"value": 1.0}) == [{"op": "replace", "path": "/value", "value": 1.0}]
+    assert make_patch({"a": {"b": 0}}, {"a": {"b": False}}) == [{"op": "replace", "path": "/a/b", "value": False}]
+
+
+def test_root_replacement():
+    assert make_patch({"a": 1}, None) == [{"op": "replace", "path": "", "value": None}]
+    assert make_patch([1], [2]) == [{"op": "replace", "path": "", "value": [2]}]
+
+
+def test_keys_are_escaped_as_json_pointers():
+    assert make_patch({}, {"a/b": 1, "c~d": 2}) == [
+        {"op": "add", "path": "/a~1b", "value": 1},
+        {"op": "add", "path": "/c~0d", "value": 2},
+    ]
+
+
+def test_patches_round_trip():
+    old = {"active_adapters": {"eth0": "10.0.0.1", "wlan0": "10.0.1.5"}, "a/b": {"~": 1}, "list": [1], "gone": 0}
+    new = {"active_adapters": {"eth0": "10.0.0.2"}, "a/b": {"~": 2}, "list": [1, 2], "new": {"x": None}}
+    assert apply_patch(old, make_patch(old, new)) == new
@@ -0,0 +1,96 @@
+import os
+import struct
+
+from benchmarks.fake_platform import FIXTURES_DIR
+from tools.netlink import NLMSG_DONE, pack_attribute, pack_message
+from tools.WiFi_Details_Tool.linux_wireless import (
+    GENL_HEADER,
+    NL80211,
+    NL80211_ATTR_SSID,
+    NL80211_ATTR_WIPHY_FREQ,
+    LinuxWirelessReader,
+    frequency_to_channel,
+    parse_proc_wireless,
+)
+
+PROC_WIRELESS = """\
+Inter-| sta-|   Quality        |   Discarded packets               | Missed | WE
+ face | tus | link level noise |  nwid  crypt   frag  retry   misc | beacon | 22
+ wlan0: 0000   54.  -56.  -256        0      0      0      0      0        0
+wlp2s0: 0000   70   -40   -95        0      0      0      0      0        0
+ broken: 0000
+"""
+
+FAMILY_ID = 0x1C
+
+
+class FakeSocket:
+    def __init__(self, datagrams):
+        self.datagrams = list(datagrams)
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def recv(self, size):
+        return self.datagrams.pop(0)
+
+
+def interface_reply(sequence: int, frequency: int, ssid: bytes) -> bytes:
+    payload = GENL_HEADER.pack(7, 1, 0)
+    payload += pack_attribute(NL80211_ATTR_WIPHY_FREQ, struct.pack("=I", frequency))
+    payload += pack_attribute(NL80211_ATTR_SSID, ssid)
+    return pack_message(FAMILY_ID, 0, sequence, payload)
+
+
+def make_client(datagrams, sequence: int) -> NL80211:
+    client = NL80211.__new__(NL80211)
+    client._socket = FakeSocket(datagrams)
+    client._sequence = sequence
+    client.family_id = FAMILY_ID
+    return client
+
+
+def test_late_replies_to_timed_out_requests_are_skipped():
+    # Sequence 1 timed out, its interface reply and station dump arrive before the answers to sequences 2 and 3
+    datagrams = [
+        interface_reply(1, 2412, b"stale") + pack_message(NLMSG_DONE, 0, 1, b"\0" * 4),
+        interface_reply(2, 5180, b"office"),
+        pack_message(NLMSG_DONE, 0, 3, b"\0" * 4),
+    ]
+    client = make_client(datagrams, sequence=1)
+
+    assert client.link_info(3) == {"channel": 36, "ssid": "office"}
+    assert client._socket.datagrams == []
+
+
+def test_parse_proc_wireless():
+    assert parse_proc_wireless(PROC_WIRELESS) == {
+        "wlan0": {"link": 54.0, "level": -56.0, "noise": -256.0},
+        "wlp2s0": {"link": 70.0, "level": -40.0, "noise": -95.0},
+    }
+    assert parse_proc_wireless("") == {}
+
+
+def test_frequency_to_channel():
+    assert frequency_to_channel(2412) == 1
+    assert frequency_to_channel(2437) == 6
+    assert frequency_to_channel(2472) == 13
+    assert frequency_to_channel(2484) == 14
+    assert frequency_to_channel(5180) == 36
+    assert frequency_to_channel(5825) == 165
+    assert frequency_to_channel(5955) == 1
+    assert frequency_to_channel(6115) == 33
+    assert frequency_to_channel(900) == 0
+
+
+def test_reader_against_fixture_tree():
+    reader = LinuxWirelessReader(os.path.join(FIXTURES_DIR, "linux"))
+    assert reader.wireless_interfaces() == ["wlan0"]
+    # nl80211 is only queried on the live system, so the fixture yields the procfs values alone
+    assert reader.read() == {"interface": "wlan0", "link": 54.0, "signal": -56}
+    reader.close()
+
+
+def test_reader_without_wireless_interfaces(tmp_path):
+    assert LinuxWirelessReader(str(tmp_path)).read() is None
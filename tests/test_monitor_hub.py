@@ -0,0 +1,108 @@
+import asyncio
+
+from observable import Observable, OverflowPolicy
+from tools.base_tool.base_tool import BaseTool
+from tools.history_store import HistoryStore
+from tools.monitor_hub import MonitorHub, MultiplexSubscription
+from tools.toolbox import Toolbox
+from tools.tool_type import ToolType
+
+
+class FakeMonitoredTool(BaseTool, Observable):
+    name = "Fake"
+    description = "Publishes whatever the test tells it to."
+    tool_type = ToolType.AUTO_ENABLED
+    icon = "Test"
+    # Keep the scheduler from polling during the test
+    poll_min_interval = 3600.0
+
+    def __init__(self):
+        Observable.__init__(self)
+
+    async def execute(self):
+        return {"value": 0}
+
+
+class StrictMonitoredTool(FakeMonitoredTool):
+    # Clients must not miss updates, so a full queue disconnects them
+    overflow_policy = OverflowPolicy.DISCONNECT
+    queue_size = 1
+
+
+def make_hub() -> MonitorHub:
+    toolbox = Toolbox()
+    toolbox.register_tool(FakeMonitoredTool)
+    toolbox.register_tool(StrictMonitoredTool)
+    hub = MonitorHub(toolbox, history=HistoryStore(directory=None))
+    hub.send_timeout = 0.05
+    return hub
+
+
+def test_stall_reaped_multiplex_subscription_can_resubscribe():
+    async def scenario():
+        hub = make_hub()
+        subscription = MultiplexSubscription(hub, queue_size=1)
+        await subscription.subscribe("FakeMonitoredTool")
+        instance = hub._instances["FakeMonitoredTool"]
+
+        # Nobody reads the queue, so the second update blocks the delivery
+        await instance.publish({"value": 1})
+        await instance.publish({"value": 2})
+        await asyncio.sleep(0.1)
+        assert hub.reap_idle() == 1
+        # The reaper closes the observer in a task of its own
+        await asyncio.sleep(0.01)
+
+        assert subscription.tool_names == []
+        assert hub.subscriber_counts() == {}
+        messages = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+        assert messages[-1]["tool"] == "FakeMonitoredTool" and "error" in messages[-1]
+
+        await subscription.subscribe("FakeMonitoredTool")
+        assert subscription.tool_names == ["FakeMonitoredTool"]
+        assert hub.subscriber_counts() == {"FakeMonitoredTool": 1}
+
+        subscription.close()
+        await hub.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_explicit_unsubscribe_queues_no_error():
+    async def scenario():
+        hub = make_hub()
+        subscription = MultiplexSubscription(hub)
+        await subscription.subscribe("FakeMonitoredTool")
+        subscription.unsubscribe("FakeMonitoredTool")
+        await asyncio.sleep(0)
+
+        assert subscription.queue.empty()
+        assert hub.subscriber_counts() == {}
+        await hub.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_overflow_disconnect_releases_the_monitor():
+    async def scenario():
+        hub = make_hub()
+        subscription = MultiplexSubscription(hub, queue_size=1)
+        await subscription.subscribe("StrictMonitoredTool")
+        instance = hub._instances["StrictMonitoredTool"]
+
+        # The first update fills the client queue, the second blocks in delivery, the third waits in the
+        # channel and the fourth overflows it
+        for value in range(4):
+            await instance.publish({"value": value})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        assert instance.delivery_counters["disconnected"] == 1
+        assert subscription.tool_names == []
+        counts = hub.live_counts()
+        assert (counts["monitored_tools"], counts["polled_tools"], counts["subscribers"]) == (0, 0, 0)
+
+        subscription.close()
+        await hub.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,94 @@
+import socket
+
+from tools.FMInfo.netlink_monitor import (
+    IFA_LABEL,
+    IFA_LOCAL,
+    IFADDRMSG,
+    IFF_RUNNING,
+    IFINFOMSG,
+    IFLA_IFNAME,
+    RTM_DELADDR,
+    RTM_DELLINK,
+    RTM_NEWADDR,
+    RTM_NEWLINK,
+    NetlinkAdapterMonitor,
+)
+from tools.netlink import pack_attribute, pack_message
+
+ETH0 = 2
+
+
+def address_message(msg_type: int, address: str, label: str = "eth0", index: int = ETH0) -> bytes:
+    payload = IFADDRMSG.pack(socket.AF_INET, 24, 0, 0, index)
+    payload += pack_attribute(IFA_LOCAL, socket.inet_aton(address))
+    payload += pack_attribute(IFA_LABEL, label.encode() + b"\0")
+    return pack_message(msg_type, 0, 0, payload)
+
+
+def link_message(msg_type: int, name: str, flags: int, index: int = ETH0) -> bytes:
+    payload = IFINFOMSG.pack(socket.AF_UNSPEC, 1, index, flags, 0xFFFFFFFF)
+    payload += pack_attribute(IFLA_IFNAME, name.encode() + b"\0")
+    return pack_message(msg_type, 0, 0, payload)
+
+
+def make_monitor() -> NetlinkAdapterMonitor:
+    monitor = NetlinkAdapterMonitor()
+    monitor.apply(link_message(RTM_NEWLINK, "eth0", IFF_RUNNING))
+    monitor.apply(address_message(RTM_NEWADDR, "10.0.0.1"))
+    return monitor
+
+
+def test_new_address_is_reported_as_active():
+    assert make_monitor().snapshot() == {"active_adapters": {"eth0": "10.0.0.1"}, "other_adapters": {}}
+
+
+def test_secondary_address_keeps_primary():
+    monitor = make_monitor()
+    assert monitor.apply(address_message(RTM_NEWADDR, "10.0.0.2"))
+    assert monitor.snapshot()["active_adapters"] == {"eth0": "10.0.0.1"}
+
+
+def test_deleting_secondary_address_keeps_interface():
+    monitor = make_monitor()
+    monitor.apply(address_message(RTM_NEWADDR, "10.0.0.2"))
+    assert monitor.apply(address_message(RTM_DELADDR, "10.0.0.2"))
+    assert monitor.snapshot()["active_adapters"] == {"eth0": "10.0.0.1"}
+
+
+def test_deleting_primary_promotes_secondary():
+    monitor = make_monitor()
+    monitor.apply(address_message(RTM_NEWADDR, "10.0.0.2"))
+    monitor.apply(address_message(RTM_DELADDR, "10.0.0.1"))
+    assert monitor.snapshot()["active_adapters"] == {"eth0": "10.0.0.2"}
+
+
+def test_deleting_last_address_drops_interface():
+    monitor = make_monitor()
+    assert monitor.apply(address_message(RTM_DELADDR, "10.0.0.1"))
+    assert monitor.snapshot() == {"active_adapters": {}, "other_adapters": {}}
+
+
+def test_deleting_unknown_address_changes_nothing():
+    monitor = make_monitor()
+    assert not monitor.apply(address_message(RTM_DELADDR, "10.0.0.9"))
+    assert monitor.snapshot()["active_adapters"] == {"eth0": "10.0.0.1"}
+
+
+def test_link_down_moves_interface_to_other_adapters():
+    monitor = make_monitor()
+    assert monitor.apply(link_message(RTM_NEWLINK, "eth0", 0))
+    assert monitor.snapshot() == {"active_adapters": {}, "other_adapters": {"eth0": "10.0.0.1"}}
+
+
+def test_deleted_link_drops_its_addresses():
+    monitor = make_monitor()
+    monitor.apply(address_message(RTM_NEWADDR, "10.0.1.1", label="eth0:1"))
+    monitor.apply(link_message(RTM_DELLINK, "eth0", 0))
+    assert monitor.snapshot() == {"active_adapters": {}, "other_adapters": {}}
+
+
+def test_several_messages_in_one_datagram():
+    monitor = NetlinkAdapterMonitor()
+    datagram = link_message(RTM_NEWLINK, "eth0", IFF_RUNNING) + address_message(RTM_NEWADDR, "10.0.0.1")
+    assert monitor.apply(datagram)
+    assert monitor.snapshot()["active_adapters"] == {"eth0": "10.0.0.1"}
@@ -0,0 +1,86 @@
+import asyncio
+
+from observable import Observable, Observer, OverflowPolicy
+
+
+class GatedObserver(Observer):
+    """Holds every update until the gate opens, so the observable's queue for it fills up."""
+
+    def __init__(self, overflow_policy: OverflowPolicy, queue_size: int = 2):
+        self.overflow_policy = overflow_policy
+        self.queue_size = queue_size
+        self.gate = asyncio.Event()
+        self.received = []
+        self.closed = False
+
+    async def update(self, data):
+        await self.gate.wait()
+        self.received.append(data)
+
+    async def close(self):
+        self.closed = True
+
+
+async def overflow(policy: OverflowPolicy):
+    # The first update is held in delivery, the next two fill the queue and the fourth overflows it
+    observable = Observable()
+    observer = GatedObserver(policy)
+    observable.add_observer(observer)
+    for value in range(1, 5):
+        await observable.publish(value)
+        await asyncio.sleep(0)
+
+    observer.gate.set()
+    await asyncio.sleep(0.01)
+    return observable, observer
+
+
+def test_coalesce_replaces_the_queue_with_the_latest_update():
+    observable, observer = asyncio.run(overflow(OverflowPolicy.COALESCE))
+    assert observer.received == [1, 4]
+    assert observable.delivery_stats() == {
+        "observers": 1, "queued": 0, "max_queue_depth": 0,
+        "delivered": 2, "dropped": 0, "coalesced": 2, "disconnected": 0, "failed": 0,
+    }
+
+
+def test_drop_oldest_keeps_the_newest_updates():
+    observable, observer = asyncio.run(overflow(OverflowPolicy.DROP_OLDEST))
+    assert observer.received == [1, 3, 4]
+    assert observable.delivery_stats() == {
+        "observers": 1, "queued": 0, "max_queue_depth": 0,
+        "delivered": 3, "dropped": 1, "coalesced": 0, "disconnected": 0, "failed": 0,
+    }
+
+
+def test_disconnect_detaches_and_closes_the_observer():
+    observable, observer = asyncio.run(overflow(OverflowPolicy.DISCONNECT))
+    # The update held in delivery is cancelled with the channel
+    assert observer.received == []
+    assert observer.closed
+    assert not observable.has_observers()
+    assert observable.delivery_stats() == {
+        "observers": 0, "queued": 0, "max_queue_depth": 0,
+        "delivered": 0, "dropped": 0, "coalesced": 0, "disconnected": 1, "failed": 0,
+    }
+
+
+def test_failed_update_detaches_only_that_observer():
+    class FailingObserver(Observer):
+        async def update(self, data):
+            raise ConnectionError("client went away")
+
+    async def scenario():
+        observable = Observable()
+        healthy = GatedObserver(OverflowPolicy.COALESCE)
+        healthy.gate.set()
+        observable.add_observer(healthy)
+        observable.add_observer(FailingObserver())
+        await observable.publish(1)
+        await asyncio.sleep(0.01)
+        return observable, healthy
+
+    observable, healthy = asyncio.run(scenario())
+    assert healthy.received == [1]
+    assert observable.delivery_stats()["observers"] == 1
+    assert observable.delivery_counters["failed"] == 1
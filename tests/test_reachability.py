@@ -0,0 +1,231 @@
+import asyncio
+import socket
+import struct
+import time
+import types
+from unittest import mock
+
+from tools.Domain_Connection_Tool import reachability
+from tools.Domain_Connection_Tool.reachability import (
+    DNS_HEADER,
+    DNSError,
+    build_query,
+    is_reachable,
+    parse_a_records,
+    parse_nameserver_list,
+    resolve,
+    resolve_uncached,
+    system_nameservers,
+)
+
+QUERY_ID = 0x1234
+CNAME = 5
+
+
+def answer(name: bytes, record_type: int, data: bytes) -> bytes:
+    return name + struct.pack("!HHIH", record_type, 1, 300, len(data)) + data
+
+
+def response(query_id: int, answers, rcode: int = 0) -> bytes:
+    question = build_query("zsproxy.company.com", query_id)[DNS_HEADER.size:]
+    header = DNS_HEADER.pack(query_id, 0x8180 | rcode, 1, len(answers), 0, 0)
+    return header + question + b"".join(answers)
+
+
+def test_build_query():
+    assert build_query("zsproxy.company.com.", QUERY_ID) == (
+        b"\x12\x34\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00"
+        b"\x07zsproxy\x07company\x03com\x00\x00\x01\x00\x01"
+    )
+
+
+def test_parse_a_records_follows_compressed_names_and_skips_other_records():
+    # 0xC00C points at the name in the question
+    records = [
+        answer(b"\xc0\x0c", CNAME, b"\x05proxy\xc0\x14"),
+        answer(b"\x05proxy\xc0\x14", 1, socket.inet_aton("10.1.2.3")),
+        answer(b"\xc0\x0c", 1, socket.inet_aton("10.1.2.4")),
+    ]
+    assert parse_a_records(response(QUERY_ID, records), QUERY_ID) == ["10.1.2.3", "10.1.2.4"]
+
+
+def test_parse_a_records_without_answers():
+    assert parse_a_records(response(QUERY_ID, []), QUERY_ID) == []
+
+
+def test_parse_a_records_rejects_mismatched_ids_and_errors():
+    for message, expected in ((response(QUERY_ID + 1, []), "id"), (response(QUERY_ID, [], rcode=3), "rcode 3")):
+        try:
+            parse_a_records(message, QUERY_ID)
+        except DNSError as e:
+            assert expected in str(e)
+        else:
+            raise AssertionError("Expected a DNSError")
+
+
+class FakeNameserver(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        query_id = struct.unpack_from("!H", data)[0]
+        self.transport.sendto(response(query_id, [answer(b"\xc0\x0c", 1, socket.inet_aton("10.9.8.7"))]), addr)
+
+
+def test_resolve_uncached_queries_the_nameserver():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(FakeNameserver, local_addr=("127.0.0.1", 0))
+        try:
+            port = transport.get_extra_info("sockname")[1]
+            return await resolve_uncached("zsproxy.company.com", "127.0.0.1", 2.0, port=port)
+        finally:
+            transport.close()
+
+    assert asyncio.run(scenario()) == ["10.9.8.7"]
+
+
+def test_resolv_conf_nameservers(tmp_path):
+    resolv_conf = tmp_path / "resolv.conf"
+    resolv_conf.write_text("# comment\nnameserver 10.0.0.53\nnameserver ::1\nnameserver bogus\nsearch corp\nnameserver 1.1.1.1\n")
+    with mock.patch("platform.system", return_value="Linux"):
+        assert system_nameservers(str(resolv_conf)) == ["10.0.0.53", "1.1.1.1"]
+        assert system_nameservers(str(tmp_path / "missing")) == []
+
+
+def test_parse_nameserver_list():
+    assert parse_nameserver_list("10.0.0.1,10.0.0.2") == ["10.0.0.1", "10.0.0.2"]
+    assert parse_nameserver_list("10.0.0.1 fe80::1  10.0.0.2") == ["10.0.0.1", "10.0.0.2"]
+    assert parse_nameserver_list("") == []
+    assert parse_nameserver_list(None) == []
+
+
+class FakeKey:
+    def __init__(self, values=None, **subkeys):
+        self.values = values or {}
+        self.subkeys = subkeys
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def fake_winreg(root: FakeKey) -> types.ModuleType:
+    def open_key(key, sub_key):
+        for name in sub_key.split("\\"):
+            if name not in key.subkeys:
+                raise FileNotFoundError(sub_key)
+            key = key.subkeys[name]
+        return key
+
+    def query_value(key, name):
+        if name not in key.values:
+            raise FileNotFoundError(name)
+        return key.values[name], 1
+
+    winreg = types.ModuleType("winreg")
+    winreg.HKEY_LOCAL_MACHINE = root
+    winreg.OpenKey = open_key
+    winreg.QueryValueEx = query_value
+    winreg.QueryInfoKey = lambda key: (len(key.subkeys), len(key.values), 0)
+    winreg.EnumKey = lambda key, index: list(key.subkeys)[index]
+    return winreg
+
+
+def test_windows_nameservers_from_the_registry():
+    interfaces = FakeKey(**{
+        # Static servers win over the DHCP ones
+        "{static}": FakeKey({"EnableDHCP": 1, "DhcpIPAddress": "10.0.1.5", "NameServer": "10.0.0.53,10.0.0.54",
+                             "DhcpNameServer": "192.168.1.1"}),
+        "{dhcp}": FakeKey({"EnableDHCP": 1, "DhcpIPAddress": "192.168.1.20", "DhcpNameServer": "192.168.1.1 10.0.0.53"}),
+        # Left over from a network the adapter is no longer on
+        "{disconnected}": FakeKey({"EnableDHCP": 1, "DhcpIPAddress": "0.0.0.0", "DhcpNameServer": "172.16.0.1"}),
+        "{manual}": FakeKey({"EnableDHCP": 0, "IPAddress": ["10.2.0.9"], "NameServer": "10.2.0.1"}),
+        "{unused}": FakeKey({"EnableDHCP": 0, "IPAddress": ["0.0.0.0"], "NameServer": "10.3.0.1"}),
+    })
+    parameters = FakeKey({"NameServer": ""}, Interfaces=interfaces)
+    root = FakeKey(SYSTEM=FakeKey(CurrentControlSet=FakeKey(Services=FakeKey(Tcpip=FakeKey(Parameters=parameters)))))
+
+    with mock.patch("platform.system", return_value="Windows"), \
+            mock.patch.dict("sys.modules", {"winreg": fake_winreg(root)}):
+        assert system_nameservers() == ["10.0.0.53", "10.0.0.54", "192.168.1.1", "10.2.0.1"]
+
+
+def test_windows_nameservers_without_tcpip_key():
+    with mock.patch("platform.system", return_value="Windows"), \
+            mock.patch.dict("sys.modules", {"winreg": fake_winreg(FakeKey())}):
+        assert system_nameservers() == []
+
+
+def test_nameservers_are_queried_concurrently():
+    async def fake_resolve_uncached(host, nameserver, timeout, port=53):
+        if nameserver == "10.0.0.1":
+            # Never answers
+            await asyncio.sleep(timeout)
+            raise asyncio.TimeoutError
+        if nameserver == "10.0.0.2":
+            raise DNSError("rcode 2")
+        return ["10.9.8.7"]
+
+    async def scenario():
+        started = time.perf_counter()
+        addresses = await resolve("zsproxy.company.com", ["10.0.0.1", "10.0.0.2", "10.0.0.3"], 1.0)
+        return addresses, time.perf_counter() - started
+
+    with mock.patch.object(reachability, "resolve_uncached", fake_resolve_uncached):
+        addresses, elapsed = asyncio.run(scenario())
+    assert addresses == ["10.9.8.7"]
+    assert elapsed < 0.5
+
+
+def test_no_answer_within_the_deadline():
+    async def silent(host, nameserver, timeout, port=53):
+        await asyncio.sleep(10)
+
+    with mock.patch.object(reachability, "resolve_uncached", silent):
+        started = time.perf_counter()
+        assert asyncio.run(resolve("zsproxy.company.com", ["10.0.0.1", "10.0.0.2"], 0.05)) == []
+        assert time.perf_counter() - started < 0.5
+
+
+def test_addresses_are_probed_concurrently_under_one_deadline():
+    probed = []
+
+    async def fake_tcp_probe(address, port, timeout):
+        probed.append(address)
+        if address == "10.0.0.3":
+            return True
+        # Filtered addresses hang until the deadline
+        await asyncio.sleep(timeout)
+        return False
+
+    async def fake_resolve(host, nameservers, timeout):
+        return ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+    with mock.patch.object(reachability, "tcp_probe", fake_tcp_probe), \
+            mock.patch.object(reachability, "resolve", fake_resolve):
+        started = time.perf_counter()
+        assert asyncio.run(is_reachable("zsproxy.company.com", 443, [], timeout=1.0))
+        assert time.perf_counter() - started < 0.5
+        assert sorted(probed) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+        fake_resolve_none = mock.AsyncMock(return_value=["10.0.0.1", "10.0.0.2"])
+        with mock.patch.object(reachability, "resolve", fake_resolve_none):
+            started = time.perf_counter()
+            assert not asyncio.run(is_reachable("zsproxy.company.com", 443, [], timeout=0.1))
+            assert time.perf_counter() - started < 0.5
+
+
+def test_is_reachable_against_a_local_listener():
+    async def scenario():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await is_reachable("127.0.0.1", port, [], timeout=1.0)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,119 @@
+import asyncio
+
+from tools.result_cache import ResultCache
+
+
+class CountingExecute:
+    """Stands in for a tool execution, counting the calls and holding each one until released."""
+
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {"call": self.calls}
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    async def scenario():
+        cache = ResultCache()
+        execute = CountingExecute()
+        key = cache.make_key("Tool", (), {"host": "a"})
+        waiters = [asyncio.create_task(cache.get_or_execute(key, 10, execute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        execute.release.set()
+
+        assert await asyncio.gather(*waiters) == [{"call": 1}] * 5
+        assert await cache.get_or_execute(key, 10, execute) == {"call": 1}
+        assert execute.calls == 1
+        assert cache.stats() == {"hits": 1, "misses": 1, "coalesced": 4, "evictions": 0, "entries": 1, "in_flight": 0}
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_execution():
+    async def scenario():
+        cache = ResultCache()
+        execute = CountingExecute()
+        first = asyncio.create_task(cache.get_or_execute("key", 10, execute))
+        second = asyncio.create_task(cache.get_or_execute("key", 10, execute))
+        await asyncio.sleep(0)
+        first.cancel()
+        execute.release.set()
+
+        assert await second == {"call": 1}
+        assert first.cancelled()
+
+    asyncio.run(scenario())
+
+
+def test_expired_entry_executes_again():
+    async def scenario():
+        cache = ResultCache()
+        execute = CountingExecute()
+        execute.release.set()
+
+        assert await cache.get_or_execute("key", 0.01, execute) == {"call": 1}
+        assert await cache.get_or_execute("key", 0.01, execute) == {"call": 1}
+        await asyncio.sleep(0.02)
+        assert await cache.get_or_execute("key", 0.01, execute) == {"call": 2}
+        assert execute.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_zero_ttl_is_not_cached():
+    async def scenario():
+        cache = ResultCache()
+        execute = CountingExecute()
+        execute.release.set()
+        await cache.get_or_execute("key", 0, execute)
+        await cache.get_or_execute("key", 0, execute)
+        assert execute.calls == 2
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_eviction_drops_the_least_recently_used_entry():
+    cache = ResultCache(max_entries=2)
+    cache.store("a", 10, 1)
+    cache.store("b", 10, 2)
+
+    async def touch_a():
+        # A hit makes "a" the most recently used, leaving "b" to be evicted
+        return await cache.get_or_execute("a", 10, CountingExecute())
+
+    assert asyncio.run(touch_a()) == 1
+    cache.store("c", 10, 3)
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.evictions == 1
+
+    cache.store("a", 10, 4)
+    cache.store("d", 10, 5)
+    assert list(cache._entries) == ["a", "d"]
+    assert cache.evictions == 2
+
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = ResultCache()
+        execute = CountingExecute(error=ConnectionError("probe failed"))
+        waiters = [asyncio.create_task(cache.get_or_execute("key", 10, execute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        execute.release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert [str(result) for result in results] == ["probe failed"] * 3
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert cache.stats()["entries"] == 0
+
+        execute.error = None
+        assert await cache.get_or_execute("key", 10, execute) == {"call": 2}
+
+    asyncio.run(scenario())
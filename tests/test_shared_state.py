@@ -0,0 +1,115 @@
+import asyncio
+import itertools
+import os
+
+from observable import Observable, QueueObserver
+from tools.base_tool.base_tool import BaseTool
+from tools.history_store import HistoryStore
+from tools.monitor_hub import MonitorHub
+from tools.shared_state import SOCKET_FILE, SharedStateClient, SharedStateServer
+from tools.toolbox import Toolbox
+from tools.tool_type import ToolType
+
+
+class CountingTool(BaseTool, Observable):
+    name = "Counting"
+    description = "Reports the same state on every poll and counts the polls."
+    tool_type = ToolType.AUTO_ENABLED
+    icon = "Test"
+    poll_min_interval = 0.01
+    poll_max_interval = 0.01
+    history_fields = {"value": "value"}
+
+    def __init__(self):
+        Observable.__init__(self)
+        self.polls = itertools.count()
+
+    async def execute(self):
+        return {"value": 1}
+
+    async def poll_status(self):
+        next(self.polls)
+        return {"value": 1}
+
+
+def make_toolbox() -> Toolbox:
+    toolbox = Toolbox()
+    toolbox.register_tool(CountingTool)
+    return toolbox
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_workers_query_the_history_recorded_by_the_leader(tmp_path):
+    async def scenario():
+        server = SharedStateServer(os.path.join(tmp_path, SOCKET_FILE))
+        server.toolbox = make_toolbox()
+        server.hub = MonitorHub(server.toolbox, history=HistoryStore(directory=None))
+        await server.start()
+
+        client = SharedStateClient(server.path)
+        client.start()
+        worker = MonitorHub(make_toolbox(), history=HistoryStore(directory=None))
+        worker.remote = client
+        await worker.subscribe("CountingTool", QueueObserver(asyncio.Queue(), "CountingTool"))
+
+        # The state never changes, so only the first poll is relayed, but the leader records all of them
+        await wait_until(lambda: len(server.hub.history.series("CountingTool", CountingTool.history_fields)) >= 3)
+        assert worker._instances["CountingTool"].history is None
+
+        history = await worker.query_history("CountingTool")
+        assert len(history["timestamps"]) >= 3
+        assert set(history["fields"]["value"]) == {1.0}
+
+        try:
+            await worker.query_history("Missing")
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("An unknown tool should raise KeyError")
+        try:
+            await worker.query_history("CountingTool", aggregation="median")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("An unknown aggregation should raise ValueError")
+
+        await worker.shutdown()
+        await client.stop()
+        await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_workers_report_the_leaders_breakers_and_cache(tmp_path):
+    async def scenario():
+        server = SharedStateServer(os.path.join(tmp_path, SOCKET_FILE))
+        server.toolbox = make_toolbox()
+        server.hub = MonitorHub(server.toolbox, history=HistoryStore(directory=None))
+        await server.start()
+
+        client = SharedStateClient(server.path)
+        client.start()
+        worker = make_toolbox()
+        worker.remote = client
+
+        assert await worker.execute_tool("CountingTool") == {"value": 1}
+        assert await worker.execute_tool("CountingTool") == {"value": 1}
+        # The worker's own toolbox never executed anything
+        assert worker.breaker_status() == {}
+        assert worker.cache.stats() != server.toolbox.cache.stats()
+
+        assert await worker.query_breaker_status() == server.toolbox.breaker_status()
+        assert list(await worker.query_breaker_status()) == ["CountingTool"]
+        assert await worker.query_cache_stats() == server.toolbox.cache.stats()
+
+        await client.stop()
+        await server.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,17 @@
+import importlib
+
+from tools.base_tool.base_tool import BaseTool
+from tools.tool_manifest import load_manifest
+
+
+def test_manifest_entries_match_their_tool_classes():
+    # The manifest repeats the catalog metadata so /tools need not import the tools, it must not drift
+    specs = load_manifest()
+    assert len({spec.tool_name for spec in specs}) == len(specs)
+
+    for spec in specs:
+        tool_class = getattr(importlib.import_module(spec.module), spec.class_name)
+        assert issubclass(tool_class, BaseTool)
+        assert (spec.name, spec.description, spec.tool_type, spec.tags, spec.icon) == (
+            tool_class.name, tool_class.description, tool_class.tool_type, tuple(tool_class.tags), tool_class.icon,
+        ), f"Manifest entry '{spec.tool_name}' differs from {spec.module}.{spec.class_name}"
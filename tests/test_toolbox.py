@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+
+from tools.base_tool.base_tool import BaseTool, InvalidArgumentsError
+from tools.toolbox import Toolbox, ToolTimeoutError
+from tools.tool_type import ToolType
+
+
+class RenamedTool(BaseTool):
+    name = "Renamed"
+    description = "Registered under a manifest name that differs from its class name."
+    tool_type = ToolType.AUTO_ENABLED
+    icon = "Test"
+    cache_ttl = 60
+
+    def __init__(self):
+        self.calls = 0
+
+    async def execute(self, count: int = 1):
+        self.calls += 1
+        return {"count": count, "calls": self.calls}
+
+
+def make_toolbox(tmp_path) -> Toolbox:
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([{
+        "tool_name": "Info", "module": __name__, "class": "RenamedTool", "name": "Renamed",
+        "description": "", "tool_type": "Auto-Enabled", "icon": "Test",
+    }]))
+    toolbox = Toolbox()
+    toolbox.register_manifest(str(manifest))
+    return toolbox
+
+
+def test_manifest_name_differing_from_the_class_name(tmp_path):
+    async def scenario():
+        toolbox = make_toolbox(tmp_path)
+        kwargs = toolbox.bind_arguments("Info", {"count": "2"})
+        assert await toolbox.execute_tool("Info", **kwargs) == {"count": 2, "calls": 1}
+        # Served from the cache kept under the registered name
+        assert await toolbox.execute_tool("Info", **kwargs) == {"count": 2, "calls": 1}
+        assert list(toolbox.breaker_status()) == ["Info"]
+        await toolbox.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_startup_only_starts_loaded_tools(tmp_path):
+    async def scenario():
+        toolbox = make_toolbox(tmp_path)
+        await toolbox.startup()
+        assert toolbox.startup_report()["pending_tools"] == ["Info"]
+
+        toolbox.get_tool("Info")
+        await toolbox.startup()
+        assert list(toolbox._singletons) == ["Info"]
+        await toolbox.shutdown()
+
+    asyncio.run(scenario())
+
+
+class FlakyTool(BaseTool):
+    name = "Flaky"
+    description = "Fails the way it is told to."
+    tool_type = ToolType.AUTO_ENABLED
+    icon = "Test"
+    breaker_threshold = 2
+
+    async def execute(self, mode: str):
+        if mode == "parse":
+            return int("not a number")
+        if mode == "invalid":
+            raise InvalidArgumentsError("Invalid mode specified.")
+        return {"mode": mode}
+
+
+def test_only_argument_errors_are_exempt_from_the_breaker():
+    async def scenario():
+        toolbox = Toolbox()
+        toolbox.register_tool(FlakyTool)
+
+        for call in ({"mode": "invalid"}, {"mode": "invalid"}, {"unknown": 1}, {"unknown": 1}):
+            try:
+                await toolbox.execute_tool("FlakyTool", use_cache=False, **call)
+            except InvalidArgumentsError:
+                pass
+        assert toolbox.breaker_status()["FlakyTool"]["state"] == "closed"
+
+        # Output the probe cannot parse is a failing probe
+        for _ in range(2):
+            try:
+                await toolbox.execute_tool("FlakyTool", "parse", use_cache=False)
+            except ValueError:
+                pass
+        assert toolbox.breaker_status()["FlakyTool"]["state"] == "open"
+        await toolbox.shutdown()
+
+    asyncio.run(scenario())
+
+
+class BlockingTool(BaseTool):
+    name = "Blocking"
+    description = "A synchronous probe that hangs until released."
+    tool_type = ToolType.AUTO_ENABLED
+    icon = "Test"
+    execute_timeout = 0.05
+    max_concurrency = 1
+    breaker_threshold = 10
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = 0
+        self.threads = set()
+
+    def execute(self):
+        self.started += 1
+        self.threads.add(threading.current_thread().name)
+        self.release.wait(5)
+        return {"started": self.started}
+
+
+def test_sync_tools_run_on_the_tool_thread_pool():
+    async def scenario():
+        toolbox = Toolbox()
+        toolbox.register_tool(BlockingTool)
+        tool = await toolbox.acquire_tool("BlockingTool")
+        tool.release.set()
+        assert await toolbox.execute_tool("BlockingTool") == {"started": 1}
+        assert all(name.startswith("tool") for name in tool.threads)
+        await toolbox.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_sync_call_keeps_its_concurrency_slot():
+    async def scenario():
+        toolbox = Toolbox()
+        toolbox.register_tool(BlockingTool)
+        tool = await toolbox.acquire_tool("BlockingTool")
+
+        for _ in range(3):
+            try:
+                await toolbox.execute_tool("BlockingTool", use_cache=False)
+            except ToolTimeoutError:
+                pass
+            else:
+                raise AssertionError("Expected the call to time out")
+        # The later calls waited for the slot the hung thread still holds instead of starting threads
+        assert tool.started == 1
+
+        tool.release.set()
+        await asyncio.sleep(0.05)
+        assert await toolbox.execute_tool("BlockingTool", use_cache=False) == {"started": 2}
+        await toolbox.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+import os
+import subprocess
+from unittest import mock
+
+from benchmarks.fake_platform import FIXTURES_DIR, FakeCommandRunner
+from tools.WiFi_Details_Tool import wifi_details_tool
+from tools.WiFi_Details_Tool.wifi_details_tool import WiFiDetailsTool
+from tools.WiFi_Details_Tool.wifi_quality import (
+    rate_link_ratio,
+    rate_radio_type,
+    rate_signal_dbm,
+    rate_signal_percent,
+    score_wifi_details,
+)
+
+
+def legacy_overall(signal_quality: str, link_quality: str, channel: int) -> dict:
+    # The scoring the Windows and macOS branches of get_wifi_details did inline before it was shared
+    channel_quality = 'reliable' if channel in [1, 6, 11] else 'decent'
+    quality_scores = {'reliable': 3, 'decent': 2, 'slow': 1}
+    overall_score = (0.6 * quality_scores[signal_quality] + 0.3 * quality_scores[link_quality]
+                     + 0.1 * quality_scores[channel_quality])
+    if overall_score > 2.5:
+        overall_quality = 'reliable'
+    elif overall_score > 1.5:
+        overall_quality = 'decent'
+    else:
+        overall_quality = 'slow'
+    return {"channel": channel_quality, "overall": overall_quality}
+
+
+def legacy_windows(signal_strength: int, radio_type: str, channel: int) -> dict:
+    if signal_strength > 75:
+        signal_quality = 'reliable'
+    elif signal_strength > 50:
+        signal_quality = 'decent'
+    else:
+        signal_quality = 'slow'
+
+    if 'ac' in radio_type or 'ax' in radio_type:
+        link_quality = 'reliable'
+    elif 'n' in radio_type:
+        link_quality = 'decent'
+    else:
+        link_quality = 'slow'
+
+    scores = legacy_overall(signal_quality, link_quality, channel)
+    return {"details": {
+        "signal": {"quality": signal_quality, "value": signal_strength},
+        "link": {"quality": link_quality, "value": radio_type},
+        "channel": {"quality": scores["channel"], "value": channel},
+        "overall": scores["overall"],
+    }}
+
+
+def legacy_darwin(signal_strength: int, last_tx_rate: int, max_rate: int, channel: int) -> dict:
+    if signal_strength > -50:
+        signal_quality = 'reliable'
+    elif signal_strength > -75:
+        signal_quality = 'decent'
+    else:
+        signal_quality = 'slow'
+
+    if last_tx_rate >= 0.8 * max_rate:
+        link_quality = 'reliable'
+    elif last_tx_rate >= 0.5 * max_rate:
+        link_quality = 'decent'
+    else:
+        link_quality = 'slow'
+
+    scores = legacy_overall(signal_quality, link_quality, channel)
+    return {"details": {
+        "signal": {"quality": signal_quality, "value": signal_strength},
+        "link": {"quality": link_quality, "value": {"lastTxRate": last_tx_rate, "maxRate": max_rate}},
+        "channel": {"quality": scores["channel"], "value": channel},
+        "overall": scores["overall"],
+    }}
+
+
+def test_windows_scoring_matches_legacy_branch():
+    for signal, radio_type, channel in itertools.product(
+            (0, 40, 50, 51, 75, 76, 100), ("802.11g", "802.11n", "802.11ac", "802.11ax", ""), (1, 6, 11, 36)):
+        expected = legacy_windows(signal, radio_type, channel)
+        actual = score_wifi_details(rate_signal_percent(signal), signal, rate_radio_type(radio_type), radio_type, channel)
+        assert actual == expected, (signal, radio_type, channel)
+
+
+def test_darwin_scoring_matches_legacy_branch():
+    for signal, (tx_rate, max_rate), channel in itertools.product(
+            (-100, -75, -74, -50, -49, -30), ((0, 866), (432, 866), (433, 866), (693, 866), (866, 866), (0, 0)),
+            (1, 6, 11, 149)):
+        expected = legacy_darwin(signal, tx_rate, max_rate, channel)
+        actual = score_wifi_details(rate_signal_dbm(signal), signal, rate_link_ratio(tx_rate, max_rate),
+                                    {"lastTxRate": tx_rate, "maxRate": max_rate}, channel)
+        assert actual == expected, (signal, tx_rate, max_rate, channel)
+
+
+def run_tool(system: str, runner=None) -> dict:
+    async def scenario():
+        tool = WiFiDetailsTool()
+        try:
+            return await tool.execute()
+        finally:
+            await tool.shutdown()
+
+    with mock.patch.object(wifi_details_tool.platform, "system", return_value=system), \
+            mock.patch.object(wifi_details_tool, "run_command", runner or FakeCommandRunner()):
+        return asyncio.run(scenario())
+
+
+def test_windows_fixture():
+    assert run_tool("Windows") == legacy_windows(82, "802.11ax", 6)
+
+
+def test_darwin_fixture():
+    assert run_tool("Darwin") == legacy_darwin(-58, 702, 866, 6)
+
+
+def test_darwin_channel_with_width():
+    async def airport(command, **kwargs):
+        return subprocess.CompletedProcess(command, 0, " agrCtlRSSI: -60\n lastTxRate: 400\n maxRate: 866\n channel: 149,80\n", "")
+
+    assert run_tool("Darwin", airport)["details"]["channel"] == {"quality": "decent", "value": 149}
+
+
+def test_linux_fixture():
+    with mock.patch.object(WiFiDetailsTool, "linux_root", os.path.join(FIXTURES_DIR, "linux")):
+        assert run_tool("Linux") == {"details": {
+            "signal": {"quality": "decent", "value": -56},
+            "link": {"quality": "decent", "value": {"lastTxRate": None, "linkQuality": 54.0}},
+            "channel": {"quality": "decent", "value": 0},
+            "overall": "decent",
+        }}
@@ -1,27 +1,31 @@
-import subprocess
 import re
 import platform
-import asyncio
 from tools.base_tool.base_tool import BaseTool
+from tools.command_runner import run_command
 from observable import Observable
 from tools.tool_type import ToolType
 from tools.tags import Tag
 class ADConnectionTool(BaseTool, Observable):
+    name = "AD Connection"
+    description = "Get live data about the status of your Active Directory or AAD connection."
+    tool_type = ToolType.AUTO_ENABLED
+    tags = (Tag.AD,)
+    icon = 'Cloud'
+    cache_ttl = 30
+    # dsregcmd and dscl normally answer within a few seconds
+    execute_timeout = 15.0
+    # Domain membership rarely changes, so let the scheduler back off further
+    poll_max_interval = 120.0
+    history_fields = {"is_connected": "is_connected", "azure_ad_joined": "azure_ad_joined", "domain_joined": "domain_joined"}
+
     def __init__(self):
-        super().__init__(
-            name="AD Connection",
-            description="Get live data about the status of your Active Directory or AAD connection.",
-            tool_type=ToolType.AUTO_ENABLED,
-            tags=[Tag.AD],
-            icon='Cloud',
-        )
         Observable.__init__(self)
 
-    def get_connection_status(self):
+    async def get_connection_status(self):
         system = platform.system()
 
         if system == "Windows":
-            result = subprocess.check_output("dsregcmd /status", shell=True, text=True)
+            result = (await run_command(["dsregcmd", "/status"])).stdout
             azure_ad_joined = re.search(r"AzureAdJoined\s+:\s+(\w+)", result)
             domain_joined = re.search(r"DomainJoined\s+:\s+(\w+)", result)
 
@@ -43,14 +47,8 @@ class ADConnectionTool(BaseTool, Observable):
 
             return status
 
-    def execute(self):
-        return self.get_connection_status()
-
-    async def monitor_status(self):
-        previous_state = None
-        while True:
-            current_state = self.execute()
-            if current_state != previous_state:
-                previous_state = current_state
-                await self.notify_all(current_state)
-            await asyncio.sleep(5)  # Adjust the interval as needed
\ No newline at end of file
+    async def execute(self):
+        return await self.get_connection_status()
+
+    async def poll_status(self):
+        return await self.execute()
\ No newline at end of file
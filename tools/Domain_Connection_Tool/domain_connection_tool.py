@@ -1,52 +1,52 @@
 import platform
-import subprocess
 import asyncio
+import logging
+import os
+from getpass import getuser
 from tools.base_tool.base_tool import BaseTool
+from tools.command_runner import run_command
+from tools.Domain_Connection_Tool.reachability import is_reachable
 from observable import Observable
-import winreg
 from tools.tool_type import ToolType
 from tools.tags import Tag
 
+logger = logging.getLogger(__name__)
+
 class DomainConnectionTool(BaseTool, Observable):
+    name = "Domain Connection"
+    description = "Get live data about the status of your connection to trusted networks."
+    tool_type = ToolType.AUTO_ENABLED
+    tags = (Tag.ZSCALER, Tag.NETWORK)
+    icon = "ShieldCheck"
+    cache_ttl = 10
+    # Each check is bounded by probe_timeout, the deadline covers running several of them
+    execute_timeout = 10.0
+    history_fields = {"is_connected": "is_connected"}
+
+    # The host that is only reachable from trusted networks; configurable so it can point at a local stand-in
+    probe_host = os.environ.get("DOMAIN_PROBE_HOST", "zsproxy.company.com")
+    probe_port = int(os.environ.get("DOMAIN_PROBE_PORT", "443"))
+    # Comma-separated nameservers to resolve probe_host with, defaults to the system's (resolv.conf, or the
+    # adapter settings in the registry on Windows)
+    probe_nameservers = [ns for ns in os.environ.get("DOMAIN_PROBE_NAMESERVERS", "").split(",") if ns] or None
+    # Seconds allowed for each of the DNS lookup and the TCP connect
+    probe_timeout = float(os.environ.get("DOMAIN_PROBE_TIMEOUT", "2"))
+
     def __init__(self):
-        super().__init__(
-            name="Domain Connection",
-            description="Get live data about the status of your connection to trusted networks.",
-            tool_type=ToolType.AUTO_ENABLED,
-            tags=[Tag.ZSCALER, Tag.NETWORK],
-            icon="ShieldCheck"
-        )
         Observable.__init__(self)
 
-    
-    @staticmethod
-    def check_vpn_status():
-        system = platform.system()
-        target_url = "zsproxy.company.com"
+    @classmethod
+    async def check_vpn_status(cls):
+        # Queries DNS directly and opens a TCP connection instead of flushing the OS DNS cache and pinging
+        return await is_reachable(cls.probe_host, cls.probe_port, cls.probe_nameservers, cls.probe_timeout)
 
-        if system == "Windows":
-            flush_command = "ipconfig /flushdns > NUL"
-            ping_command = f'ping -n 1 {target_url} > NUL && echo True || echo False'
-            command = f'{flush_command} && {ping_command}'
-        elif system == "Darwin":
-            flush_command = "sudo killall -HUP mDNSResponder > /dev/null"
-            ping_command = f'ping -c 1 {target_url} > /dev/null && echo True || echo False'
-            command = f'{flush_command} && {ping_command}'
-        else:
-            return False
-
-        try:
-            output = subprocess.check_output(command, shell=True, text=True).strip()
-            return output.lower() == "true"
-        except subprocess.CalledProcessError:
-            return False
-        
-
-    @staticmethod
-    def check_zpa_connection():
+    @classmethod
+    async def check_zpa_connection(cls):
         system = platform.system()
 
         if system == "Windows":
+            import winreg
+
             try:
                 registry = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
                 zscaler_key = winreg.OpenKey(registry, r"SOFTWARE\Zscaler\App")
@@ -60,39 +60,37 @@ class DomainConnectionTool(BaseTool, Observable):
                 return False
 
         elif system == "Darwin":
-            output = subprocess.check_output("dscl /Search -read /Users/$(whoami)", shell=True, text=True)
+            output = (await run_command(["dscl", "/Search", "-read", f"/Users/{getuser()}"], timeout=cls.probe_timeout)).stdout
             if "OriginalNodeName" in output:
                 return True
 
         return False
     
 
-    def _get_connection_type(self):
-        if self.check_zpa_connection():
-            return {"is_connected": True, "status_message": "ZPA"}
-        elif self.check_vpn_status():
-            return {"is_connected": True, "status_message": "VPN"}
-        else:
-            return {"is_connected": False, "status_message": "not_connected"}
+    async def _get_connection_type(self):
+        checks = {
+            asyncio.ensure_future(self.check_zpa_connection()): "ZPA",
+            asyncio.ensure_future(self.check_vpn_status()): "VPN",
+        }
 
+        # Both checks run concurrently and the first one to confirm a connection wins
+        pending = set(checks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for check in done:
+                    if check.exception() is not None:
+                        logger.debug("%s check failed: %s", checks[check], check.exception())
+                    elif check.result():
+                        return {"is_connected": True, "status_message": checks[check]}
+        finally:
+            for check in pending:
+                check.cancel()
+
+        return {"is_connected": False, "status_message": "not_connected"}
 
     async def execute(self):
-        async def _execute_with_retry(retries, delay):
-            for _ in range(retries):
-                result = self._get_connection_type()
-                if result["status_message"] != "not_connected":
-                    return result
-                await asyncio.sleep(delay)
-            return {"is_connected": False, "status_message": "not_connected"}
-
-        connection_type = await _execute_with_retry(retries=3, delay=1)
-        return connection_type
-
-    async def monitor_status(self):
-        previous_state = None
-        while True:
-            current_state = await self.execute()
-            if current_state != previous_state:
-                previous_state = current_state
-                await self.notify_all(current_state)
-            await asyncio.sleep(5)  # Adjust the interval as needed
\ No newline at end of file
+        return await self._get_connection_type()
+
+    async def poll_status(self):
+        return await self.execute()
\ No newline at end of file
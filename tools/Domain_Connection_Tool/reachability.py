@@ -0,0 +1,250 @@
+import asyncio
+import ipaddress
+import os
+import platform
+import random
+import re
+import socket
+import struct
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Sequence
+
+DNS_PORT = 53
+DNS_HEADER = struct.Struct("!HHHHHH")
+DNS_TYPE_A = 1
+DNS_CLASS_IN = 1
+# Standard query with recursion desired
+DNS_QUERY_FLAGS = 0x0100
+
+# Registry key under HKEY_LOCAL_MACHINE with the global and per-adapter DNS settings on Windows
+TCPIP_PARAMETERS_KEY = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters"
+
+
+class DNSError(Exception):
+    pass
+
+
+def build_query(host: str, query_id: int) -> bytes:
+    """Builds a DNS query for the A records of host."""
+    question = b"".join(
+        bytes([len(label)]) + label for label in host.rstrip(".").encode("idna").split(b".")
+    ) + b"\0"
+    return DNS_HEADER.pack(query_id, DNS_QUERY_FLAGS, 1, 0, 0, 0) + question + struct.pack("!HH", DNS_TYPE_A, DNS_CLASS_IN)
+
+
+def _skip_name(message: bytes, offset: int) -> int:
+    while True:
+        length = message[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            # Compression pointer, which always ends the name
+            return offset + 2
+        offset += length + 1
+
+
+def parse_a_records(message: bytes, query_id: int) -> List[str]:
+    """Returns the IPv4 addresses in a DNS response to the query with the given id."""
+    response_id, flags, question_count, answer_count, _, _ = DNS_HEADER.unpack_from(message)
+    if response_id != query_id:
+        raise DNSError("Mismatched DNS response id")
+    if flags & 0x000F:
+        raise DNSError(f"DNS query failed with rcode {flags & 0x000F}")
+
+    offset = DNS_HEADER.size
+    for _ in range(question_count):
+        offset = _skip_name(message, offset) + 4
+
+    addresses = []
+    for _ in range(answer_count):
+        offset = _skip_name(message, offset)
+        record_type, record_class, _, length = struct.unpack_from("!HHIH", message, offset)
+        offset += 10
+        if record_type == DNS_TYPE_A and record_class == DNS_CLASS_IN and length == 4:
+            addresses.append(socket.inet_ntoa(message[offset:offset + 4]))
+        offset += length
+    return addresses
+
+
+class _DNSClientProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query_id: int):
+        self.query_id = query_id
+        self.response = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if self.response.done():
+            return
+        try:
+            self.response.set_result(parse_a_records(data, self.query_id))
+        except (DNSError, struct.error, IndexError) as e:
+            self.response.set_exception(DNSError(str(e)))
+
+    def error_received(self, exc):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+
+async def resolve_uncached(host: str, nameserver: str, timeout: float, port: int = DNS_PORT) -> List[str]:
+    """Asks a nameserver directly for the A records of host, bypassing the OS resolver cache."""
+    loop = asyncio.get_running_loop()
+    query_id = random.getrandbits(16)
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _DNSClientProtocol(query_id), remote_addr=(nameserver, port)
+    )
+    try:
+        transport.sendto(build_query(host, query_id))
+        return await asyncio.wait_for(protocol.response, timeout)
+    finally:
+        transport.close()
+
+
+def parse_nameserver_list(value: str) -> List[str]:
+    """Returns the IPv4 addresses in a registry nameserver list, which separates them by commas or spaces."""
+    nameservers = []
+    for field in re.split(r"[,\s]+", value or ""):
+        try:
+            if ipaddress.ip_address(field).version == 4:
+                nameservers.append(field)
+        except ValueError:
+            continue
+    return nameservers
+
+
+def _registry_value(winreg, key, name: str):
+    try:
+        return winreg.QueryValueEx(key, name)[0]
+    except FileNotFoundError:
+        return None
+
+
+def _has_address(winreg, interface) -> bool:
+    if _registry_value(winreg, interface, "EnableDHCP"):
+        return _registry_value(winreg, interface, "DhcpIPAddress") not in (None, "", "0.0.0.0")
+    return any(address not in ("", "0.0.0.0") for address in _registry_value(winreg, interface, "IPAddress") or ())
+
+
+def windows_nameservers() -> List[str]:
+    """Returns the IPv4 nameservers of the adapters that have an address, read from the registry.
+
+    The global NameServer comes first, then per adapter its static NameServer or else its DhcpNameServer.
+    Adapters without an address are skipped, their DHCP servers are left over from an earlier network.
+    """
+    import winreg
+
+    nameservers = []
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, TCPIP_PARAMETERS_KEY) as parameters:
+            nameservers += parse_nameserver_list(_registry_value(winreg, parameters, "NameServer"))
+
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, TCPIP_PARAMETERS_KEY + r"\Interfaces") as interfaces:
+            for index in range(winreg.QueryInfoKey(interfaces)[0]):
+                with winreg.OpenKey(interfaces, winreg.EnumKey(interfaces, index)) as interface:
+                    if not _has_address(winreg, interface):
+                        continue
+                    nameservers += (parse_nameserver_list(_registry_value(winreg, interface, "NameServer"))
+                                    or parse_nameserver_list(_registry_value(winreg, interface, "DhcpNameServer")))
+    except OSError:
+        pass
+
+    # Several adapters usually share the same servers
+    return list(dict.fromkeys(nameservers))
+
+
+def system_nameservers(resolv_conf: str = "/etc/resolv.conf") -> List[str]:
+    """Returns the system's IPv4 nameservers, from the registry on Windows and from resolv.conf elsewhere.
+
+    Empty when none are found, in which case resolve falls back to the OS resolver and its cache.
+    """
+    if platform.system() == "Windows":
+        return windows_nameservers()
+
+    if not os.path.exists(resolv_conf):
+        return []
+
+    nameservers = []
+    with open(resolv_conf, encoding="utf-8") as resolv_file:
+        for line in resolv_file:
+            fields = line.split()
+            if len(fields) >= 2 and fields[0] == "nameserver":
+                try:
+                    if ipaddress.ip_address(fields[1]).version == 4:
+                        nameservers.append(fields[1])
+                except ValueError:
+                    continue
+    return nameservers
+
+
+async def _first(awaitables: Iterable[Awaitable], accept: Callable[[Any], bool], timeout: float) -> Any:
+    """Runs awaitables concurrently and returns the first result accept() takes, or None once all of them
+    finished or failed, or timeout passed. The rest are cancelled."""
+    loop = asyncio.get_running_loop()
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    deadline = loop.time() + timeout
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            # In the given order, so the first nameserver or address wins a tie
+            for task in tasks:
+                if task in done and not task.cancelled() and task.exception() is None and accept(task.result()):
+                    return task.result()
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def resolve(host: str, nameservers: Sequence[str], timeout: float) -> List[str]:
+    """Resolves host without going through a resolver cache when a nameserver is known.
+
+    The nameservers are asked at the same time and the first non-empty answer within timeout wins.
+    """
+    try:
+        ipaddress.ip_address(host)
+        return [host]
+    except ValueError:
+        pass
+
+    if nameservers:
+        addresses = await _first((resolve_uncached(host, nameserver, timeout) for nameserver in nameservers), bool, timeout)
+        return addresses or []
+
+    # No nameserver to query directly, so fall back to the OS resolver
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM), timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return []
+    return [info[4][0] for info in infos]
+
+
+async def tcp_probe(address: str, port: int, timeout: float) -> bool:
+    """Returns whether a TCP connection to address:port can be opened within timeout."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def is_reachable(host: str, port: int, nameservers: Optional[Sequence[str]] = None, timeout: float = 2.0) -> bool:
+    """Resolves host without caching and checks that one of its addresses accepts TCP connections.
+
+    The lookup and the connection attempts, which run concurrently, get timeout seconds each, so the
+    check takes at most twice timeout however many nameservers and addresses there are.
+    """
+    if nameservers is None:
+        nameservers = system_nameservers()
+
+    addresses = await resolve(host, nameservers, timeout)
+    return bool(await _first((tcp_probe(address, port, timeout) for address in addresses), bool, timeout))
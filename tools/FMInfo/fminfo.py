@@ -1,31 +1,97 @@
+import logging
+import os
 import platform
 import psutil
 import socket
 import datetime
 from getpass import getuser
 import asyncio
-from tools.base_tool.base_tool import BaseTool
+import threading
+from tools.base_tool.base_tool import BaseTool, InvalidArgumentsError
+from tools.command_runner import run_command
+from tools.tool_executor import run_blocking
+from tools.FMInfo.netlink_monitor import NetlinkAdapterMonitor
+from tools.FMInfo.system_facts import TTLValue, load_static_facts, save_static_facts
 from observable import Observable
 from tools.tool_type import ToolType
 from tools.tags import Tag
 
+logger = logging.getLogger(__name__)
+
 class FMInfo(BaseTool, Observable):
+    name = "FMInfo"
+    description = "Your system & user data."
+    tool_type = ToolType.SELF_SERVICE
+    tags = (Tag.INFORMATION, Tag.WIDGET)
+    icon = "Users"
+    section_cache_ttls = {"user": 60, "device": 30, "network": 5}
+    # The monitored network state, recorded as adapter counts
+    history_fields = {"active_adapters": "active_adapters", "other_adapters": "other_adapters"}
+
+    # Optional file the immutable device facts are persisted to between restarts
+    static_facts_path = os.environ.get("FMINFO_STATIC_FACTS_PATH")
+
+    # WMI and disk scans run on the tool thread pool, leave most of it to other tools
+    max_concurrency = 2
+
     def __init__(self):
-        super().__init__(name="FMInfo", description="Your system & user data.",  tool_type=ToolType.SELF_SERVICE,
-            tags=[Tag.INFORMATION, Tag.WIDGET], icon="Users")
         Observable.__init__(self)
+        # WMI sessions are COM objects bound to the thread that opened them, so each pool thread opens its own
+        self._wmi_sessions = threading.local()
+        self._adapter_monitor = None
+        self._static_facts = None
+        # Concurrent device requests share one collection of the static facts
+        self._static_facts_lock = asyncio.Lock()
+        self._warmup = None
+        # Volatile facts are cheap to sample but still change, so each gets its own short TTL
+        self._memory = TTLValue(psutil.virtual_memory, ttl=60)
+        self._disk_usage = TTLValue(lambda: psutil.disk_usage('/'), ttl=30)
+        self._boot_time = TTLValue(psutil.boot_time, ttl=300)
+
+    async def startup(self):
+        # Warmed in the background, only the device section depends on them and a failing probe
+        # must not keep the user and network sections from working
+        self._warmup = asyncio.get_running_loop().create_task(self._warm_static_facts())
+
+    async def shutdown(self):
+        if self._warmup is not None:
+            self._warmup.cancel()
+            self._warmup = None
+        self._wmi_sessions = threading.local()
+
+    async def _warm_static_facts(self):
+        try:
+            await self.get_static_facts()
+        except Exception:
+            logger.warning("Could not collect the static device facts, retrying on the next device request", exc_info=True)
+
+    def _get_wmi(self):
+        session = getattr(self._wmi_sessions, "session", None)
+        if session is None:
+            # You will need to use Windows Management Instrumentation (WMI) library.
+            # It can be installed with: pip install wmi
+            import wmi
+
+            # Opening a WMI session is expensive, so it is kept for the lifetime of the tool
+            session = self._wmi_sessions.session = wmi.WMI()
+        return session
+
+    @classmethod
+    def get_cache_ttl(cls, section: str = None, **kwargs) -> float:
+        return cls.section_cache_ttls.get(section, 0)
 
-    def execute(self, section: str):
+    async def execute(self, section: str):
         section_methods = {
             "user": self.get_user_data,
             "device": self.get_device_data,
-            "network": self.get_network_data,
+            "network": self.sample_network_data,
         }
 
         if section not in section_methods:
-            raise ValueError("Invalid section specified.")
+            raise InvalidArgumentsError("Invalid section specified.")
 
-        return section_methods[section]()
+        result = section_methods[section]()
+        return await result if asyncio.iscoroutine(result) else result
 
     def get_user_data(self):
         # This is a placeholder implementation, as some of the user data is highly platform and
@@ -40,52 +106,71 @@ class FMInfo(BaseTool, Observable):
         }
 
 
-    def get_device_data(self):
-        cpu_info = platform.processor() 
-        ram_info = psutil.virtual_memory()
-        boot_time = datetime.datetime.fromtimestamp(psutil.boot_time()).isoformat()
-        total_disk_size_gb = psutil.disk_usage('/').total / (1024 ** 3)
-        current_disk_usage_gb = psutil.disk_usage('/').used / (1024 ** 3)
-
-        manufacturer, model, serial_number = self.get_device_identifiers()
+    async def get_device_data(self):
+        static_facts = await self.get_static_facts()
+        # psutil can block, e.g. on a slow disk, so the samples are taken on the tool thread pool
+        ram_info, disk_usage, boot_timestamp = await run_blocking(self._sample_volatile_facts)
+        boot_time = datetime.datetime.fromtimestamp(boot_timestamp).isoformat()
 
         return {
-            "Computer name": platform.node(),
-            "CPU details": cpu_info,
+            "Computer name": static_facts["Computer name"],
+            "CPU details": static_facts["CPU details"],
             "RAM": f"{round(float(ram_info.total) / (1024 ** 3), 2)} GB",
-            "Total disk size": f"{total_disk_size_gb:.2f} GB",
-            "Current disk usage": f"{current_disk_usage_gb:.2f} GB",
-            "Manufacturer": manufacturer,
-            "Model": model,
-            "CPU architecture": platform.machine(),
+            "Total disk size": f"{disk_usage.total / (1024 ** 3):.2f} GB",
+            "Current disk usage": f"{disk_usage.used / (1024 ** 3):.2f} GB",
+            "Manufacturer": static_facts["Manufacturer"],
+            "Model": static_facts["Model"],
+            "CPU architecture": static_facts["CPU architecture"],
             "Last boot time": boot_time,
-            "Serial number": serial_number,
+            "Serial number": static_facts["Serial number"],
         }
 
-    def get_device_identifiers(self):
+    async def get_static_facts(self):
+        """Returns the facts that cannot change while the machine is running, collecting them only once."""
+        async with self._static_facts_lock:
+            if self._static_facts is None:
+                self._static_facts = await self._collect_static_facts()
+        return self._static_facts
+
+    async def _collect_static_facts(self):
+        facts = load_static_facts(self.static_facts_path)
+        if facts is None:
+            manufacturer, model, serial_number = await self.get_device_identifiers()
+            facts = {
+                "Computer name": platform.node(),
+                "CPU details": platform.processor(),
+                "Manufacturer": manufacturer,
+                "Model": model,
+                "CPU architecture": platform.machine(),
+                "Serial number": serial_number,
+            }
+            save_static_facts(self.static_facts_path, facts)
+        return facts
+
+    def _sample_volatile_facts(self):
+        return self._memory.get(), self._disk_usage.get(), self._boot_time.get()
+
+    def _query_wmi_identifiers(self):
+        w = self._get_wmi()
+        for item in w.Win32_ComputerSystem():
+            manufacturer = item.Manufacturer
+            model = item.Model
+        for item in w.Win32_BIOS():
+            serial_number = item.SerialNumber
+        return manufacturer, model, serial_number
+
+    async def get_device_identifiers(self):
         system = platform.system()
         if system == "Windows":
-            # You will need to use Windows Management Instrumentation (WMI) library.
-            # It can be installed with: pip install wmi
-            import wmi
-
-            w = wmi.WMI()
-            for item in w.Win32_ComputerSystem():
-                manufacturer = item.Manufacturer
-                model = item.Model
-            for item in w.Win32_BIOS():
-                serial_number = item.SerialNumber
+            manufacturer, model, serial_number = await run_blocking(self._query_wmi_identifiers)
 
         elif system == "Darwin":
             # macOS implementation
-            import subprocess
-
-            def get_system_profiler_data(datatype: str) -> str:
-                return subprocess.check_output(["system_profiler", datatype]).decode("utf-8").strip()
+            hardware_data = (await run_command(["system_profiler", "SPHardwareDataType"], timeout=30)).stdout.strip()
 
             manufacturer = "Apple Inc."
-            model = get_system_profiler_data("SPHardwareDataType").split("Model Name:")[1].split("\n")[0].strip()
-            serial_number = get_system_profiler_data("SPHardwareDataType").split("Serial Number (system):")[1].split("\n")[0].strip()
+            model = hardware_data.split("Model Name:")[1].split("\n")[0].strip()
+            serial_number = hardware_data.split("Serial Number (system):")[1].split("\n")[0].strip()
 
         else:
             # Other platforms (e.g., Linux) or fallback implementation
@@ -100,24 +185,38 @@ class FMInfo(BaseTool, Observable):
         active_adapters = {}
         other_adapters = {}
         
+        # One stats call per sample rather than one per address
+        stats = psutil.net_if_stats()
+
         for interface, addrs in psutil.net_if_addrs().items():
+            interface_stats = stats.get(interface) or stats.get(interface.split(":", 1)[0])
             for addr in addrs:
                 if addr.family == socket.AF_INET:
-                    if psutil.net_if_stats()[interface].isup:
-                        active_adapters[interface] = addr.address
+                    # Interfaces with secondary addresses are reported by their primary (first) address
+                    if interface_stats is not None and interface_stats.isup:
+                        active_adapters.setdefault(interface, addr.address)
                     else:
-                        other_adapters[interface] = addr.address
+                        other_adapters.setdefault(interface, addr.address)
 
         return {"active_adapters": active_adapters, "other_adapters": other_adapters}
-    
+
+    async def sample_network_data(self):
+        return await run_blocking(self.get_network_data)
+
+    async def poll_status(self):
+        # While netlink events keep the snapshot current, polling is only a cheap consistency check
+        if self._adapter_monitor is not None and self._adapter_monitor.running:
+            return self._adapter_monitor.snapshot()
+        return await self.sample_network_data()
+
     async def monitor_status(self):
-        previous_state = None
-        while True:
-            current_state = self.get_network_data()
-            if current_state != previous_state:
-                previous_state = current_state
-                await self.notify_all(current_state)
-            await asyncio.sleep(5)  # Adjust the interval as needed
-    
-
-    
\ No newline at end of file
+        if not NetlinkAdapterMonitor.is_supported():
+            # Other platforms rely on the polling scheduler alone
+            return
+
+        self._adapter_monitor = NetlinkAdapterMonitor()
+        try:
+            async for snapshot in self._adapter_monitor.changes():
+                await self.publish(snapshot)
+        finally:
+            self._adapter_monitor = None
\ No newline at end of file
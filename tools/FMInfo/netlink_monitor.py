@@ -0,0 +1,176 @@
+import asyncio
+import errno
+import socket
+import struct
+import sys
+from typing import AsyncIterator, Dict, List, Tuple
+
+import psutil
+
+from tools.netlink import attribute_string, iter_messages, parse_attributes
+
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+
+IFLA_IFNAME = 3
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_LABEL = 3
+
+# psutil reports an interface as up when it is running, so the events use the same flag
+IFF_RUNNING = 0x40
+
+# struct ifinfomsg: family, padding, device type, index, flags, change mask
+IFINFOMSG = struct.Struct("=BxHiII")
+# struct ifaddrmsg: family, prefix length, flags, scope, index
+IFADDRMSG = struct.Struct("=BBBBI")
+
+
+class NetlinkAdapterMonitor:
+    """Keeps FMInfo's adapter snapshot up to date from rtnetlink link and IPv4 address events.
+
+    The snapshot is seeded once from psutil and then only updated incrementally, so an idle network
+    costs nothing and changes are seen as soon as the kernel reports them.
+    """
+
+    def __init__(self):
+        self._links: Dict[int, Tuple[str, bool]] = {}
+        # Keyed by address label, which is how psutil names aliased interfaces such as "eth0:1". Every
+        # address is kept, primary first, so removing a secondary address leaves the label in place.
+        self._addresses: Dict[str, Tuple[int, List[str]]] = {}
+        self._socket = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        return sys.platform.startswith("linux") and hasattr(socket, "AF_NETLINK")
+
+    @property
+    def running(self) -> bool:
+        return self._socket is not None
+
+    def open(self):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        sock.setblocking(False)
+        sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR))
+        self._socket = sock
+        # Seed after subscribing so no event can fall between the two
+        self.seed()
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def seed(self):
+        """Rebuilds the snapshot from psutil, used at startup and after the kernel dropped events."""
+        stats = psutil.net_if_stats()
+        self._links = {}
+        self._addresses = {}
+
+        for name, stat in stats.items():
+            try:
+                self._links[socket.if_nametoindex(name)] = (name, stat.isup)
+            except OSError:
+                continue
+
+        for label, addrs in psutil.net_if_addrs().items():
+            try:
+                index = socket.if_nametoindex(label.split(":", 1)[0])
+            except OSError:
+                continue
+            addresses = [addr.address for addr in addrs if addr.family == socket.AF_INET]
+            if addresses:
+                self._addresses[label] = (index, addresses)
+
+    def snapshot(self) -> dict:
+        active_adapters = {}
+        other_adapters = {}
+
+        for label, (index, addresses) in self._addresses.items():
+            _, is_up = self._links.get(index, (label, False))
+            # Reported by its primary address, like FMInfo.get_network_data
+            if is_up:
+                active_adapters[label] = addresses[0]
+            else:
+                other_adapters[label] = addresses[0]
+
+        return {"active_adapters": active_adapters, "other_adapters": other_adapters}
+
+    def apply(self, data: bytes) -> bool:
+        """Applies the rtnetlink messages in a datagram, returning whether the snapshot may have changed."""
+        changed = False
+
+        for msg_type, _, _, payload in iter_messages(data):
+            if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+                _, _, index, flags, _ = IFINFOMSG.unpack_from(payload)
+                attributes = parse_attributes(payload[IFINFOMSG.size:])
+                previous = self._links.get(index)
+
+                if msg_type == RTM_DELLINK:
+                    self._links.pop(index, None)
+                    for label in [label for label, (idx, _) in self._addresses.items() if idx == index]:
+                        del self._addresses[label]
+                else:
+                    name = attribute_string(attributes[IFLA_IFNAME]) if IFLA_IFNAME in attributes else None
+                    self._links[index] = (name or (previous[0] if previous else str(index)), bool(flags & IFF_RUNNING))
+
+                changed = changed or self._links.get(index) != previous
+
+            elif msg_type in (RTM_NEWADDR, RTM_DELADDR):
+                family, _, _, _, index = IFADDRMSG.unpack_from(payload)
+                if family != socket.AF_INET:
+                    continue
+
+                attributes = parse_attributes(payload[IFADDRMSG.size:])
+                raw_address = attributes.get(IFA_LOCAL) or attributes.get(IFA_ADDRESS)
+                if raw_address is None:
+                    continue
+
+                address = socket.inet_ntoa(raw_address)
+                if IFA_LABEL in attributes:
+                    label = attribute_string(attributes[IFA_LABEL])
+                else:
+                    label = self._links.get(index, (str(index), False))[0]
+
+                entry = self._addresses.get(label)
+                if msg_type == RTM_NEWADDR:
+                    if entry is None or entry[0] != index:
+                        self._addresses[label] = (index, [address])
+                        changed = True
+                    elif address not in entry[1]:
+                        entry[1].append(address)
+                        changed = True
+                elif entry is not None and entry[0] == index and address in entry[1]:
+                    entry[1].remove(address)
+                    if not entry[1]:
+                        del self._addresses[label]
+                    changed = True
+
+        return changed
+
+    async def changes(self) -> AsyncIterator[dict]:
+        """Yields the current snapshot, then a new snapshot after every batch of relevant events."""
+        loop = asyncio.get_running_loop()
+        self.open()
+        try:
+            yield self.snapshot()
+            while True:
+                try:
+                    data = await loop.sock_recv(self._socket, 65536)
+                except OSError as e:
+                    if e.errno != errno.ENOBUFS:
+                        raise
+                    # The kernel dropped events because we fell behind, so start over from a full read
+                    self.seed()
+                    yield self.snapshot()
+                    continue
+
+                if self.apply(data):
+                    yield self.snapshot()
+        finally:
+            self.close()
@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import platform
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLValue:
+    """Lazily sampled value that is re-sampled once it is older than its TTL."""
+
+    def __init__(self, sample: Callable[[], Any], ttl: float):
+        self.sample = sample
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+
+    def get(self) -> Any:
+        now = time.monotonic()
+        if now >= self._expires_at:
+            self._value = self.sample()
+            self._expires_at = now + self.ttl
+        return self._value
+
+
+def _machine_key() -> str:
+    # Persisted facts are only trusted on the machine, and under the name, they were collected on
+    return f"{platform.node()}|{platform.machine()}"
+
+
+def load_static_facts(path: Optional[str]) -> Optional[dict]:
+    """Loads persisted static facts, returning None if there are none for this machine."""
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, encoding="utf-8") as facts_file:
+            stored = json.load(facts_file)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable static facts file %s: %s", path, e)
+        return None
+
+    if stored.get("machine") != _machine_key():
+        return None
+    return stored.get("facts")
+
+
+def save_static_facts(path: Optional[str], facts: dict):
+    """Persists static facts so the next start can skip collecting them."""
+    if not path:
+        return
+
+    try:
+        with open(path, "w", encoding="utf-8") as facts_file:
+            json.dump({"machine": _machine_key(), "facts": facts}, facts_file)
+    except OSError as e:
+        logger.warning("Could not persist static facts to %s: %s", path, e)
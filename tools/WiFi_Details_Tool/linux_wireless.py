@@ -0,0 +1,225 @@
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+from typing import Dict, List, Optional
+
+from tools.netlink import (
+    NLMSG_DONE,
+    NLMSG_ERROR,
+    attribute_string,
+    iter_messages,
+    pack_attribute,
+    pack_message,
+    parse_attributes,
+)
+
+logger = logging.getLogger(__name__)
+
+NETLINK_GENERIC = 16
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+# struct genlmsghdr: command, version, reserved
+GENL_HEADER = struct.Struct("=BBH")
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+
+NL80211_CMD_GET_INTERFACE = 5
+NL80211_CMD_GET_STATION = 17
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_STA_INFO = 21
+NL80211_ATTR_WIPHY_FREQ = 38
+NL80211_ATTR_SSID = 52
+NL80211_STA_INFO_SIGNAL = 7
+NL80211_STA_INFO_TX_BITRATE = 8
+NL80211_RATE_INFO_BITRATE = 1
+NL80211_RATE_INFO_BITRATE32 = 5
+
+# Maximum of the link quality column in /proc/net/wireless for cfg80211 drivers
+MAX_LINK_QUALITY = 70
+
+
+def frequency_to_channel(frequency: int) -> int:
+    if frequency == 2484:
+        return 14
+    if 2412 <= frequency < 2484:
+        return (frequency - 2407) // 5
+    if 5150 <= frequency <= 5895:
+        return (frequency - 5000) // 5
+    if 5955 <= frequency <= 7115:
+        return (frequency - 5950) // 5
+    return 0
+
+
+def parse_proc_wireless(text: str) -> Dict[str, dict]:
+    """Parses /proc/net/wireless into {interface: {"link": ..., "level": ..., "noise": ...}}."""
+    interfaces = {}
+    # The first two lines are column headers
+    for line in text.splitlines()[2:]:
+        if ":" not in line:
+            continue
+        name, values = line.split(":", 1)
+        columns = values.split()
+        if len(columns) < 4:
+            continue
+        # Values carry a trailing "." when the driver updated them since the last read
+        link, level, noise = (float(column.rstrip(".")) for column in columns[1:4])
+        interfaces[name.strip()] = {"link": link, "level": level, "noise": noise}
+    return interfaces
+
+
+class NL80211:
+    """Minimal nl80211 client over a generic netlink socket, for the channel and bitrate of an interface."""
+
+    def __init__(self, timeout: float = 1.0):
+        self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_GENERIC)
+        self._socket.settimeout(timeout)
+        self._socket.bind((0, 0))
+        self._sequence = 0
+        try:
+            reply = self._request(GENL_ID_CTRL, CTRL_CMD_GETFAMILY,
+                                  pack_attribute(CTRL_ATTR_FAMILY_NAME, b"nl80211\0"))
+            self.family_id = struct.unpack("=H", reply[0][CTRL_ATTR_FAMILY_ID][:2])[0]
+        except (OSError, IndexError, KeyError):
+            self.close()
+            raise OSError("nl80211 is not available")
+
+    @staticmethod
+    def is_supported() -> bool:
+        return sys.platform.startswith("linux")
+
+    def close(self):
+        self._socket.close()
+
+    def _request(self, family: int, command: int, attributes: bytes, dump: bool = False) -> List[Dict[int, bytes]]:
+        self._sequence += 1
+        flags = NLM_F_REQUEST | (NLM_F_DUMP if dump else 0)
+        self._socket.send(pack_message(family, flags, self._sequence, GENL_HEADER.pack(command, 1, 0) + attributes))
+
+        replies = []
+        while True:
+            for msg_type, _, sequence, payload in iter_messages(self._socket.recv(65536)):
+                if sequence != self._sequence:
+                    # A late reply to an earlier request that timed out
+                    continue
+                if msg_type == NLMSG_DONE:
+                    return replies
+                if msg_type == NLMSG_ERROR:
+                    error = -struct.unpack_from("=i", payload)[0]
+                    if error:
+                        raise OSError(error, os.strerror(error))
+                    return replies
+                replies.append(parse_attributes(payload[GENL_HEADER.size:]))
+            if replies and not dump:
+                return replies
+
+    def link_info(self, ifindex: int) -> dict:
+        """Returns the SSID, channel, signal (dBm) and transmit bitrate (Mbit/s) known for an interface."""
+        index_attribute = pack_attribute(NL80211_ATTR_IFINDEX, struct.pack("=I", ifindex))
+        info = {}
+
+        for interface in self._request(self.family_id, NL80211_CMD_GET_INTERFACE, index_attribute):
+            if NL80211_ATTR_WIPHY_FREQ in interface:
+                info["channel"] = frequency_to_channel(struct.unpack("=I", interface[NL80211_ATTR_WIPHY_FREQ][:4])[0])
+            if NL80211_ATTR_SSID in interface:
+                info["ssid"] = attribute_string(interface[NL80211_ATTR_SSID])
+
+        # A connected client has exactly one station, its access point
+        for station in self._request(self.family_id, NL80211_CMD_GET_STATION, index_attribute, dump=True):
+            station_info = parse_attributes(station.get(NL80211_ATTR_STA_INFO, b""))
+            if NL80211_STA_INFO_SIGNAL in station_info:
+                info["signal"] = struct.unpack("=b", station_info[NL80211_STA_INFO_SIGNAL][:1])[0]
+            rate_info = parse_attributes(station_info.get(NL80211_STA_INFO_TX_BITRATE, b""))
+            if NL80211_RATE_INFO_BITRATE32 in rate_info:
+                info["tx_rate"] = struct.unpack("=I", rate_info[NL80211_RATE_INFO_BITRATE32][:4])[0] / 10
+            elif NL80211_RATE_INFO_BITRATE in rate_info:
+                info["tx_rate"] = struct.unpack("=H", rate_info[NL80211_RATE_INFO_BITRATE][:2])[0] / 10
+
+        return info
+
+
+class LinuxWirelessReader:
+    """Reads WiFi link details from procfs and sysfs, and from nl80211 when reading the live system.
+
+    root points at the filesystem to read, so the reader can run against a fixture tree; nl80211 is only
+    queried when root is "/".
+    """
+
+    def __init__(self, root: str = "/"):
+        self.root = root
+        self._nl80211: Optional[NL80211] = None
+        self._nl80211_failed = False
+        # Reads run on the tool thread pool, and requests on the shared nl80211 socket must not interleave
+        self._lock = threading.Lock()
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def _read(self, *parts: str) -> Optional[str]:
+        try:
+            with open(self._path(*parts), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def wireless_interfaces(self) -> List[str]:
+        """Lists the interfaces sysfs marks as wireless, connected ones first."""
+        net_dir = self._path("sys", "class", "net")
+        try:
+            names = sorted(os.listdir(net_dir))
+        except OSError:
+            return []
+
+        wireless = [name for name in names
+                    if os.path.exists(os.path.join(net_dir, name, "wireless"))
+                    or os.path.exists(os.path.join(net_dir, name, "phy80211"))]
+        return sorted(wireless, key=lambda name: (self._read("sys", "class", "net", name, "operstate") or "").strip() != "up")
+
+    def _nl80211_info(self, interface: str) -> dict:
+        if self.root != "/" or self._nl80211_failed or not NL80211.is_supported():
+            return {}
+
+        if self._nl80211 is None:
+            try:
+                self._nl80211 = NL80211()
+            except OSError as e:
+                # Fall back to procfs alone from now on, e.g. without the cfg80211 module
+                logger.debug("nl80211 is unavailable: %s", e)
+                self._nl80211_failed = True
+                return {}
+
+        try:
+            return self._nl80211.link_info(socket.if_nametoindex(interface))
+        except OSError as e:
+            logger.debug("nl80211 query for %s failed: %s", interface, e)
+            return {}
+
+    def read(self) -> Optional[dict]:
+        """Returns the link details of the first connected wireless interface, or None without one.
+
+        Blocks for up to the nl80211 timeout per request, so async callers run it on the tool thread pool.
+        """
+        with self._lock:
+            return self._read_link()
+
+    def _read_link(self) -> Optional[dict]:
+        proc = parse_proc_wireless(self._read("proc", "net", "wireless") or "")
+        for interface in self.wireless_interfaces():
+            if interface not in proc:
+                continue
+
+            details = {"interface": interface, "link": proc[interface]["link"], "signal": int(proc[interface]["level"])}
+            details.update(self._nl80211_info(interface))
+            return details
+        return None
+
+    def close(self):
+        with self._lock:
+            if self._nl80211 is not None:
+                self._nl80211.close()
+                self._nl80211 = None
@@ -1,21 +1,49 @@
+import os
 import platform
-import subprocess
-import asyncio
 from tools.base_tool.base_tool import BaseTool
+from tools.command_runner import run_command
+from tools.tool_executor import run_blocking
+from tools.WiFi_Details_Tool.linux_wireless import MAX_LINK_QUALITY, LinuxWirelessReader
+from tools.WiFi_Details_Tool.wifi_quality import (
+    rate_link_ratio,
+    rate_radio_type,
+    rate_signal_dbm,
+    rate_signal_percent,
+    score_wifi_details,
+)
 from observable import Observable
 from tools.tool_type import ToolType
 from tools.tags import Tag
 
 class WiFiDetailsTool(BaseTool, Observable):
+    name = "WiFi Details"
+    description = "Get live data about the details of your WiFi connection."
+    tool_type = ToolType.AUTO_ENABLED
+    tags = (Tag.INTERNET,)
+    icon = "Wifi"
+    cache_ttl = 5
+    execute_timeout = 10.0
+    # RSSI jitters by a dB or two between polls and every change resets the scheduler to the minimum, so
+    # keep it at the cache TTL instead of spawning netsh or airport every couple of seconds
+    poll_min_interval = 5.0
+    poll_max_interval = 20.0
+    history_fields = {
+        "signal": "details.signal.value",
+        "channel": "details.channel.value",
+        "tx_rate": "details.link.value.lastTxRate",
+        "max_rate": "details.link.value.maxRate",
+    }
+
+    # Filesystem root the Linux backend reads /proc and /sys from, e.g. a fixture tree
+    linux_root = os.environ.get("WIFI_LINUX_ROOT", "/")
+
     def __init__(self):
-        super().__init__(
-            name="WiFi Details",
-            description="Get live data about the details of your WiFi connection.",
-             tool_type=ToolType.AUTO_ENABLED,
-            tags=[Tag.INTERNET],
-            icon="Wifi"
-        )
         Observable.__init__(self)
+        self._linux_reader = LinuxWirelessReader(self.linux_root)
+
+    async def shutdown(self):
+        # Waits for a read in progress, which may block for the nl80211 timeout
+        await run_blocking(self._linux_reader.close)
 
     def parse_wifi_details(self, raw_output):
         lines = raw_output.split("\n")
@@ -30,113 +58,46 @@ class WiFiDetailsTool(BaseTool, Observable):
 
         return wifi_details
 
-    def get_wifi_details(self):
-        if platform.system() == "Windows":
-            cmd_output = subprocess.check_output(["netsh", "wlan", "show", "interfaces"]).decode("utf-8")
+    async def get_wifi_details(self):
+        system = platform.system()
+
+        if system == "Windows":
+            cmd_output = (await run_command(["netsh", "wlan", "show", "interfaces"])).stdout
             parsed_output = self.parse_wifi_details(cmd_output)
             signal_strength = int(parsed_output.get('Signal', '0%').rstrip('%'))
             radio_type = parsed_output.get('Radio type', '')
             channel = int(parsed_output.get('Channel', '0'))
 
-            # Assess signal strength
-            if signal_strength > 75:
-                signal_quality = 'reliable'
-            elif signal_strength > 50:
-                signal_quality = 'decent'
-            else:
-                signal_quality = 'slow'
-
-            # Assess link quality based on radio type
-            if 'ac' in radio_type or 'ax' in radio_type:
-                link_quality = 'reliable'
-            elif 'n' in radio_type:
-                link_quality = 'decent'
-            else:
-                link_quality = 'slow'
-
-            # Assess channel quality
-            if channel in [1, 6, 11]:  # These are generally the least congested channels
-                channel_quality = 'reliable'
-            else:
-                channel_quality = 'decent'  # Other channels might be more congested
-
-            # Combine assessments to give overall quality
-            quality_scores = {'reliable': 3, 'decent': 2, 'slow': 1}
-            overall_score = (0.6 * quality_scores[signal_quality] + 0.3 * quality_scores[link_quality] + 0.1 * quality_scores[channel_quality])
-            if overall_score > 2.5:
-                overall_quality = 'reliable'
-            elif overall_score > 1.5:
-                overall_quality = 'decent'
-            else:
-                overall_quality = 'slow'
-
-            return {
-                "details": {
-                "signal": {"quality": signal_quality, "value": signal_strength}, 
-                "link": {"quality": link_quality, "value": radio_type if platform.system() == "Windows" else {"lastTxRate": last_tx_rate, "maxRate": max_rate}}, 
-                "channel": {"quality": channel_quality, "value": channel}, 
-                "overall": overall_quality
-                }
-            }
-
-        elif platform.system() == "Darwin":
-            result = subprocess.check_output(["/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport", "-I"])
-            parsed_output = self.parse_wifi_details(result.decode("utf-8").strip())
+            return score_wifi_details(rate_signal_percent(signal_strength), signal_strength,
+                                      rate_radio_type(radio_type), radio_type, channel)
+
+        elif system == "Darwin":
+            result = await run_command(["/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport", "-I"])
+            parsed_output = self.parse_wifi_details(result.stdout.strip())
             signal_strength = int(parsed_output.get('agrCtlRSSI', '-100'))
-            channel = int(parsed_output.get('channel', '0'))
+            # Reported as "channel,width" on recent macOS versions
+            channel = int(parsed_output.get('channel', '0').split(',')[0])
             last_tx_rate = int(parsed_output.get('lastTxRate', '0'))
             max_rate = int(parsed_output.get('maxRate', '0'))
 
-            # Assess signal strength
-            if signal_strength > -50:
-                signal_quality = 'reliable'
-            elif signal_strength > -75:
-                signal_quality = 'decent'
-            else:
-                signal_quality = 'slow'
-
-            # Assess link quality based on last transmission rate and maximum rate
-            if last_tx_rate >= 0.8 * max_rate:
-                link_quality = 'reliable'
-            elif last_tx_rate >= 0.5 * max_rate:
-                link_quality = 'decent'
-            else:
-                link_quality = 'slow'
-
-            # Assess channel quality
-            if channel in [1, 6, 11]:  # These are generally the least congested channels
-                channel_quality = 'reliable'
-            else:
-                channel_quality = 'decent'  # Other channels might be more congested
-
-            # Combine assessments to give overall quality
-            quality_scores = {'reliable': 3, 'decent': 2, 'slow': 1}
-            overall_score = (0.6 * quality_scores[signal_quality] + 0.3 * quality_scores[link_quality] + 0.1 * quality_scores[channel_quality])
-            if overall_score > 2.5:
-                overall_quality = 'reliable'
-            elif overall_score > 1.5:
-                overall_quality = 'decent'
-            else:
-                overall_quality = 'slow'
-
-            return {
-                "details": {
-                "signal": {"quality": signal_quality, "value": signal_strength}, 
-                "link": {"quality": link_quality, "value": radio_type if platform.system() == "Windows" else {"lastTxRate": last_tx_rate, "maxRate": max_rate}}, 
-                "channel": {"quality": channel_quality, "value": channel}, 
-                "overall": overall_quality
-                }
-            }
-
-
-    def execute(self):
-        return self.get_wifi_details()
-
-    async def monitor_status(self):
-        previous_state = None
-        while True:
-            current_state = self.execute()
-            if current_state != previous_state:
-                previous_state = current_state
-                await self.notify_all(current_state)
-            await asyncio.sleep(5)  # Adjust the interval as needed
\ No newline at end of file
+            return score_wifi_details(rate_signal_dbm(signal_strength), signal_strength,
+                                      rate_link_ratio(last_tx_rate, max_rate), {"lastTxRate": last_tx_rate, "maxRate": max_rate},
+                                      channel)
+
+        elif system == "Linux":
+            # Reads procfs, sysfs and nl80211 directly, so polling spawns no processes; nl80211 replies can
+            # take up to a second each, so the reads stay off the event loop
+            link = await run_blocking(self._linux_reader.read)
+            if link is None:
+                return None
+
+            return score_wifi_details(rate_signal_dbm(link["signal"]), link["signal"],
+                                      rate_link_ratio(link["link"], MAX_LINK_QUALITY),
+                                      {"lastTxRate": link.get("tx_rate"), "linkQuality": link["link"]},
+                                      link.get("channel", 0))
+
+    async def execute(self):
+        return await self.get_wifi_details()
+
+    async def poll_status(self):
+        return await self.execute()
\ No newline at end of file
@@ -0,0 +1,68 @@
+from typing import Any
+
+# Weights of the signal, link and channel assessments in the overall quality
+QUALITY_SCORES = {'reliable': 3, 'decent': 2, 'slow': 1}
+
+# These are generally the least congested 2.4 GHz channels
+UNCONGESTED_CHANNELS = (1, 6, 11)
+
+
+def rate_signal_dbm(rssi: int) -> str:
+    if rssi > -50:
+        return 'reliable'
+    if rssi > -75:
+        return 'decent'
+    return 'slow'
+
+
+def rate_signal_percent(signal_strength: int) -> str:
+    if signal_strength > 75:
+        return 'reliable'
+    if signal_strength > 50:
+        return 'decent'
+    return 'slow'
+
+
+def rate_radio_type(radio_type: str) -> str:
+    if 'ac' in radio_type or 'ax' in radio_type:
+        return 'reliable'
+    if 'n' in radio_type:
+        return 'decent'
+    return 'slow'
+
+
+def rate_link_ratio(current: float, maximum: float) -> str:
+    """Rates a link by how close its current rate (or link quality) is to the maximum."""
+    if current >= 0.8 * maximum:
+        return 'reliable'
+    if current >= 0.5 * maximum:
+        return 'decent'
+    return 'slow'
+
+
+def rate_channel(channel: int) -> str:
+    # Other channels might be more congested
+    return 'reliable' if channel in UNCONGESTED_CHANNELS else 'decent'
+
+
+def score_wifi_details(signal_quality: str, signal_value: Any, link_quality: str, link_value: Any, channel: int) -> dict:
+    """Combines the per-aspect assessments of a platform backend into the tool's result."""
+    channel_quality = rate_channel(channel)
+
+    overall_score = (0.6 * QUALITY_SCORES[signal_quality] + 0.3 * QUALITY_SCORES[link_quality]
+                     + 0.1 * QUALITY_SCORES[channel_quality])
+    if overall_score > 2.5:
+        overall_quality = 'reliable'
+    elif overall_score > 1.5:
+        overall_quality = 'decent'
+    else:
+        overall_quality = 'slow'
+
+    return {
+        "details": {
+            "signal": {"quality": signal_quality, "value": signal_value},
+            "link": {"quality": link_quality, "value": link_value},
+            "channel": {"quality": channel_quality, "value": channel},
+            "overall": overall_quality,
+        }
+    }
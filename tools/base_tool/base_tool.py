@@ -1,14 +1,55 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import ClassVar, Optional, Sequence
+
+from tools.tags import Tag
+from tools.tool_scope import ToolScope
+from tools.tool_type import ToolType
+
+
+class InvalidArgumentsError(TypeError):
+    """Arguments that do not match the tool's execute signature or that execute rejects.
+
+    Tools raise it for argument values they do not accept, so the failure is not counted against the probe.
+    """
+
 
 class BaseTool(ABC):
-    def __init__(self, name, description, tool_type, icon, tags=None, ):
-        self.name = name
-        self.description = description
-        self.tool_type = tool_type
-        self.icon = icon
-        self.tags = tags
-        
+    # Static metadata, declared on the class so the toolbox can catalog tools without instantiating them
+    name: ClassVar[str]
+    description: ClassVar[str]
+    tool_type: ClassVar[ToolType]
+    icon: ClassVar[str]
+    tags: ClassVar[Sequence[Tag]] = ()
+
+    # Seconds a result may be served from the toolbox cache, 0 disables caching
+    cache_ttl: float = 0
+
+    # Seconds an execution may take before it fails, None uses the toolbox default
+    execute_timeout: ClassVar[Optional[float]] = None
+    # Consecutive failed executions that open the tool's circuit breaker, and seconds it then stays open
+    breaker_threshold: ClassVar[int] = 3
+    breaker_cooldown: ClassVar[float] = 30.0
+
+    # Executions of the tool allowed to run at the same time, None for no limit. A synchronous execute
+    # runs on the toolbox's thread pool, an async one on the event loop.
+    max_concurrency: ClassVar[Optional[int]] = None
+
+    # How the toolbox manages instances: one shared instance, a pool of pool_size, or one per call
+    scope: ClassVar[ToolScope] = ToolScope.SINGLETON
+    pool_size: ClassVar[int] = 4
+
+    async def startup(self):
+        """Opens long-lived resources, called once before the instance is first used."""
+        pass
+
+    async def shutdown(self):
+        """Releases the resources opened in startup."""
+        pass
+
+    @classmethod
+    def get_cache_ttl(cls, *args, **kwargs) -> float:
+        """Returns the cache TTL for an execution with the given arguments."""
+        return cls.cache_ttl
 
     @abstractmethod
     def execute(self, *args, **kwargs):
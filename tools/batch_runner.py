@@ -0,0 +1,64 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from .circuit_breaker import CircuitOpenError
+from .toolbox import Toolbox
+
+
+async def _run_item(toolbox: Toolbox, index: int, tool_name: str, args: Dict[str, Any],
+                    timeout: Optional[float], use_cache: bool) -> dict:
+    started = time.monotonic()
+    result = {"index": index, "tool": tool_name}
+
+    try:
+        args = toolbox.bind_arguments(tool_name, args)
+        message = await asyncio.wait_for(toolbox.execute_tool(tool_name, use_cache=use_cache, **args), timeout)
+        result.update(success=True, message=message)
+    except asyncio.TimeoutError:
+        result.update(success=False, message=f"Timed out after {timeout:.3g}s")
+    except CircuitOpenError as e:
+        if e.has_last_good:
+            result.update(success=True, message=e.last_good, stale=True, age=e.age)
+        else:
+            result.update(success=False, message=str(e))
+    except KeyError:
+        result.update(success=False, message=f"Tool '{tool_name}' not found")
+    except Exception as e:
+        result.update(success=False, message=str(e))
+
+    result["elapsed"] = time.monotonic() - started
+    return result
+
+
+async def iter_batch(toolbox: Toolbox, items: Sequence[dict], timeout: Optional[float] = None,
+                     use_cache: bool = True) -> AsyncIterator[dict]:
+    """Runs tool executions concurrently and yields each result as it completes.
+
+    Each item is a dict with "tool", optional "args" and an optional per-item "timeout". Items never
+    outlive the batch timeout; one that fails or times out is reported in its own result.
+    """
+    tasks = []
+    for index, item in enumerate(items):
+        item_timeout = item.get("timeout")
+        if timeout is not None:
+            item_timeout = timeout if item_timeout is None else min(item_timeout, timeout)
+
+        tasks.append(asyncio.create_task(
+            _run_item(toolbox, index, item["tool"], item.get("args") or {}, item_timeout, use_cache)
+        ))
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # A client that stops reading a streamed batch must not leave executions behind
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(toolbox: Toolbox, items: Sequence[dict], timeout: Optional[float] = None,
+                    use_cache: bool = True) -> List[dict]:
+    """Runs tool executions concurrently and returns their results in request order."""
+    results = [result async for result in iter_batch(toolbox, items, timeout, use_cache)]
+    return sorted(results, key=lambda result: result["index"])
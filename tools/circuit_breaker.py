@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Hashable, Optional
+
+# Last-known-good results kept per tool, one per distinct set of arguments
+MAX_LAST_GOOD = 32
+
+
+class BreakerState(Enum):
+    # Executions run normally
+    CLOSED = "closed"
+    # The tool kept failing, executions are refused until the cool-down has passed
+    OPEN = "open"
+    # The cool-down has passed and one trial execution decides whether to close again
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of executing a tool whose breaker is open.
+
+    Carries the last-known-good result for the same arguments and its age in seconds, both None if
+    the tool never succeeded with them.
+    """
+
+    def __init__(self, tool_name: str, retry_in: float, last_good: Any = None, age: Optional[float] = None):
+        super().__init__(f"Tool '{tool_name}' is failing, retrying in {retry_in:.0f}s")
+        self.tool_name = tool_name
+        self.retry_in = retry_in
+        self.last_good = last_good
+        self.age = age
+
+    @property
+    def has_last_good(self) -> bool:
+        return self.age is not None
+
+
+class CircuitBreaker:
+    """Stops executing a tool after failure_threshold consecutive failures, for cooldown seconds."""
+
+    def __init__(self, tool_name: str, failure_threshold: int, cooldown: float):
+        self.tool_name = tool_name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.times_opened = 0
+        self._trial_running = False
+        # Argument key -> (result, monotonic time of the execution)
+        self._last_good: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def before_call(self, key: Optional[Hashable]):
+        """Raises CircuitOpenError unless an execution may run now."""
+        if self.state is BreakerState.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = BreakerState.HALF_OPEN
+
+        if self.state is BreakerState.CLOSED:
+            return
+        if self.state is BreakerState.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return
+
+        last_good, age = None, None
+        if key in self._last_good:
+            last_good, finished_at = self._last_good[key]
+            age = time.monotonic() - finished_at
+        raise CircuitOpenError(self.tool_name, self.retry_in(), last_good, age)
+
+    def record_success(self, key: Optional[Hashable], result: Any):
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._trial_running = False
+        if key is not None:
+            self._last_good[key] = (result, time.monotonic())
+            self._last_good.move_to_end(key)
+            if len(self._last_good) > MAX_LAST_GOOD:
+                self._last_good.popitem(last=False)
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.last_error = error
+        if self.state is BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state is not BreakerState.OPEN:
+                self.times_opened += 1
+            self.state = BreakerState.OPEN
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def release_trial(self):
+        # A trial that ended without a verdict, e.g. a cancelled request, lets the next caller try
+        self._trial_running = False
+
+    def retry_in(self) -> float:
+        if self.state is not BreakerState.OPEN:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def status(self) -> dict:
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "cooldown": self.cooldown,
+            "retry_in": self.retry_in(),
+            "times_opened": self.times_opened,
+            "last_error": self.last_error,
+            "last_good_results": len(self._last_good),
+        }
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import weakref
+from typing import Sequence, Union
+
+from metrics import SUBPROCESS_SECONDS, SUBPROCESS_TIMEOUTS
+
+# Default per-command timeout in seconds
+DEFAULT_TIMEOUT = 10.0
+
+# Upper bound on the number of probe processes running at the same time
+MAX_CONCURRENT_PROCESSES = 8
+
+_process_slots = weakref.WeakKeyDictionary()
+
+if sys.platform == "win32":
+    _SPAWN_KWARGS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    # A dedicated session lets us kill shell pipelines together with their children
+    _SPAWN_KWARGS = {"start_new_session": True}
+
+
+def _get_process_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _process_slots.get(loop)
+    if slots is None:
+        slots = _process_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_PROCESSES)
+    return slots
+
+
+async def run_command(
+    command: Union[str, Sequence[str]],
+    *,
+    timeout: float = DEFAULT_TIMEOUT,
+    check: bool = True,
+    encoding: str = "utf-8",
+) -> subprocess.CompletedProcess:
+    """Runs a command without blocking the event loop.
+
+    A string is run through the shell, a sequence is executed directly. The process (and
+    anything it spawned) is killed when the timeout expires or the calling task is cancelled.
+    Raises subprocess.TimeoutExpired on timeout and, when check is set,
+    subprocess.CalledProcessError on a non-zero exit code.
+    """
+    # Labelled by executable only, so metrics stay low-cardinality whatever the arguments are
+    program = os.path.basename((command.split() or [""])[0] if isinstance(command, str) else command[0])
+
+    async with _get_process_slots():
+        started = time.perf_counter()
+        if isinstance(command, str):
+            process = await asyncio.create_subprocess_shell(
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_SPAWN_KWARGS
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_SPAWN_KWARGS
+            )
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            await _kill_process_tree(process)
+            SUBPROCESS_TIMEOUTS.inc(command=program)
+            raise subprocess.TimeoutExpired(command, timeout)
+        except asyncio.CancelledError:
+            await _kill_process_tree(process)
+            raise
+        finally:
+            SUBPROCESS_SECONDS.observe(time.perf_counter() - started, command=program)
+
+    stdout = stdout.decode(encoding, errors="replace")
+    stderr = stderr.decode(encoding, errors="replace")
+
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+async def _kill_process_tree(process: asyncio.subprocess.Process):
+    if process.returncode is not None:
+        return
+
+    try:
+        if sys.platform == "win32":
+            killer = await asyncio.create_subprocess_exec(
+                "taskkill", "/F", "/T", "/PID", str(process.pid),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            await killer.wait()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+    await process.wait()
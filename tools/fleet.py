@@ -0,0 +1,327 @@
+"""Fleet aggregator: a fleet-wide, indexed view of the tool state of many agent instances.
+
+Each agent is followed over its Server-Sent Events stream (/tools/stream) on one pooled keep-alive
+httpx client. Every update lands in a FleetIndex that answers queries by tool, tag and status field
+(e.g. is_connected == False) without contacting the agents. Tools that cannot be monitored are fetched
+on demand with refresh(), which calls the agents' execute endpoints with bounded concurrency.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from fast_json import dumps_text, loads
+from .tags import Tag
+from .tool_catalog import _parse_enum
+from .tool_manifest import ToolSpec, load_manifest
+from .tool_type import ToolType
+
+logger = logging.getLogger(__name__)
+
+# Connections opened or requests sent to agents at the same time
+MAX_CONCURRENCY = 64
+
+# Seconds to connect to an agent or to answer one request
+AGENT_TIMEOUT = 5.0
+
+# Seconds without any data, keep-alive comments included, before an agent's stream counts as dead.
+# Agents send a keep-alive every 15 seconds.
+STREAM_TIMEOUT = 45.0
+
+# Bounds in seconds of the backoff between reconnect attempts to an agent
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+
+def parse_agents(value: str) -> Dict[str, str]:
+    """Parses a comma-separated list of agent base URLs, each optionally prefixed with "name=".
+
+    Agents without a name are named after the host and port of their URL.
+    """
+    agents = {}
+    for entry in value.replace("\n", ",").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, separator, url = entry.partition("=")
+        if not separator or "://" in name:
+            name, url = "", entry
+        url = url.rstrip("/")
+        agents[name or urlsplit(url).netloc] = url
+    return agents
+
+
+def parse_filter_value(raw: str) -> Any:
+    """Converts a status filter from the query string to the JSON value it is compared with."""
+    lowered = raw.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered == "null":
+        return None
+    return raw
+
+
+class AgentState:
+    """Connection status of one agent."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.connected = False
+        self.connects = 0
+        self.last_seen: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # Tools the agent rejected on its stream, with the reason
+        self.tool_errors: Dict[str, str] = {}
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "connected": self.connected,
+            "connects": self.connects,
+            "seconds_since_last_seen": None if self.last_seen is None else time.monotonic() - self.last_seen,
+            "last_error": self.last_error,
+            "tool_errors": self.tool_errors,
+        }
+
+
+class FleetIndex:
+    """Latest state per agent and tool, indexed by tool, tag and top-level status field.
+
+    States of an agent whose stream dropped are kept, marked stale, until the agent reports them again.
+    """
+
+    def __init__(self, specs: Sequence[ToolSpec]):
+        self._states: Dict[Tuple[str, str], dict] = {}
+        self._by_tool: Dict[str, Set[str]] = {}
+        self._by_agent: Dict[str, Set[str]] = {}
+        # (tool, field, value) -> agents, for the top-level bool and string fields of a tool's state
+        self._by_field: Dict[Tuple[str, str, Any], Set[str]] = {}
+        self._tools_by_tag: Dict[Tag, Set[str]] = {}
+        for spec in specs:
+            for tag in spec.tags:
+                self._tools_by_tag.setdefault(tag, set()).add(spec.tool_name)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @staticmethod
+    def _fields(data: Any) -> Iterable[Tuple[str, Any]]:
+        if isinstance(data, dict):
+            for field, value in data.items():
+                if value is None or isinstance(value, (bool, str)):
+                    yield field, value
+
+    def update(self, agent: str, tool: str, data: Any):
+        entry = self._states.get((agent, tool))
+        if entry is not None:
+            self._unindex_fields(agent, tool, entry["data"])
+
+        self._states[(agent, tool)] = {"agent": agent, "tool": tool, "data": data, "updated_at": time.time(), "stale": False}
+        self._by_tool.setdefault(tool, set()).add(agent)
+        self._by_agent.setdefault(agent, set()).add(tool)
+        for field, value in self._fields(data):
+            self._by_field.setdefault((tool, field, value), set()).add(agent)
+
+    def mark_stale(self, agent: str):
+        """Marks every state of an agent as stale, e.g. after its stream dropped."""
+        for tool in self._by_agent.get(agent, ()):
+            self._states[(agent, tool)]["stale"] = True
+
+    def _unindex_fields(self, agent: str, tool: str, data: Any):
+        for field, value in self._fields(data):
+            agents = self._by_field.get((tool, field, value))
+            if agents is not None:
+                agents.discard(agent)
+                if not agents:
+                    del self._by_field[(tool, field, value)]
+
+    def query(self, tool: Optional[str] = None, tag: Optional[str] = None, agent: Optional[str] = None,
+              filters: Optional[Dict[str, Any]] = None) -> List[dict]:
+        """Returns the state entries matching every given filter, ordered by tool and agent.
+
+        filters compares top-level fields of the state, e.g. {"is_connected": False}. Raises ValueError
+        for an unknown tag.
+        """
+        tools = set(self._by_tool) if tool is None else {tool}
+        if tag is not None:
+            tools &= self._tools_by_tag.get(_parse_enum(Tag, tag), set())
+
+        results = []
+        for tool_name in sorted(tools):
+            agents = self._by_tool.get(tool_name, set())
+            if agent is not None:
+                agents = agents & {agent}
+            for field, value in (filters or {}).items():
+                agents = agents & self._by_field.get((tool_name, field, value), set())
+            results.extend(self._states[(agent_name, tool_name)] for agent_name in sorted(agents))
+        return results
+
+    def summary(self) -> Dict[str, dict]:
+        """Returns, per tool, how many agents report it, how many of those are stale and how many report each
+        status field value."""
+        summary = {
+            tool: {"agents": len(agents), "stale": sum(self._states[(agent, tool)]["stale"] for agent in agents), "fields": {}}
+            for tool, agents in self._by_tool.items() if agents
+        }
+        for (tool, field, value), agents in self._by_field.items():
+            counts = summary[tool]["fields"].setdefault(field, {})
+            # Keyed like the query string filters, e.g. "false" for False
+            key = value if isinstance(value, str) else dumps_text(value)
+            counts[key] = len(agents)
+        return summary
+
+
+class FleetAggregator:
+    """Follows the monitor streams of a list of agents and keeps their tool states in a FleetIndex.
+
+    transport is handed to the httpx client, so the agents can be stand-ins served in-process.
+    """
+
+    def __init__(self, agents: Dict[str, str], tools: Optional[Sequence[str]] = None,
+                 max_concurrency: int = MAX_CONCURRENCY, timeout: float = AGENT_TIMEOUT,
+                 stream_timeout: float = STREAM_TIMEOUT, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 specs: Optional[Sequence[ToolSpec]] = None):
+        specs = load_manifest() if specs is None else specs
+        # The monitored tools are the auto-enabled ones, the rest are only fetched on refresh()
+        self.tools = list(tools) if tools else [spec.tool_name for spec in specs if spec.tool_type is ToolType.AUTO_ENABLED]
+        self.agents = {name: AgentState(name, url) for name, url in agents.items()}
+        self.index = FleetIndex(specs)
+        self.timeout = timeout
+        self.stream_timeout = stream_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # Every stream holds one connection for its lifetime, on-demand requests share what is left
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(timeout, read=stream_timeout),
+            limits=httpx.Limits(max_connections=len(agents) + max_concurrency,
+                                max_keepalive_connections=len(agents) + max_concurrency),
+        )
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(self):
+        for name in self.agents:
+            self._tasks[name] = asyncio.create_task(self._follow(self.agents[name]))
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.client.aclose()
+
+    def agent_status(self) -> List[dict]:
+        return [agent.status() for agent in self.agents.values()]
+
+    def status(self) -> dict:
+        agents = self.agents.values()
+        return {
+            "total_agents": len(self.agents),
+            "connected_agents": sum(agent.connected for agent in agents),
+            "tools": self.tools,
+            "states": len(self.index),
+        }
+
+    async def refresh(self, tool_name: str, agents: Optional[Sequence[str]] = None) -> Dict[str, Optional[str]]:
+        """Executes a tool on the given (default: all) agents and indexes the results.
+
+        Returns the error per agent, None for agents that answered. Raises KeyError for unknown agents.
+        """
+        targets = [self.agents[name] for name in (agents or self.agents)]
+        results = await asyncio.gather(*(self._refresh_one(agent, tool_name) for agent in targets))
+        return {agent.name: error for agent, error in zip(targets, results)}
+
+    async def _refresh_one(self, agent: AgentState, tool_name: str) -> Optional[str]:
+        try:
+            async with self._slots:
+                response = await self.client.get(f"{agent.url}/tools/{tool_name}/execute", timeout=self.timeout)
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            return str(e) or type(e).__name__
+
+        if not isinstance(body, dict) or not body.get("success"):
+            return body.get("message", "Request failed") if isinstance(body, dict) else "Request failed"
+        self.index.update(agent.name, tool_name, body["message"])
+        return None
+
+    async def _follow(self, agent: AgentState):
+        attempts = 0
+        while True:
+            try:
+                await self._stream(agent)
+                agent.last_error = "Stream ended"
+            except asyncio.CancelledError:
+                raise
+            except (httpx.HTTPError, ValueError) as e:
+                agent.last_error = str(e) or type(e).__name__
+                logger.debug("Stream of agent %s failed: %s", agent.name, agent.last_error)
+            except Exception as e:
+                # Anything else must not end the follow task, the agent would never be reconnected
+                agent.last_error = str(e) or type(e).__name__
+                logger.warning("Stream of agent %s failed", agent.name, exc_info=True)
+            finally:
+                if agent.connected:
+                    attempts = 0
+                    self.index.mark_stale(agent.name)
+                agent.connected = False
+
+            attempts += 1
+            delay = min(RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2 ** (attempts - 1))
+            # Jittered so agents that went away together do not all come back in the same instant
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _stream(self, agent: AgentState):
+        request = self.client.build_request("GET", f"{agent.url}/tools/stream", params=[("tools", tool) for tool in self.tools])
+        # The slot only covers connecting, an established stream does not hold one
+        async with self._slots:
+            response = await self.client.send(request, stream=True)
+
+        try:
+            response.raise_for_status()
+            agent.connected = True
+            agent.connects += 1
+            agent.last_seen = time.monotonic()
+            agent.last_error = None
+
+            event, data = "message", []
+            async for line in response.aiter_lines():
+                agent.last_seen = time.monotonic()
+                if line.startswith(":"):
+                    # Keep-alive comment
+                    continue
+                if line:
+                    field, _, value = line.partition(":")
+                    if field == "event":
+                        event = value.strip()
+                    elif field == "data":
+                        data.append(value[1:] if value.startswith(" ") else value)
+                    continue
+
+                if data:
+                    try:
+                        message = loads("\n".join(data))
+                    except ValueError:
+                        logger.debug("Skipping an event of agent %s that is not JSON", agent.name)
+                    else:
+                        self._handle_event(agent, event, message)
+                event, data = "message", []
+        finally:
+            await response.aclose()
+
+    def _handle_event(self, agent: AgentState, event: str, message: Any):
+        tool_name = message.get("tool") if isinstance(message, dict) else None
+        if not isinstance(tool_name, str):
+            logger.debug("Skipping an event of agent %s without a tool: %r", agent.name, message)
+            return
+
+        if event == "error" or "error" in message:
+            agent.tool_errors[tool_name] = message.get("error")
+        else:
+            agent.tool_errors.pop(tool_name, None)
+            self.index.update(agent.name, tool_name, message.get("data"))
@@ -0,0 +1,224 @@
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rows kept per tool unless configured otherwise
+DEFAULT_CAPACITY = int(os.environ.get("TOOL_HISTORY_SIZE", "4096"))
+
+# Directory the ring buffers are memory-mapped from, in memory only when unset
+DEFAULT_DIRECTORY = os.environ.get("TOOL_HISTORY_DIR")
+
+AGGREGATIONS = ("mean", "min", "max", "last")
+
+# magic, columns per row, capacity, index of the next row to write, rows written, hash of the field names
+_HEADER = struct.Struct("<8sIIQQ16s")
+_MAGIC = b"TOOLHIST"
+_ROW_ITEM = struct.calcsize("d")
+
+
+def _lock_file(file, size: int) -> bool:
+    """Takes an exclusive lock on an open history file without blocking, returning whether it got it.
+
+    The lock lasts until the file is closed, so only one series, in this process or another, maps the file.
+    """
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            # Windows byte-range locks are mandatory, so lock a byte past the rows instead of the rows themselves
+            file.seek(size)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def extract_value(state, path: str) -> float:
+    """Reads the number at a dotted path in a state.
+
+    Booleans become 0 or 1, dicts and lists their length (e.g. the number of adapters) and anything
+    missing or non-numeric NaN.
+    """
+    value = state
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return math.nan
+        value = value[key]
+
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (dict, list, tuple)):
+        return float(len(value))
+    return math.nan
+
+
+class HistorySeries:
+    """Fixed-size ring buffer of timestamped numeric samples for one tool.
+
+    Rows are stored as packed doubles (timestamp followed by one column per field) in a bytearray,
+    or in a memory-mapped file when a path is given so the history survives restarts. A file another
+    series already holds, e.g. in a second worker process, is left alone and the history is kept in memory.
+    """
+
+    def __init__(self, fields: Mapping[str, str], capacity: int = DEFAULT_CAPACITY, path: Optional[str] = None):
+        self.fields = dict(fields)
+        self.capacity = capacity
+        self.path = path
+        self.columns = len(self.fields) + 1
+        self._fingerprint = hashlib.blake2b("\0".join(self.fields).encode(), digest_size=16).digest()
+
+        size = _HEADER.size + capacity * self.columns * _ROW_ITEM
+        self._file = None
+        if path is not None:
+            # Opened without truncating, the file may still be mapped by whoever holds the lock
+            self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)), "r+b")
+            if not _lock_file(self._file, size):
+                logger.warning("History file %s is in use by another process or hub, keeping this history in memory", path)
+                self._file.close()
+                self._file = None
+                self.path = None
+
+        if self._file is None:
+            self._buffer = bytearray(size)
+        else:
+            if os.path.getsize(path) != size:
+                self._file.truncate(size)
+            self._buffer = mmap.mmap(self._file.fileno(), size)
+
+        self._rows = memoryview(self._buffer)[_HEADER.size:].cast("d")
+        self._head, self._count = self._read_header()
+
+    def _read_header(self):
+        magic, columns, capacity, head, count, fingerprint = _HEADER.unpack_from(self._buffer)
+        if (magic, columns, capacity, fingerprint) == (_MAGIC, self.columns, self.capacity, self._fingerprint):
+            return head, count
+        if magic == _MAGIC:
+            logger.info("Discarding history in %s, its layout does not match the tool's fields", self.path)
+        self._write_header(0, 0)
+        return 0, 0
+
+    def _write_header(self, head: int, count: int):
+        _HEADER.pack_into(self._buffer, 0, _MAGIC, self.columns, self.capacity, head, count, self._fingerprint)
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def record(self, state, timestamp: Optional[float] = None):
+        """Appends one sample taken from a published state, overwriting the oldest row when full."""
+        offset = self._head * self.columns
+        self._rows[offset] = time.time() if timestamp is None else timestamp
+        for column, path in enumerate(self.fields.values(), start=1):
+            self._rows[offset + column] = extract_value(state, path)
+
+        # The header is updated last so a crash mid-write never exposes a half-written row
+        self._head = (self._head + 1) % self.capacity
+        self._count += 1
+        self._write_header(self._head, self._count)
+
+    def rows(self, start: Optional[float] = None, end: Optional[float] = None):
+        """Yields (timestamp, values) rows from oldest to newest, optionally limited to a time range."""
+        size = len(self)
+        first = (self._head - size) % self.capacity
+        for index in range(size):
+            offset = (first + index) % self.capacity * self.columns
+            timestamp = self._rows[offset]
+            if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+                continue
+            yield timestamp, self._rows[offset + 1:offset + self.columns].tolist()
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, step: Optional[float] = None,
+              aggregation: str = "mean") -> dict:
+        """Returns the samples in a time range as columns, downsampled to one point per step seconds."""
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{aggregation}', expected one of {', '.join(AGGREGATIONS)}")
+        if step is not None and step <= 0:
+            raise ValueError("step must be positive")
+
+        timestamps: List[float] = []
+        columns: List[List[float]] = [[] for _ in self.fields]
+
+        if step is None:
+            for timestamp, values in self.rows(start, end):
+                timestamps.append(timestamp)
+                for column, value in zip(columns, values):
+                    column.append(value)
+        else:
+            buckets: Dict[float, List[List[float]]] = {}
+            for timestamp, values in self.rows(start, end):
+                bucket = buckets.setdefault(timestamp // step * step, [[] for _ in self.fields])
+                for samples, value in zip(bucket, values):
+                    if not math.isnan(value):
+                        samples.append(value)
+
+            for bucket_start in sorted(buckets):
+                timestamps.append(bucket_start)
+                for column, samples in zip(columns, buckets[bucket_start]):
+                    column.append(_aggregate(samples, aggregation))
+
+        return {
+            "timestamps": timestamps,
+            # NaN is not valid JSON, so gaps are reported as null
+            "fields": {name: [None if math.isnan(value) else value for value in column]
+                       for name, column in zip(self.fields, columns)},
+        }
+
+    def close(self):
+        self._rows.release()
+        if self._file is not None:
+            self._buffer.flush()
+            self._buffer.close()
+            self._file.close()
+
+
+def _aggregate(samples: List[float], aggregation: str) -> float:
+    if not samples:
+        return math.nan
+    if aggregation == "min":
+        return min(samples)
+    if aggregation == "max":
+        return max(samples)
+    if aggregation == "last":
+        return samples[-1]
+    return math.fsum(samples) / len(samples)
+
+
+class HistoryStore:
+    """Creates and keeps the history series of every tool that declares history_fields."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, directory: Optional[str] = DEFAULT_DIRECTORY):
+        self.capacity = capacity
+        self.directory = directory
+        self._series: Dict[str, HistorySeries] = {}
+
+    def series(self, tool_name: str, fields: Mapping[str, str]) -> Optional[HistorySeries]:
+        """Returns the tool's series, opening it on first use, or None if the tool records no fields."""
+        if not fields:
+            return None
+
+        series = self._series.get(tool_name)
+        if series is None:
+            path = None
+            if self.directory is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"{tool_name}.history")
+            series = self._series[tool_name] = HistorySeries(fields, self.capacity, path)
+        return series
+
+    def close(self):
+        for series in self._series.values():
+            series.close()
+        self._series.clear()
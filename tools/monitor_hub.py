@@ -0,0 +1,257 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from metrics import OBSERVERS_REAPED
+from observable import Observable, Observer, QueueObserver
+from .history_store import HistoryStore
+from .polling_scheduler import PollingScheduler
+from .toolbox import Toolbox
+
+logger = logging.getLogger(__name__)
+
+
+class MonitorHub:
+    """Monitors each subscribed tool once and shares its updates between all of its subscribers.
+
+    Polling is handed to the central scheduler; tools that can push changes themselves additionally get
+    their monitor_status task. While anything is monitored, a reaper detaches subscribers whose client
+    stopped answering heartbeats or whose send has been stuck for send_timeout seconds, so monitors only
+    run for clients that are actually connected.
+    """
+
+    # Seconds between reaper passes
+    reap_interval = 5.0
+    # Seconds one update may take to send before the subscriber is considered gone
+    send_timeout = float(os.environ.get("WS_SEND_TIMEOUT", "30"))
+
+    def __init__(self, toolbox: Toolbox, scheduler: PollingScheduler = None, history: HistoryStore = None):
+        self.toolbox = toolbox
+        self.scheduler = scheduler or PollingScheduler()
+        self.history = history or HistoryStore()
+        # SharedStateClient of a shared-state worker, which relays the leader's monitors instead of running them
+        self.remote = None
+        self._instances: Dict[str, Observable] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self.reaped = Counter()
+
+    async def subscribe(self, tool_name: str, observer: Observer):
+        """Attaches an observer to the tool's shared monitor, starting the monitor if needed."""
+        async with self._locks.setdefault(tool_name, asyncio.Lock()):
+            instance = self._instances.get(tool_name)
+            if instance is None:
+                tool_class = self.toolbox.get_tool(tool_name)
+                if not issubclass(tool_class, Observable):
+                    raise TypeError(f"Tool '{tool_name}' is not observable")
+
+                if self.remote is not None:
+                    # The leader records the history of every poll, relayed updates are only the changes
+                    instance = self.remote.observe(tool_name, tool_class)
+                    self._instances[tool_name] = instance
+                else:
+                    # The instance stays acquired from the toolbox for as long as anyone is subscribed
+                    instance = await self.toolbox.acquire_tool(tool_name)
+                    self._instances[tool_name] = instance
+
+                    # A shared instance may still hold the state of an earlier monitoring session
+                    instance.latest_state = None
+                    instance.history = self.history.series(tool_name, instance.history_fields)
+                    self.scheduler.add(tool_name, instance)
+
+        # Overflow and failed updates detach observers through unsubscribe, so an unwatched monitor stops
+        instance.on_detach = functools.partial(self.unsubscribe, tool_name)
+        instance.add_observer(observer)
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+        if tool_name not in self._tasks and self._pushes_changes(instance):
+            self._tasks[tool_name] = asyncio.create_task(self._run_monitor(tool_name, instance))
+
+        # The monitor only publishes changes, so prime late subscribers with the current state
+        instance.prime(observer)
+
+    def prime(self, tool_name: str, observer: Observer):
+        """Queues the tool's latest state for a subscribed observer again."""
+        instance = self._instances.get(tool_name)
+        if instance is not None:
+            instance.prime(observer)
+
+    def unsubscribe(self, tool_name: str, observer: Observer):
+        """Detaches an observer and stops the tool's monitor once nobody is listening."""
+        instance = self._instances.get(tool_name)
+        if instance is None:
+            return
+
+        instance.remove_observer(observer)
+
+        if not instance.has_observers():
+            del self._instances[tool_name]
+            instance.history = None
+            instance.on_detach = None
+            if self.remote is not None:
+                self.remote.unobserve(tool_name)
+                return
+
+            self.scheduler.remove(tool_name)
+            task = self._tasks.pop(tool_name, None)
+            if task is not None:
+                task.cancel()
+            asyncio.get_running_loop().create_task(self.toolbox.release_tool(tool_name, instance))
+
+    async def query_history(self, tool_name: str, start: Optional[float] = None, end: Optional[float] = None,
+                            step: Optional[float] = None, aggregation: str = "mean") -> Optional[dict]:
+        """Returns a tool's recorded history as HistorySeries.query does, or None if the tool records none.
+
+        Raises KeyError for unknown tools and ValueError for an invalid step or aggregation. Shared-state
+        workers ask the leader, whose hub is the one recording.
+        """
+        if self.remote is not None:
+            return await self.remote.query_history(tool_name, start, end, step, aggregation)
+
+        tool_class = self.toolbox.get_tool(tool_name)
+        series = self.history.series(tool_name, getattr(tool_class, "history_fields", None))
+        if series is None:
+            return None
+        return series.query(start, end, step, aggregation)
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        """Returns the number of subscribers per monitored tool."""
+        return {tool_name: len(instance._observers) for tool_name, instance in self._instances.items()}
+
+    def live_counts(self) -> dict:
+        """Returns how many monitors are running and how many subscribers they serve."""
+        counts = self.subscriber_counts()
+        return {
+            "monitored_tools": len(self._instances),
+            "monitor_tasks": len(self._tasks),
+            "polled_tools": len(self.scheduler),
+            "subscribers": sum(counts.values()),
+            "subscribers_per_tool": counts,
+            "reaped": dict(self.reaped),
+        }
+
+    def reap_idle(self) -> int:
+        """Detaches and closes idle subscribers, returning how many were reaped."""
+        now = time.monotonic()
+        reaped = 0
+        for tool_name, instance in list(self._instances.items()):
+            for observer, reason in instance.idle_observers(now, self.send_timeout):
+                logger.info("Reaping %s subscriber %r of tool '%s'", reason, observer, tool_name)
+                self.reaped[reason] += 1
+                OBSERVERS_REAPED.inc(tool=tool_name, reason=reason)
+                # Unsubscribing cancels a stuck delivery; the connection's own cleanup finds it already gone
+                self.unsubscribe(tool_name, observer)
+                asyncio.get_running_loop().create_task(self._close_observer(observer))
+                reaped += 1
+        return reaped
+
+    async def _close_observer(self, observer: Observer):
+        try:
+            # Closing a stalled connection can block as well
+            await asyncio.wait_for(observer.close(), self.send_timeout)
+        except Exception:
+            logger.debug("Closing reaped observer %r failed", observer, exc_info=True)
+
+    async def _reap_idle(self):
+        # Ends once nothing is monitored, the next subscribe starts it again
+        while self._instances:
+            await asyncio.sleep(self.reap_interval)
+            self.reap_idle()
+
+    def delivery_stats(self) -> Dict[str, dict]:
+        """Returns outbound queue depths and dropped, coalesced and failed delivery counters per monitored tool."""
+        return {tool_name: instance.delivery_stats() for tool_name, instance in self._instances.items()}
+
+    async def shutdown(self):
+        """Stops every running monitor and hands the monitored instances back to the toolbox."""
+        tasks = list(self._tasks.values())
+        if self._reaper is not None:
+            tasks.append(self._reaper)
+            self._reaper = None
+        instances = list(self._instances.items())
+        self._tasks.clear()
+        self._instances.clear()
+        await self.scheduler.shutdown()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for tool_name, instance in instances:
+            instance.history = None
+            instance.on_detach = None
+            if self.remote is not None:
+                self.remote.unobserve(tool_name)
+            else:
+                await self.toolbox.release_tool(tool_name, instance)
+        self.history.close()
+
+    @staticmethod
+    def _pushes_changes(instance: Observable) -> bool:
+        return type(instance).monitor_status is not Observable.monitor_status
+
+    async def _run_monitor(self, tool_name: str, instance: Observable):
+        try:
+            await instance.monitor_status()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Monitor for tool '%s' failed", tool_name)
+        finally:
+            # Let the next subscriber restart the monitor if this one ended on its own
+            if self._tasks.get(tool_name) is asyncio.current_task():
+                del self._tasks[tool_name]
+
+
+class MultiplexSubscription:
+    """A client's set of tool subscriptions, delivering tagged updates and errors through one queue."""
+
+    def __init__(self, hub: MonitorHub, queue_size: int = 64):
+        self.hub = hub
+        # Bounded so a slow client backs up into the per-tool channels, where the overflow policy applies
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._observers: Dict[str, QueueObserver] = {}
+
+    @property
+    def tool_names(self):
+        return list(self._observers)
+
+    async def subscribe(self, tool_name: str):
+        if tool_name in self._observers:
+            return
+
+        observer = QueueObserver(self.queue, tool_name, on_close=self._detached)
+        self._observers[tool_name] = observer
+        try:
+            await self.hub.subscribe(tool_name, observer)
+        except KeyError:
+            del self._observers[tool_name]
+            await self.queue.put({"tool": tool_name, "error": f"Tool '{tool_name}' not found"})
+        except TypeError:
+            del self._observers[tool_name]
+            await self.queue.put({"tool": tool_name, "error": f"Tool '{tool_name}' is not observable"})
+
+    def _detached(self, observer: QueueObserver):
+        # The client fell behind and the hub dropped the subscription, forget it so it can subscribe again
+        if self._observers.get(observer.tool_name) is not observer:
+            return
+        del self._observers[observer.tool_name]
+
+        error = {"tool": observer.tool_name, "error": "Unsubscribed because the client fell behind, subscribe again to resume"}
+        if self.queue.full():
+            # The queue is full because the client is slow, the error matters more than the oldest update
+            self.queue.get_nowait()
+        self.queue.put_nowait(error)
+
+    def unsubscribe(self, tool_name: str):
+        observer = self._observers.pop(tool_name, None)
+        if observer is not None:
+            self.hub.unsubscribe(tool_name, observer)
+
+    def close(self):
+        for tool_name in list(self._observers):
+            self.unsubscribe(tool_name)
@@ -0,0 +1,56 @@
+import struct
+from typing import Dict, Iterator, Tuple
+
+# struct nlmsghdr: length, type, flags, sequence number, port id
+NLMSG_HEADER = struct.Struct("=IHHII")
+# struct nlattr / struct rtattr: length, type
+NLA_HEADER = struct.Struct("=HH")
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+# Strips the NLA_F_NESTED and NLA_F_NET_BYTEORDER flag bits from attribute types
+NLA_TYPE_MASK = 0x3FFF
+
+
+def nl_align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def iter_messages(data: bytes) -> Iterator[Tuple[int, int, int, bytes]]:
+    """Yields (type, flags, sequence number, payload) for every netlink message in a datagram."""
+    offset = 0
+    while offset + NLMSG_HEADER.size <= len(data):
+        length, msg_type, flags, sequence, _ = NLMSG_HEADER.unpack_from(data, offset)
+        if length < NLMSG_HEADER.size:
+            break
+
+        yield msg_type, flags, sequence, data[offset + NLMSG_HEADER.size:offset + length]
+        offset += nl_align(length)
+
+
+def parse_attributes(data: bytes) -> Dict[int, bytes]:
+    """Parses a run of netlink attributes into a {type: payload} dict."""
+    attributes = {}
+    offset = 0
+    while offset + NLA_HEADER.size <= len(data):
+        length, attr_type = NLA_HEADER.unpack_from(data, offset)
+        if length < NLA_HEADER.size:
+            break
+
+        attributes[attr_type & NLA_TYPE_MASK] = data[offset + NLA_HEADER.size:offset + length]
+        offset += nl_align(length)
+    return attributes
+
+
+def attribute_string(value: bytes) -> str:
+    return value.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+
+def pack_attribute(attr_type: int, payload: bytes) -> bytes:
+    length = NLA_HEADER.size + len(payload)
+    return NLA_HEADER.pack(length, attr_type) + payload + b"\0" * (nl_align(length) - length)
+
+
+def pack_message(msg_type: int, flags: int, sequence: int, payload: bytes) -> bytes:
+    return NLMSG_HEADER.pack(NLMSG_HEADER.size + len(payload), msg_type, flags, sequence, 0) + payload
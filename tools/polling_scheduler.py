@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+from metrics import TOOL_POLL_ERRORS, TOOL_POLL_SECONDS, TOOL_STATE_CHANGES
+from observable import Observable
+
+logger = logging.getLogger(__name__)
+
+
+class PollJob:
+    """Polling state and timing statistics for one observed tool."""
+
+    def __init__(self, tool_name: str, observable: Observable):
+        self.tool_name = tool_name
+        self.observable = observable
+        self.min_interval = observable.poll_min_interval
+        self.max_interval = observable.poll_max_interval
+        self.interval = self.min_interval
+        self.next_due = time.monotonic()
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.last_poll_at: Optional[float] = None
+        self.last_change_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+
+    def timings(self) -> dict:
+        now = time.monotonic()
+        return {
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval,
+            "current_interval": self.interval,
+            "next_poll_in": None if self.running else max(0.0, self.next_due - now),
+            "polling": self.running,
+            "polls": self.polls,
+            "changes": self.changes,
+            "errors": self.errors,
+            "last_poll_duration": self.last_duration,
+            "seconds_since_last_poll": None if self.last_poll_at is None else now - self.last_poll_at,
+            "seconds_since_last_change": None if self.last_change_at is None else now - self.last_change_at,
+        }
+
+
+class PollingScheduler:
+    """Central scheduler that polls every monitored Observable with adaptive, jittered intervals.
+
+    A tool is re-polled after its minimum interval right after a change and backs off exponentially
+    up to its maximum interval while the state stays the same.
+    """
+
+    def __init__(self, backoff: float = 2.0, jitter: float = 0.1):
+        self.backoff = backoff
+        self.jitter = jitter
+        self._jobs: Dict[str, PollJob] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self._jobs
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(self, tool_name: str, observable: Observable):
+        """Starts polling a tool, with the first poll due immediately."""
+        self._jobs[tool_name] = PollJob(tool_name, observable)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def remove(self, tool_name: str):
+        """Stops polling a tool, cancelling a poll that is in progress."""
+        job = self._jobs.pop(tool_name, None)
+        if job is not None and job.task is not None:
+            job.task.cancel()
+
+    def wake(self, tool_name: str):
+        """Makes a tool's next poll due immediately, e.g. after an external change notification."""
+        job = self._jobs.get(tool_name)
+        if job is not None:
+            job.interval = job.min_interval
+            job.next_due = time.monotonic()
+            self._wakeup.set()
+
+    def timings(self) -> Dict[str, dict]:
+        return {tool_name: job.timings() for tool_name, job in self._jobs.items()}
+
+    async def shutdown(self):
+        for tool_name in list(self._jobs):
+            self.remove(tool_name)
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            # wait_for can swallow the cancellation when the wakeup fires at the same time, so wake the loop as well
+            self._wakeup.set()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self):
+        while self._task is asyncio.current_task():
+            now = time.monotonic()
+            for job in self._jobs.values():
+                if not job.running and job.next_due <= now:
+                    job.running = True
+                    job.task = asyncio.create_task(self._poll(job))
+
+            pending = [job.next_due for job in self._jobs.values() if not job.running]
+            timeout = max(0.0, min(pending) - now) if pending else None
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, job: PollJob):
+        started = time.monotonic()
+        changed = False
+        try:
+            state = await job.observable.poll_status()
+            changed = await job.observable.publish(state)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            job.errors += 1
+            TOOL_POLL_ERRORS.inc(tool=job.tool_name)
+            logger.exception("Polling tool '%s' failed", job.tool_name)
+        finally:
+            finished = time.monotonic()
+            job.polls += 1
+            job.last_poll_at = finished
+            job.last_duration = finished - started
+            TOOL_POLL_SECONDS.observe(job.last_duration, tool=job.tool_name)
+
+        if changed:
+            job.changes += 1
+            TOOL_STATE_CHANGES.inc(tool=job.tool_name)
+            job.last_change_at = finished
+            job.interval = job.min_interval
+        else:
+            job.interval = min(job.interval * self.backoff, job.max_interval)
+
+        # Spread wakeups so tools with the same interval do not all poll at once
+        job.next_due = finished + job.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        job.running = False
+        job.task = None
+        self._wakeup.set()
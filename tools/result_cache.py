@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class ResultCache:
+    """Bounded TTL cache for tool results that coalesces concurrent executions of the same key."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(tool_name: str, args: tuple, kwargs: dict) -> Hashable:
+        """Builds a cache key from a tool name and its arguments, raising TypeError if they are unhashable."""
+        key = (tool_name, tuple(args), tuple(sorted(kwargs.items())))
+        hash(key)
+        return key
+
+    async def get_or_execute(self, key: Hashable, ttl: float, execute: Callable[[], Awaitable[Any]]):
+        """Returns a fresh cached value for key, joining or starting a single shared execution otherwise."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(execute())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._on_done(key, ttl, done))
+
+        # Shield the shared execution so one caller going away does not cancel it for the others
+        return await asyncio.shield(future)
+
+    def store(self, key: Hashable, ttl: float, value: Any):
+        """Stores a value for key, evicting the least recently used entries beyond max_entries."""
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+        }
+
+    def _on_done(self, key: Hashable, ttl: float, future: asyncio.Future):
+        self._in_flight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.store(key, ttl, future.result())
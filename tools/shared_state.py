@@ -0,0 +1,392 @@
+"""Shared state between the workers of a multi-worker deployment.
+
+Every worker competes for a file lock in a shared directory. The holder starts a SharedStateServer, a
+private Toolbox and MonitorHub behind a Unix socket that runs every probe once. All workers, the leader
+included, talk to it through a SharedStateClient: executes are forwarded to it and monitored tools are
+relayed into local RemoteObservables. When the leader exits, the next worker to take the lock starts
+serving and the clients reconnect.
+
+History is recorded by the leader's hub only, workers query it through the same connection.
+
+Run ``python -m tools.shared_state DIRECTORY`` to host the server in a sidecar instead of a worker.
+The mode relies on fcntl locks and Unix sockets, so it is only available on POSIX systems.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import sys
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:
+    raise ImportError(
+        "The shared-state mode (TOOLBOX_SHARED_STATE_DIR) needs fcntl locks and Unix sockets and is only "
+        "supported on POSIX systems"
+    ) from None
+
+from fast_json import dumps, loads
+from observable import Observable, Observer
+from .base_tool.base_tool import InvalidArgumentsError
+from .circuit_breaker import CircuitOpenError
+from .monitor_hub import MonitorHub
+from .toolbox import Toolbox
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILE = "leader.lock"
+SOCKET_FILE = "leader.sock"
+
+# Upper bound on one JSON line, i.e. one result or state update
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# Seconds between attempts to take over leadership
+ELECTION_INTERVAL = 1.0
+
+# Seconds a request waits for the connection to the leader to be (re-)established
+CONNECT_TIMEOUT = 5.0
+
+
+class RemoteToolError(Exception):
+    """An execute that failed in the leader process."""
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict):
+    writer.write(dumps(message) + b"\n")
+    await writer.drain()
+
+
+class _ConnectionObserver(Observer):
+    """Forwards one tool's updates from the leader's hub to a connected worker."""
+
+    def __init__(self, writer: asyncio.StreamWriter, tool_name: str):
+        self.writer = writer
+        self.tool_name = tool_name
+
+    async def update(self, data):
+        await _send(self.writer, {"tool": self.tool_name, "data": data})
+
+    async def close(self):
+        # The worker fell too far behind, it resubscribes after reconnecting
+        self.writer.close()
+
+
+class SharedStateServer:
+    """Runs the probes for every worker and serves them over a Unix socket."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.toolbox = Toolbox()
+        self.toolbox.register_manifest()
+        self.hub = MonitorHub(self.toolbox)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self):
+        await self.toolbox.startup()
+        # Only the lock holder gets here, so a socket file left behind is from a leader that died
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, self.path, limit=MAX_MESSAGE_SIZE)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Closing the connections lets their handlers finish instead of being cancelled at loop shutdown
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        await self.hub.shutdown()
+        await self.toolbox.shutdown()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        observers: Dict[str, _ConnectionObserver] = {}
+        requests = set()
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while line := await reader.readline():
+                message = loads(line)
+                action = message.get("action")
+                tool_name = message.get("tool")
+
+                if action == "subscribe" and tool_name not in observers:
+                    observers[tool_name] = _ConnectionObserver(writer, tool_name)
+                    try:
+                        await self.hub.subscribe(tool_name, observers[tool_name])
+                    except (KeyError, TypeError) as e:
+                        del observers[tool_name]
+                        logger.warning("Worker subscribed to '%s': %s", tool_name, e)
+                elif action == "unsubscribe" and tool_name in observers:
+                    self.hub.unsubscribe(tool_name, observers.pop(tool_name))
+                elif action in ("execute", "history", "status"):
+                    handler = {"execute": self._execute, "history": self._history, "status": self._status}[action]
+                    request = asyncio.create_task(handler(writer, message))
+                    requests.add(request)
+                    request.add_done_callback(requests.discard)
+        except (ConnectionError, ValueError) as e:
+            logger.warning("Dropping worker connection: %s", e)
+        finally:
+            for tool_name, observer in observers.items():
+                self.hub.unsubscribe(tool_name, observer)
+            for request in requests:
+                request.cancel()
+            writer.close()
+            del self._connections[asyncio.current_task()]
+
+    async def _execute(self, writer: asyncio.StreamWriter, message: dict):
+        reply = {"id": message["id"]}
+        try:
+            reply["result"] = await self.toolbox.execute_tool(
+                message["tool"], *message.get("args", ()), use_cache=message.get("use_cache", True),
+                **message.get("kwargs", {}),
+            )
+        except KeyError:
+            reply["not_found"] = True
+        except InvalidArgumentsError as e:
+            reply["invalid"] = str(e)
+        except CircuitOpenError as e:
+            reply["circuit_open"] = {"retry_in": e.retry_in, "last_good": e.last_good, "age": e.age}
+        except Exception as e:
+            reply["error"] = str(e)
+        await self._reply(writer, reply)
+
+    async def _history(self, writer: asyncio.StreamWriter, message: dict):
+        reply = {"id": message["id"]}
+        try:
+            reply["result"] = await self.hub.query_history(
+                message["tool"], message.get("start"), message.get("end"), message.get("step"), message.get("agg", "mean"),
+            )
+        except KeyError:
+            reply["not_found"] = True
+        except ValueError as e:
+            reply["invalid"] = str(e)
+        except Exception as e:
+            reply["error"] = str(e)
+        await self._reply(writer, reply)
+
+    async def _status(self, writer: asyncio.StreamWriter, message: dict):
+        reply = {"id": message["id"]}
+        if message.get("kind") == "breakers":
+            reply["result"] = self.toolbox.breaker_status()
+        elif message.get("kind") == "cache":
+            reply["result"] = self.toolbox.cache.stats()
+        else:
+            reply["invalid"] = f"Unknown status '{message.get('kind')}'"
+        await self._reply(writer, reply)
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, reply: dict):
+        try:
+            await _send(writer, reply)
+        except ConnectionError:
+            pass
+
+
+class RemoteObservable(Observable):
+    """Local stand-in for a tool monitored by the leader, fed with the updates it relays."""
+
+    def __init__(self, tool_class):
+        super().__init__()
+        self.queue_size = tool_class.queue_size
+        self.overflow_policy = tool_class.overflow_policy
+
+
+class SharedStateClient:
+    """A worker's connection to the leader, reconnecting whenever the leader changes."""
+
+    def __init__(self, path: str, connect_timeout: float = CONNECT_TIMEOUT):
+        self.path = path
+        self.connect_timeout = connect_timeout
+        self.observables: Dict[str, RemoteObservable] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def execute_tool(self, tool_name: str, args: tuple, kwargs: dict, use_cache: bool = True):
+        """Executes a tool in the leader process, raising KeyError for unknown tools like Toolbox does."""
+        reply = await self._request({"action": "execute", "tool": tool_name, "args": list(args), "kwargs": kwargs,
+                                     "use_cache": use_cache})
+        if reply.get("not_found"):
+            raise KeyError(tool_name)
+        if "invalid" in reply:
+            raise InvalidArgumentsError(reply["invalid"])
+        if "circuit_open" in reply:
+            raise CircuitOpenError(tool_name, **reply["circuit_open"])
+        if "error" in reply:
+            raise RemoteToolError(reply["error"])
+        return reply["result"]
+
+    async def query_history(self, tool_name: str, start: Optional[float], end: Optional[float], step: Optional[float],
+                            aggregation: str) -> Optional[dict]:
+        """Queries the history the leader recorded, raising like MonitorHub.query_history does."""
+        reply = await self._request({"action": "history", "tool": tool_name, "start": start, "end": end, "step": step,
+                                     "agg": aggregation})
+        if reply.get("not_found"):
+            raise KeyError(tool_name)
+        if "invalid" in reply:
+            raise ValueError(reply["invalid"])
+        if "error" in reply:
+            raise RemoteToolError(reply["error"])
+        return reply["result"]
+
+    async def query_status(self, kind: str) -> dict:
+        """Returns the leader toolbox's breaker status (kind "breakers") or cache stats (kind "cache")."""
+        reply = await self._request({"action": "status", "kind": kind})
+        if "invalid" in reply:
+            raise ValueError(reply["invalid"])
+        return reply["result"]
+
+    async def _request(self, message: dict) -> dict:
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise RemoteToolError("The shared-state leader is unavailable")
+
+        request_id = message["id"] = next(self._ids)
+        future = self._pending[request_id] = asyncio.get_running_loop().create_future()
+        try:
+            await _send(self._writer, message)
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    def observe(self, tool_name: str, tool_class) -> RemoteObservable:
+        """Returns the local observable the leader's updates for a tool are relayed into."""
+        observable = self.observables.get(tool_name)
+        if observable is None:
+            observable = self.observables[tool_name] = RemoteObservable(tool_class)
+            self._request_nowait({"action": "subscribe", "tool": tool_name})
+        return observable
+
+    def unobserve(self, tool_name: str):
+        if self.observables.pop(tool_name, None) is not None:
+            self._request_nowait({"action": "unsubscribe", "tool": tool_name})
+
+    def _request_nowait(self, message: dict):
+        # Sent again for every observed tool after a reconnect, so nothing is lost while disconnected
+        if self._writer is not None and self.connected:
+            self._writer.write(dumps(message) + b"\n")
+
+    async def _run(self):
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_SIZE)
+            except OSError:
+                # No leader is serving yet, e.g. during an election
+                await asyncio.sleep(ELECTION_INTERVAL / 2)
+                continue
+
+            self._connected.set()
+            try:
+                for tool_name in self.observables:
+                    self._request_nowait({"action": "subscribe", "tool": tool_name})
+                await self._read(reader)
+            except (ConnectionError, ValueError) as e:
+                logger.warning("Lost the connection to the shared-state leader: %s", e)
+            finally:
+                self._connected.clear()
+                self._writer.close()
+                self._writer = None
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(RemoteToolError("The shared-state leader went away"))
+
+    async def _read(self, reader: asyncio.StreamReader):
+        while line := await reader.readline():
+            message = loads(line)
+            if "id" in message:
+                future = self._pending.get(message["id"])
+                if future is not None and not future.done():
+                    future.set_result(message)
+            else:
+                observable = self.observables.get(message["tool"])
+                if observable is not None:
+                    await observable.publish(message["data"])
+
+
+class SharedStateCoordinator:
+    """Elects a leader between the workers sharing a directory and connects this worker to it."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.client = SharedStateClient(os.path.join(directory, SOCKET_FILE))
+        self.server: Optional[SharedStateServer] = None
+        self._lock_file = None
+        self._election: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.server is not None
+
+    async def start(self, relay: bool = True):
+        """Joins the election and, unless only hosting the leader (relay=False), connects to the leader."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.directory, LOCK_FILE), "a")
+        self._election = asyncio.create_task(self._elect())
+        if relay:
+            self.client.start()
+
+    async def stop(self):
+        if self._election is not None:
+            self._election.cancel()
+            await asyncio.gather(self._election, return_exceptions=True)
+        await self.client.stop()
+        if self.server is not None:
+            await self.server.stop()
+            self.server = None
+        # Closing the file releases the lock for the next worker
+        self._lock_file.close()
+
+    def status(self) -> dict:
+        return {
+            "enabled": True,
+            "directory": self.directory,
+            "leader": self.is_leader,
+            "connected": self.client.connected,
+            "relayed_tools": list(self.client.observables),
+        }
+
+    async def _elect(self):
+        while True:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(ELECTION_INTERVAL)
+
+        logger.info("Became the shared-state leader in %s", self.directory)
+        self.server = SharedStateServer(self.client.path)
+        await self.server.start()
+
+
+async def serve_forever(directory: str):
+    """Hosts the leader outside the workers, taking over once no worker holds the lock."""
+    coordinator = SharedStateCoordinator(directory)
+    await coordinator.start(relay=False)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await coordinator.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve_forever(sys.argv[1]))
@@ -1,6 +1,6 @@
 from enum import Enum
 
-class Tag(Enum):
+class Tag(str, Enum):
     AD = "Active Directory"
     INFORMATION = "Information"
     INTERNET = "Internet"
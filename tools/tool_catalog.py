@@ -0,0 +1,83 @@
+import hashlib
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from fast_json import dumps
+from .tags import Tag
+from .tool_type import ToolType
+
+
+def _parse_enum(enum_class, raw: str):
+    """Looks up an enum member by value ("Network") or by name ("NETWORK")."""
+    try:
+        return enum_class(raw)
+    except ValueError:
+        pass
+
+    try:
+        return enum_class[raw.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown {enum_class.__name__} '{raw}'") from None
+
+
+class ToolCatalog:
+    """Pre-serialized tool metadata, rebuilt only when tools are registered or unregistered."""
+
+    def __init__(self):
+        self._entries: Dict[str, dict] = {}
+        self._tag_index: Dict[Tag, Set[str]] = {}
+        self._type_index: Dict[ToolType, Set[str]] = {}
+        self._serialized: Dict[Tuple[Optional[Tag], Optional[ToolType]], Tuple[bytes, str]] = {}
+
+    def add(self, tool_name: str, name: str, description: str, tool_type: ToolType, tags: Sequence[Tag], icon: str):
+        self._entries[tool_name] = {
+            "name": name,
+            "description": description,
+            "tool_type": tool_type.value,
+            "tags": [tag.value for tag in tags],
+            "icon": icon,
+        }
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(tool_name)
+        self._type_index.setdefault(tool_type, set()).add(tool_name)
+        self._serialized.clear()
+
+    def remove(self, tool_name: str):
+        self._entries.pop(tool_name, None)
+        for index in (self._tag_index, self._type_index):
+            for tool_names in index.values():
+                tool_names.discard(tool_name)
+        self._serialized.clear()
+
+    def entries(self, tag: Optional[str] = None, tool_type: Optional[str] = None) -> List[dict]:
+        """Returns catalog entries in registration order, optionally filtered by tag and tool type."""
+        return self._filter(*self._parse_filters(tag, tool_type))
+
+    def serialized(self, tag: Optional[str] = None, tool_type: Optional[str] = None) -> Tuple[bytes, str]:
+        """Returns the JSON-encoded catalog and its strong ETag for the given filters."""
+        filters = self._parse_filters(tag, tool_type)
+        cached = self._serialized.get(filters)
+        if cached is None:
+            body = dumps(self._filter(*filters))
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            cached = self._serialized[filters] = (body, etag)
+        return cached
+
+    @staticmethod
+    def _parse_filters(tag: Optional[str], tool_type: Optional[str]):
+        return (
+            _parse_enum(Tag, tag) if tag else None,
+            _parse_enum(ToolType, tool_type) if tool_type else None,
+        )
+
+    def _filter(self, tag: Optional[Tag], tool_type: Optional[ToolType]) -> List[dict]:
+        tool_names = None
+        if tag is not None:
+            tool_names = self._tag_index.get(tag, set())
+        if tool_type is not None:
+            type_names = self._type_index.get(tool_type, set())
+            tool_names = type_names if tool_names is None else tool_names & type_names
+
+        return [
+            entry for tool_name, entry in self._entries.items()
+            if tool_names is None or tool_name in tool_names
+        ]
@@ -0,0 +1,47 @@
+import asyncio
+import concurrent.futures
+import functools
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+# Threads running synchronous tool code, kept apart from the event loop's default executor
+MAX_WORKERS = int(os.environ.get("TOOL_THREAD_POOL_SIZE", "8"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _init_thread():
+    if sys.platform == "win32":
+        try:
+            import pythoncom
+        except ImportError:
+            return
+        # WMI is COM, which has to be initialized in every thread that uses it
+        pythoncom.CoInitialize()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="tool", initializer=_init_thread)
+        return _executor
+
+
+def submit_blocking(function: Callable, *args, **kwargs) -> concurrent.futures.Future:
+    """Starts blocking tool code on the tool thread pool and returns the executor's future.
+
+    Unlike the asyncio future run_blocking awaits, it only completes once the code has returned, even
+    after the caller stopped waiting for it.
+    """
+    return get_executor().submit(functools.partial(function, *args, **kwargs))
+
+
+async def run_blocking(function: Callable, *args, **kwargs):
+    """Runs blocking tool code, e.g. a synchronous execute or a WMI query, on the tool thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(function, *args, **kwargs))
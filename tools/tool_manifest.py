@@ -0,0 +1,49 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from .tags import Tag
+from .tool_type import ToolType
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "manifest.json")
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Catalog metadata and import location of a tool, available without importing the tool itself."""
+
+    tool_name: str
+    module: str
+    class_name: str
+    name: str
+    description: str
+    tool_type: ToolType
+    tags: Tuple[Tag, ...]
+    icon: str
+    # platform.system() values the tool supports, empty means every platform
+    platforms: Tuple[str, ...] = ()
+
+    def supports_platform(self, system: str) -> bool:
+        return not self.platforms or system in self.platforms
+
+
+def load_manifest(path: str = DEFAULT_MANIFEST_PATH) -> List[ToolSpec]:
+    """Reads tool specs from a JSON manifest."""
+    with open(path, encoding="utf-8") as manifest_file:
+        entries = json.load(manifest_file)
+
+    return [
+        ToolSpec(
+            tool_name=entry["tool_name"],
+            module=entry["module"],
+            class_name=entry["class"],
+            name=entry["name"],
+            description=entry["description"],
+            tool_type=ToolType(entry["tool_type"]),
+            tags=tuple(Tag(tag) for tag in entry.get("tags", ())),
+            icon=entry["icon"],
+            platforms=tuple(entry.get("platforms", ())),
+        )
+        for entry in entries
+    ]
@@ -0,0 +1,42 @@
+import asyncio
+from typing import List, Type
+
+from .base_tool.base_tool import BaseTool
+
+
+class ToolPool:
+    """A bounded pool of started tool instances that are handed out one caller at a time."""
+
+    def __init__(self, tool_class: Type[BaseTool], size: int):
+        self.tool_class = tool_class
+        self.size = size
+        self._idle: List[BaseTool] = []
+        self._instances: List[BaseTool] = []
+        self._available = asyncio.Semaphore(size)
+
+    async def acquire(self) -> BaseTool:
+        """Waits for a free slot and returns an idle instance, starting a new one if none is idle."""
+        await self._available.acquire()
+        try:
+            if self._idle:
+                return self._idle.pop()
+
+            instance = self.tool_class()
+            await instance.startup()
+            self._instances.append(instance)
+            return instance
+        except BaseException:
+            self._available.release()
+            raise
+
+    def release(self, instance: BaseTool):
+        self._idle.append(instance)
+        self._available.release()
+
+    async def close(self):
+        """Shuts down every instance the pool has started."""
+        instances = self._instances
+        self._instances = []
+        self._idle = []
+        for instance in instances:
+            await instance.shutdown()
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ToolScope(Enum):
+    SINGLETON = "Singleton"
+    POOLED = "Pooled"
+    PER_CALL = "Per-Call"
\ No newline at end of file
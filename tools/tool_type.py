@@ -1,6 +1,6 @@
 from enum import Enum
 
-class ToolType(Enum):
+class ToolType(str, Enum):
     AUTO_ENABLED = "Auto-Enabled"
     SELF_SERVICE = "Self-Service"
     HIDDEN = "Hidden"
\ No newline at end of file
@@ -1,56 +1,438 @@
-from typing import Dict, Type
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import platform
+import time
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Type
+
+from metrics import TOOL_EXECUTE_ERRORS, TOOL_EXECUTE_SECONDS, TOOL_PROBE_SECONDS
+from .base_tool.base_tool import BaseTool, InvalidArgumentsError
+from .circuit_breaker import CircuitBreaker
+from .result_cache import ResultCache
+from .tool_catalog import ToolCatalog
+from .tool_pool import ToolPool
+from .tool_manifest import DEFAULT_MANIFEST_PATH, ToolSpec, load_manifest
+from .tool_executor import submit_blocking
+from .tool_scope import ToolScope
+
+logger = logging.getLogger(__name__)
+
+# Seconds an execution may take unless the tool declares its own execute_timeout
+DEFAULT_EXECUTE_TIMEOUT = float(os.environ.get("TOOL_EXECUTE_TIMEOUT", "30"))
+
+
+class ToolTimeoutError(Exception):
+    """An execution that ran past its tool's deadline."""
+
+
+def _parse_bool(value: str) -> bool:
+    if value.lower() in ("true", "1", "yes"):
+        return True
+    if value.lower() in ("false", "0", "no"):
+        return False
+    raise ValueError(value)
+
+
+# Conversions applied to string arguments, e.g. query parameters, by the annotation of the parameter
+_CONVERTERS = {int: int, float: float, bool: _parse_bool}
+
+
+@dataclass(frozen=True)
+class ToolDispatch:
+    """How the toolbox calls a tool's execute, worked out once when the tool class is registered."""
+
+    is_async: bool
+    # Signature of execute without self
+    signature: inspect.Signature
+    max_concurrency: Optional[int]
+
+    @classmethod
+    def for_tool(cls, tool_class: Type[BaseTool]) -> "ToolDispatch":
+        signature = inspect.signature(tool_class.execute)
+        parameters = list(signature.parameters.values())[1:]
+        return cls(
+            is_async=inspect.iscoroutinefunction(tool_class.execute),
+            signature=signature.replace(parameters=parameters),
+            max_concurrency=tool_class.max_concurrency,
+        )
+
+    def bind(self, tool_name: str, arguments: Mapping[str, Any]) -> dict:
+        """Checks keyword arguments against the signature, converting strings for int, float and bool parameters."""
+        kwargs = {}
+        for name, value in arguments.items():
+            parameter = self.signature.parameters.get(name)
+            converter = _CONVERTERS.get(parameter.annotation) if parameter is not None else None
+            if converter is not None and isinstance(value, str):
+                try:
+                    value = converter(value)
+                except ValueError:
+                    raise InvalidArgumentsError(
+                        f"Argument '{name}' of tool '{tool_name}' must be of type {parameter.annotation.__name__}") from None
+            kwargs[name] = value
+
+        try:
+            self.signature.bind(**kwargs)
+        except TypeError as e:
+            raise InvalidArgumentsError(f"Invalid arguments for tool '{tool_name}': {e}") from None
+        return kwargs
 
-from .base_tool.base_tool import BaseTool
 
 class Toolbox:
-    def __init__(self):
+    def __init__(self, cache_size: int = 256, execute_timeout: float = DEFAULT_EXECUTE_TIMEOUT):
         self.tools: Dict[str, Type[BaseTool]] = {}
+        self.specs: Dict[str, ToolSpec] = {}
+        self.cache = ResultCache(max_entries=cache_size)
+        self.catalog = ToolCatalog()
+        self.execute_timeout = execute_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._dispatch: Dict[str, ToolDispatch] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._singletons: Dict[str, BaseTool] = {}
+        self._singleton_locks: Dict[str, asyncio.Lock] = {}
+        self._pools: Dict[str, ToolPool] = {}
+        self.register_seconds: Dict[str, float] = {}
+        self.import_seconds: Dict[str, float] = {}
+        self.skipped_tools: Dict[str, str] = {}
+        # SharedStateClient of a shared-state worker, whose executes run in the leader process
+        self.remote = None
 
     def register_tool(self, tool: Type[BaseTool]):
         """Registers a tool in the toolbox."""
         if not issubclass(tool, BaseTool):
             raise ValueError(f"Tool '{tool.__name__}' must inherit from BaseTool")
 
-        if tool.__name__ in self.tools:
+        if self.has_tool(tool.__name__):
             raise ValueError(f"Tool '{tool.__name__}' is already registered")
 
         self.tools[tool.__name__] = tool
+        self._dispatch[tool.__name__] = ToolDispatch.for_tool(tool)
+        self.catalog.add(tool.__name__, tool.name, tool.description, tool.tool_type, tool.tags, tool.icon)
+
+    def register_spec(self, spec: ToolSpec):
+        """Registers a tool from its spec, deferring the import of its module until first use."""
+        if self.has_tool(spec.tool_name):
+            raise ValueError(f"Tool '{spec.tool_name}' is already registered")
+
+        self.specs[spec.tool_name] = spec
+        self.catalog.add(spec.tool_name, spec.name, spec.description, spec.tool_type, spec.tags, spec.icon)
+
+    def register_manifest(self, path: str = DEFAULT_MANIFEST_PATH):
+        """Registers every tool in a manifest that supports the current platform."""
+        system = platform.system()
+
+        for spec in load_manifest(path):
+            if not spec.supports_platform(system):
+                self.skipped_tools[spec.tool_name] = f"Not supported on {system}"
+                continue
+
+            started = time.perf_counter()
+            self.register_spec(spec)
+            self.register_seconds[spec.tool_name] = time.perf_counter() - started
+
+    def has_tool(self, tool_name: str) -> bool:
+        return tool_name in self.tools or tool_name in self.specs
 
     def unregister_tool(self, tool_name: str):
         """Unregister's a tool from the toolbox."""
-        if tool_name not in self.tools:
+        if not self.has_tool(tool_name):
             raise KeyError(f"Tool '{tool_name}' not found")
 
-        del self.tools[tool_name]
+        self.tools.pop(tool_name, None)
+        self.specs.pop(tool_name, None)
+        self._dispatch.pop(tool_name, None)
+        self._limits.pop(tool_name, None)
+        self.catalog.remove(tool_name)
+        self.cache.clear()
+        self._singleton_locks.pop(tool_name, None)
+
+        # Shut down the instances the tool still owns in the background
+        singleton = self._singletons.pop(tool_name, None)
+        pool = self._pools.pop(tool_name, None)
+        if singleton is not None or pool is not None:
+            try:
+                asyncio.get_running_loop().create_task(self._close_instances(singleton, pool))
+            except RuntimeError:
+                # No loop is running, so nothing can be holding the instances open anymore
+                pass
 
     def get_tool(self, tool_name: str) -> Type[BaseTool]:
-        """Gets the tool class by its name."""
-        if tool_name not in self.tools:
+        """Gets the tool class by its name, importing it first if it was registered from a spec."""
+        if tool_name in self.tools:
+            return self.tools[tool_name]
+
+        if tool_name not in self.specs:
             raise KeyError(f"Tool '{tool_name}' not found")
 
-        return self.tools[tool_name]
+        return self._load_spec(self.specs[tool_name])
+
+    def bind_arguments(self, tool_name: str, arguments: Mapping[str, Any]) -> dict:
+        """Validates keyword arguments, e.g. query parameters, against the tool's cached execute signature.
+
+        Raises KeyError for unknown tools and InvalidArgumentsError for arguments execute would not accept.
+        """
+        self.get_tool(tool_name)
+        return self._dispatch[tool_name].bind(tool_name, arguments)
+
+    def startup_report(self) -> dict:
+        """Returns how long registration and the lazy tool imports took, and which tools were skipped."""
+        return {
+            "tool_register_seconds": dict(self.register_seconds),
+            "tool_import_seconds": dict(self.import_seconds),
+            "loaded_tools": list(self.tools),
+            "pending_tools": [tool_name for tool_name in self.specs if tool_name not in self.tools],
+            "skipped_tools": dict(self.skipped_tools),
+        }
+
+    def _load_spec(self, spec: ToolSpec) -> Type[BaseTool]:
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(spec.module)
+        except ImportError as e:
+            # Drop the tool instead of failing every later request on the same import
+            logger.warning("Could not import tool '%s': %s", spec.tool_name, e)
+            self.unregister_tool(spec.tool_name)
+            self.skipped_tools[spec.tool_name] = f"Import failed: {e}"
+            raise KeyError(f"Tool '{spec.tool_name}' is unavailable") from e
+
+        tool_class = getattr(module, spec.class_name)
+        if not issubclass(tool_class, BaseTool):
+            raise ValueError(f"Tool '{spec.tool_name}' must inherit from BaseTool")
+
+        self.import_seconds[spec.tool_name] = time.perf_counter() - started
+        self.tools[spec.tool_name] = tool_class
+        self._dispatch[spec.tool_name] = ToolDispatch.for_tool(tool_class)
+        return tool_class
+
+    async def execute_tool(self, tool_name: str, *args, use_cache: bool = True, **kwargs):
+        """Executes a tool by its name with the given arguments.
+
+        Results are cached for the TTL declared by the tool and concurrent calls with the same
+        arguments share one execution. Pass use_cache=False to force a fresh execution.
+
+        Executions past the tool's deadline raise ToolTimeoutError. While the tool's circuit breaker is
+        open, CircuitOpenError is raised with the last-known-good result instead of executing.
+        """
+        tool_class = self.get_tool(tool_name)
+
+        started = time.perf_counter()
+        try:
+            if self.remote is not None:
+                # The leader runs the probe and owns the shared cache
+                return await self.remote.execute_tool(tool_name, args, kwargs, use_cache)
+            return await self._execute_cached(tool_name, tool_class, args, kwargs, use_cache)
+        except Exception:
+            TOOL_EXECUTE_ERRORS.inc(tool=tool_name)
+            raise
+        finally:
+            TOOL_EXECUTE_SECONDS.observe(time.perf_counter() - started, tool=tool_name)
+
+    async def _execute_cached(self, tool_name: str, tool_class: Type[BaseTool], args: tuple, kwargs: dict,
+                              use_cache: bool):
+        # tool_name is the registered name, which a manifest entry may set apart from the class name
+        ttl = tool_class.get_cache_ttl(*args, **kwargs)
+
+        try:
+            key = self.cache.make_key(tool_name, args, kwargs)
+        except TypeError:
+            return await self._execute_guarded(tool_name, tool_class, None, args, kwargs)
+
+        if not use_cache:
+            result = await self._execute_guarded(tool_name, tool_class, key, args, kwargs)
+            self.cache.store(key, ttl, result)
+            return result
+
+        return await self.cache.get_or_execute(key, ttl, lambda: self._execute_guarded(tool_name, tool_class, key, args, kwargs))
+
+    def get_breaker(self, tool_name: str, tool_class: Type[BaseTool]) -> CircuitBreaker:
+        breaker = self.breakers.get(tool_name)
+        if breaker is None:
+            breaker = self.breakers[tool_name] = CircuitBreaker(
+                tool_name, tool_class.breaker_threshold, tool_class.breaker_cooldown)
+        return breaker
+
+    def breaker_status(self) -> Dict[str, dict]:
+        """Returns the circuit breaker state of every tool executed so far."""
+        return {tool_name: breaker.status() for tool_name, breaker in self.breakers.items()}
+
+    async def query_breaker_status(self) -> Dict[str, dict]:
+        """Returns breaker_status() of the toolbox that executes, the leader's for shared-state workers."""
+        if self.remote is not None:
+            return await self.remote.query_status("breakers")
+        return self.breaker_status()
+
+    async def query_cache_stats(self) -> dict:
+        """Returns the stats of the cache executions go through, the leader's for shared-state workers."""
+        if self.remote is not None:
+            return await self.remote.query_status("cache")
+        return self.cache.stats()
+
+    async def _execute_guarded(self, tool_name: str, tool_class: Type[BaseTool], key, args: tuple, kwargs: dict):
+        # Cache hits never get here, so the breaker and the deadline only apply to actual probes
+        try:
+            self._dispatch[tool_name].signature.bind(*args, **kwargs)
+        except TypeError as e:
+            raise InvalidArgumentsError(f"Invalid arguments for tool '{tool_name}': {e}") from None
+        breaker = self.get_breaker(tool_name, tool_class)
+        breaker.before_call(key)
+        timeout = tool_class.execute_timeout or self.execute_timeout
+
+        try:
+            result = await asyncio.wait_for(self._execute(tool_name, *args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            breaker.record_failure(f"Timed out after {timeout:.3g}s")
+            raise ToolTimeoutError(f"Tool '{tool_name}' timed out after {timeout:.3g}s") from None
+        except (InvalidArgumentsError, asyncio.CancelledError):
+            # Rejected arguments or a cancelled caller say nothing about the probe, any other error,
+            # including a TypeError or ValueError from parsing the probe's output, counts as a failure
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            breaker.record_failure(str(e) or type(e).__name__)
+            raise
+
+        breaker.record_success(key, result)
+        return result
+
+    def _concurrency_limit(self, tool_name: str, dispatch: ToolDispatch) -> Optional[asyncio.Semaphore]:
+        if dispatch.max_concurrency is None:
+            return None
+        limit = self._limits.get(tool_name)
+        if limit is None:
+            limit = self._limits[tool_name] = asyncio.Semaphore(dispatch.max_concurrency)
+        return limit
+
+    async def _execute(self, tool_name: str, *args, **kwargs):
+        dispatch = self._dispatch[tool_name]
+        limit = self._concurrency_limit(tool_name, dispatch)
+        started = time.perf_counter()
+        try:
+            if not dispatch.is_async:
+                # Synchronous tools would block the event loop
+                return await self._execute_blocking(tool_name, limit, args, kwargs)
+            async with limit or nullcontext(), self.use_tool(tool_name) as tool_instance:
+                return await tool_instance.execute(*args, **kwargs)
+        finally:
+            TOOL_PROBE_SECONDS.observe(time.perf_counter() - started, tool=tool_name)
+
+    async def _execute_blocking(self, tool_name: str, limit: Optional[asyncio.Semaphore], args: tuple, kwargs: dict):
+        # A call that misses its deadline keeps running in its thread, so it keeps its concurrency slot and
+        # its instance until it returns instead of until the caller gives up
+        if limit is not None:
+            await limit.acquire()
+        try:
+            tool_instance = await self.acquire_tool(tool_name)
+        except BaseException:
+            if limit is not None:
+                limit.release()
+            raise
 
-    def execute_tool(self, tool_name: str, *args, **kwargs):
-        """Executes a tool by its name with the given arguments."""
+        loop = asyncio.get_running_loop()
+
+        def finished():
+            if limit is not None:
+                limit.release()
+            loop.create_task(self.release_tool(tool_name, tool_instance))
+
+        def thread_done(_):
+            try:
+                loop.call_soon_threadsafe(finished)
+            except RuntimeError:
+                # The loop closed while the call was still running
+                pass
+
+        try:
+            future = submit_blocking(tool_instance.execute, *args, **kwargs)
+        except BaseException:
+            finished()
+            raise
+        future.add_done_callback(thread_done)
+        return await asyncio.wrap_future(future)
+
+    async def acquire_tool(self, tool_name: str) -> BaseTool:
+        """Returns a started instance of the tool according to its scope.
+
+        Every acquired instance must be handed back with release_tool.
+        """
         tool_class = self.get_tool(tool_name)
-        tool_instance = tool_class()
-        return tool_instance.execute(*args, **kwargs)
 
-    def list_tools(self):
+        if tool_class.scope is ToolScope.SINGLETON:
+            return await self._get_singleton(tool_name)
+
+        if tool_class.scope is ToolScope.POOLED:
+            pool = self._pools.get(tool_name)
+            if pool is None:
+                pool = self._pools[tool_name] = ToolPool(tool_class, tool_class.pool_size)
+            return await pool.acquire()
+
+        instance = tool_class()
+        await instance.startup()
+        return instance
+
+    async def release_tool(self, tool_name: str, instance: BaseTool):
+        """Hands back an instance obtained from acquire_tool."""
+        tool_class = self.tools.get(tool_name) if self.has_tool(tool_name) else None
+        if tool_class is None:
+            # The tool was unregistered while the instance was in use
+            await instance.shutdown()
+        elif tool_class.scope is ToolScope.POOLED and tool_name in self._pools:
+            self._pools[tool_name].release(instance)
+        elif tool_class.scope is ToolScope.PER_CALL:
+            await instance.shutdown()
+
+    @asynccontextmanager
+    async def use_tool(self, tool_name: str):
+        """Context manager around acquire_tool and release_tool."""
+        instance = await self.acquire_tool(tool_name)
+        try:
+            yield instance
+        finally:
+            await self.release_tool(tool_name, instance)
+
+    async def startup(self):
+        """Starts every loaded singleton tool so its resources are open before the first request.
+
+        Tools registered from a manifest stay unimported until first use and start then, call get_tool
+        for one before startup to start it eagerly.
+        """
+        for tool_name, tool_class in list(self.tools.items()):
+            if tool_class.scope is ToolScope.SINGLETON:
+                await self._get_singleton(tool_name)
+
+    async def shutdown(self):
+        """Shuts down every singleton and pooled instance the toolbox has started."""
+        singletons, self._singletons = self._singletons, {}
+        pools, self._pools = self._pools, {}
+        for instance in singletons.values():
+            await instance.shutdown()
+        for pool in pools.values():
+            await pool.close()
+
+    async def _get_singleton(self, tool_name: str) -> BaseTool:
+        instance = self._singletons.get(tool_name)
+        if instance is not None:
+            return instance
+
+        # Concurrent first uses must not start the singleton twice
+        lock = self._singleton_locks.setdefault(tool_name, asyncio.Lock())
+        async with lock:
+            instance = self._singletons.get(tool_name)
+            if instance is None:
+                instance = self.get_tool(tool_name)()
+                await instance.startup()
+                self._singletons[tool_name] = instance
+            return instance
+
+    @staticmethod
+    async def _close_instances(singleton: Optional[BaseTool], pool: Optional[ToolPool]):
+        if singleton is not None:
+            await singleton.shutdown()
+        if pool is not None:
+            await pool.close()
+
+    def list_tools(self, tag: Optional[str] = None, tool_type: Optional[str] = None):
         """Lists all the current tools as objects with their name, description, and icon."""
-        tools_list = []
-
-        for tool_name in self.tools:
-            tool_class = self.get_tool(tool_name)
-            tool_instance = tool_class()
-        
-            tool_data = {
-                "name": tool_instance.name,
-                "description": tool_instance.description,
-                "tool_type": tool_instance.tool_type,
-                "tags": tool_instance.tags,
-                "icon": tool_instance.icon
-            }
-            tools_list.append(tool_data)
-
-        return tools_list
\ No newline at end of file
+        return self.catalog.entries(tag=tag, tool_type=tool_type)
\ No newline at end of file
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+from typing import Any, Optional
+
+from fastapi import WebSocket
+
+from fast_json import dumps_text, loads
+from json_patch import make_patch
+from observable import Observer
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ENCODINGS = ("json", "msgpack") if msgpack is not None else ("json",)
+
+# Seconds a client has to answer a heartbeat ping before its subscription is reaped
+HEARTBEAT_TIMEOUT = float(os.environ.get("WS_HEARTBEAT_TIMEOUT", "10"))
+# Lower bound on the ping interval a client can ask for
+HEARTBEAT_MIN_INTERVAL = 5.0
+
+
+class Heartbeat:
+    """Application-level ping/pong state of one connection.
+
+    ASGI does not expose WebSocket ping frames, those are configured on the server (uvicorn's
+    --ws-ping-interval and --ws-ping-timeout). This covers clients behind proxies that keep the
+    transport open after the client is gone: any frame from the client counts as the pong.
+    """
+
+    def __init__(self, interval: float, timeout: float = HEARTBEAT_TIMEOUT):
+        self.interval = max(interval, HEARTBEAT_MIN_INTERVAL)
+        self.timeout = timeout
+        self.last_seen = time.monotonic()
+        self.ping_sent_at: Optional[float] = None
+
+    def seen(self):
+        self.last_seen = time.monotonic()
+        self.ping_sent_at = None
+
+    def sent(self):
+        # Only the first unanswered ping starts the timeout
+        if self.ping_sent_at is None:
+            self.ping_sent_at = time.monotonic()
+
+    def expired(self, now: float) -> bool:
+        return self.ping_sent_at is not None and now - self.ping_sent_at > self.timeout
+
+
+class WebSocketObserver(Observer):
+    def __init__(self, websocket: WebSocket, heartbeat: Optional[Heartbeat] = None):
+        self.websocket = websocket
+        self.heartbeat = heartbeat
+        # Pings are sent from the heartbeat task, so sends are serialized with the delivery task's
+        self._send_lock = asyncio.Lock()
+
+    async def update(self, data: any):
+        await self.send_message(data)
+
+    async def send_message(self, message: Any):
+        async with self._send_lock:
+            await self.websocket.send_text(dumps_text(message))
+
+    async def ping(self):
+        self.heartbeat.sent()
+        await self.send_message({"type": "ping", "ts": time.time()})
+
+    def expired(self, now: float) -> bool:
+        return self.heartbeat is not None and self.heartbeat.expired(now)
+
+    async def close(self):
+        try:
+            # 1013: try again later, the client could not keep up or the send failed
+            await self.websocket.close(code=1013)
+        except RuntimeError:
+            # The socket is already closed
+            pass
+
+
+class DeltaWebSocketObserver(WebSocketObserver):
+    """Sends one full snapshot and then sequence-numbered JSON-Patch deltas.
+
+    Messages are {"type": "snapshot", "seq": n, "data": ...} or {"type": "patch", "seq": n, "ops": [...]},
+    encoded as JSON text frames or, with the msgpack encoding, as binary frames.
+    """
+
+    def __init__(self, websocket: WebSocket, encoding: str = "json", heartbeat: Optional[Heartbeat] = None):
+        super().__init__(websocket, heartbeat)
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding '{encoding}'")
+
+        self.encoding = encoding
+        self._seq = 0
+        self._last_sent: Optional[Any] = None
+        self._has_snapshot = False
+
+    async def update(self, data: Any):
+        if not self._has_snapshot:
+            await self.send_snapshot(data)
+            return
+
+        ops = make_patch(self._last_sent, data)
+        if not ops:
+            return
+
+        self._seq += 1
+        self._last_sent = data
+        await self.send_message({"type": "patch", "seq": self._seq, "ops": ops})
+
+    async def send_snapshot(self, data: Any):
+        self._seq += 1
+        self._last_sent = data
+        self._has_snapshot = True
+        await self.send_message({"type": "snapshot", "seq": self._seq, "data": data})
+
+    def request_resync(self):
+        """Makes the next delivered state go out as a full snapshot, for a client that fell out of step."""
+        self._has_snapshot = False
+
+    def decode(self, message: dict) -> Optional[dict]:
+        """Decodes a client frame received in this observer's encoding, returning None if it is malformed."""
+        try:
+            if message.get("bytes") is not None and msgpack is not None:
+                decoded = msgpack.unpackb(message["bytes"])
+            elif message.get("text") is not None:
+                decoded = loads(message["text"])
+            else:
+                return None
+        except ValueError:
+            return None
+
+        return decoded if isinstance(decoded, dict) else None
+
+    async def send_message(self, message: dict):
+        if self.encoding != "msgpack":
+            await super().send_message(message)
+            return
+        async with self._send_lock:
+            await self.websocket.send_bytes(msgpack.packb(message))